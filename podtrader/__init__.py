@@ -0,0 +1 @@
+from .jit import warmup, set_cache_dir
@@ -0,0 +1,32 @@
+import importlib
+import sys
+from typing import Dict
+
+__all__ = ['lazy_module']
+
+
+def lazy_module(module_name: str, attrs: Dict[str, str]):
+    """
+    为包生成 PEP 562 风格的 ``__getattr__`` / ``__dir__``，属性在首次访问时才导入对应子模块
+
+    用法::
+
+        __getattr__, __dir__ = lazy_module(__name__, {'QQE': '.momentum.qqe'})
+
+    :param module_name: 包名，一般传 ``__name__``
+    :param attrs: 属性名 -> 子模块（相对于 module_name 的相对路径）
+    :return: (__getattr__, __dir__)
+    """
+
+    def __getattr__(name: str):
+        if name not in attrs:
+            raise AttributeError(f"module {module_name!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(attrs[name], module_name), name)
+        # 写回模块字典，后续访问不再经过 __getattr__
+        setattr(sys.modules[module_name], name, value)
+        return value
+
+    def __dir__():
+        return sorted(set(vars(sys.modules[module_name])) | set(attrs))
+
+    return __getattr__, __dir__
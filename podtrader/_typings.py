@@ -1,4 +1,7 @@
-from typing import Literal
+from datetime import datetime
+from typing import Literal, Union
+
+import pandas as pd
 
 intervalT = Literal[
     '1d',
@@ -9,3 +12,6 @@ intervalT = Literal[
     '5min',
     '1min'
 ]
+
+# 与 vectorbt._typing.DatetimeLike 一致，避免仅为类型注解导入 vectorbt
+DatetimeLike = Union[str, int, float, pd.Timestamp, datetime]
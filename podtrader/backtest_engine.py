@@ -1,12 +1,13 @@
 from datetime import datetime
 
-import matplotlib.pyplot as plt
 import pandas as pd
 from dateutil.relativedelta import relativedelta
-from typing import List, Dict, Any, Union
+from typing import List, Dict, Any, Mapping, Union
 
 from .brokerage.backtest_brokerage import BacktestBrokerage
 from .entities import (
+    BacktestConfig,
+    BacktestConfigT,
     Investment,
     InvestmentT,
     IndicatorListT,
@@ -15,11 +16,9 @@ from .entities import (
 )
 from ._typings import intervalT
 from .events import BacktestEventEngine, TickEvent, SignalEvent, EventType
-from .indicators import IndicatorExecutor
-from .providers import BacktestDataFeed, download_historical_data, CandleManager
-from .rules import TradeRule
-from .signals import SignalExecutor
-from .utils import backtest_2d
+from .pipeline import RunningConfig, StrategyPipeline
+from .providers import MAX_CANDLES, BacktestDataFeed, download_historical_data
+from .utils import DiskCache, save_results, load_results
 
 
 def _load_price(instrument_target, interval: Union[str, intervalT], start_time: str = None, end_time: str = None,
@@ -51,79 +50,130 @@ def _load_price(instrument_target, interval: Union[str, intervalT], start_time:
     return data
 
 
+def _show():
+    """
+    显示图像，matplotlib 只在绘图时才导入
+    """
+    import matplotlib.pyplot as plt
+    plt.show()
+
+
+def _result_section(key: str, default):
+    """
+    PlotBase 的报表属性：首次读取时才从回测结果中取出（BacktestResult 在此时才计算该部分）
+    """
+
+    def fget(self):
+        if key not in self._sections:
+            self._sections[key] = self._result[key] if key in self._result else default()
+        return self._sections[key]
+
+    def fset(self, value):
+        self._sections[key] = value
+        self._frames.pop(key, None)
+
+    return property(fget, fset)
+
+
 class PlotBase:
+    # 报表各部分，[[日期, 值], ...] 或 [{...}, ...]
+    cum_return = _result_section('cum_return', list)
+    benchmark_return = _result_section('benchmark_return', list)
+    max_drawdown = _result_section('max_drawdown', list)
+    annual_stats = _result_section('annual_stats', list)
+    month_return = _result_section('month_return', dict)
+    summary = _result_section('summary', list)
+    additional_stats = _result_section('additional_stats', list)
+    total_stats = _result_section('total_stats', list)
+    orders = _result_section('orders', list)
+    trades = _result_section('trades', list)
+
     def __init__(self):
-        self.cum_return: List[List[str, float]] = []
-        self.benchmark_return: List[List[str, float]] = []
-        self.max_drawdown: List[List[str, float]] = []
-        self.annual_stats: List[Dict[str, Any]] = []
-        self.month_return: Dict[str, Any] = {}
-        self.summary: List[Dict[str, Any]] = []
-        self.additional_stats: List[Dict[str, Any]] = []
-        self.total_stats: List[Dict[str, Any]] = []
-        self.orders: List[Dict[str, Any]] = []
-        self.trades: List[Dict[str, Any]] = []
-
-    def parse_bt_result(self, results: Dict[str, Any]):
-        # 根据类的属性名，将结果中的数据解析到类的属性中
-        for key, value in results.items():
-            if hasattr(self, key):
-                setattr(self, key, value)
+        # 回测结果：backtest_2d 返回的 BacktestResult，或同样键名的 dict
+        self._result: Mapping[str, Any] = {}
+        # 已取出的报表部分
+        self._sections: Dict[str, Any] = {}
+        # get_* 返回的 DataFrame 缓存
+        self._frames: Dict[str, pd.DataFrame] = {}
+
+    @property
+    def result(self) -> Mapping[str, Any]:
+        """
+        回测结果（backtest_2d 返回的 BacktestResult 等）
+        """
+        return self._result
+
+    def parse_bt_result(self, results: Mapping[str, Any]):
+        # 只保存结果，各部分在读取时才解析
+        self._result = results
+        self._sections = {}
+        self._frames = {}
         return self
 
+    def _get_frame(self, key: str, build):
+        """
+        报表部分的 DataFrame，优先由 BacktestResult.frame 直接生成，避免 list/dict 中转；结果缓存
+        """
+        if key not in self._frames:
+            frame = getattr(self._result, 'frame', None)
+            if frame is not None and key not in self._sections:
+                self._frames[key] = frame(key)
+            else:
+                self._frames[key] = build()
+        return self._frames[key].copy()
+
+    def _get_series_frame(self, key: str, name: str):
+        def build():
+            frame = pd.DataFrame(getattr(self, key), columns=['date', name])
+            frame['date'] = pd.to_datetime(frame['date'])
+            return frame.set_index('date')
+
+        return self._get_frame(key, build)
+
     def get_cum_return(self):
-        cum_ret = pd.DataFrame(self.cum_return, columns=['date', 'cum_return'])
-        cum_ret['date'] = pd.to_datetime(cum_ret['date'])
-        cum_ret = cum_ret.set_index('date')
-        return cum_ret
+        return self._get_series_frame('cum_return', 'cum_return')
 
     def plot_cum_return(self):
         cum_ret = self.get_cum_return()
         cum_ret.plot()
-        plt.show()
+        _show()
 
     def get_benchmark_return(self):
-        benchmark_ret = pd.DataFrame(self.benchmark_return, columns=['date', 'benchmark_return'])
-        benchmark_ret['date'] = pd.to_datetime(benchmark_ret['date'])
-        benchmark_ret = benchmark_ret.set_index('date')
-        return benchmark_ret
+        return self._get_series_frame('benchmark_return', 'benchmark_return')
 
     def plot_benchmark_return(self):
         benchmark_ret = self.get_benchmark_return()
         benchmark_ret.plot()
-        plt.show()
+        _show()
 
     def get_max_drawdown(self):
-        max_drawdown = pd.DataFrame(self.max_drawdown, columns=['date', 'drawdown'])
-        max_drawdown['date'] = pd.to_datetime(max_drawdown['date'])
-        max_drawdown = max_drawdown.set_index('date')
-        return max_drawdown
+        return self._get_series_frame('max_drawdown', 'drawdown')
 
     def plot_max_drawdown(self):
         drawdown = self.get_max_drawdown()
         drawdown.plot()
-        plt.show()
+        _show()
 
     def get_annual_stats(self):
-        return pd.DataFrame(self.annual_stats)
+        return self._get_frame('annual_stats', lambda: pd.DataFrame(self.annual_stats))
 
     def get_month_return(self):
         return self.month_return
 
     def get_summary(self):
-        return pd.DataFrame(self.summary)
+        return self._get_frame('summary', lambda: pd.DataFrame(self.summary))
 
     def get_additional_stats(self):
-        return pd.DataFrame(self.additional_stats)
+        return self._get_frame('additional_stats', lambda: pd.DataFrame(self.additional_stats))
 
     def get_total_stats(self):
-        return pd.DataFrame(self.total_stats)
+        return self._get_frame('total_stats', lambda: pd.DataFrame(self.total_stats))
 
     def get_orders(self):
-        return pd.DataFrame(self.orders)
+        return self._get_frame('orders', lambda: pd.DataFrame(self.orders))
 
     def get_trades(self):
-        return pd.DataFrame(self.trades)
+        return self._get_frame('trades', lambda: pd.DataFrame(self.trades))
 
     def results(self):
         return {
@@ -139,10 +189,27 @@ class PlotBase:
             "trades": self.trades,
         }
 
+    def save_results(self, path: str, fmt: str = 'parquet'):
+        """
+        以列式格式（Parquet / Arrow IPC）保存回测结果
+
+        :param path: 目录
+        :param fmt: 'parquet' 或 'arrow'
+        """
+        return save_results(self, path, fmt=fmt)
+
+    def load_results(self, path: str, fmt: str = None):
+        """
+        读取 save_results 保存的结果
+        """
+        return self.parse_bt_result(load_results(path, fmt=fmt))
+
     def plot(self):
         """
         绘制回测结果
         """
+        import matplotlib.pyplot as plt
+
         fig, ax = plt.subplots(2, 1, figsize=(12, 8))
         cum_ret = self.get_cum_return()
         benchmark_ret = self.get_benchmark_return()
@@ -156,78 +223,14 @@ class PlotBase:
         plt.show()
 
 
-class RunningConfig:
-    def __init__(self, config: List[Dict[str, Any]] = None):
-        # 自定义参数
-        if config is None:
-            config = []
-        self.config = config
-
-        # 默认数据
-        self.current_time: datetime = None
-        self.open: float = None
-        self.high: float = None
-        self.low: float = None
-        self.close: float = None
-        self.volume: int = None
-
-        self.last_buy_time: Union[str, datetime] = None
-        self.last_buy_price: float = None
-        self.buy_time: Union[str, datetime] = None
-        self.buy_price: float = None
-
-        self.last_sell_time: Union[str, datetime] = None
-        self.last_sell_price: float = None
-        self.sell_time: Union[str, datetime] = None
-        self.sell_price: float = None
-
-        self.position: int = 0
-        self.cash: float = 0.0
-
-    def update(self, key: str, value: Any):
-        if hasattr(self, key):
-            setattr(self, key, value)
-
-    def update_all(self, **kwargs):
-        for key, value in kwargs.items():
-            if hasattr(self, key):
-                if key == 'buy_price':
-                    self.last_buy_price = self.buy_price
-                elif key == 'buy_time':
-                    self.last_buy_time = self.buy_time
-                elif key == 'sell_price':
-                    self.last_sell_price = self.sell_price
-                elif key == 'sell_time':
-                    self.last_sell_time = self.sell_time
-                setattr(self, key, value)
-
-    def get_params(self):
-        params = {
-            'dt': self.current_time.strftime('%Y-%m-%d %H:%M:%S'),
-            'open': self.open,
-            'high': self.high,
-            'low': self.low,
-            'close': self.close,
-            'volume': self.volume,
-            'last_buy_time': self.last_buy_time,
-            'last_buy_price': self.last_buy_price,
-            'buy_time': self.buy_time,
-            'buy_price': self.buy_price,
-            'last_sell_time': self.last_sell_time,
-            'last_sell_price': self.last_sell_price,
-            'sell_time': self.sell_time,
-            'sell_price': self.sell_price,
-            'position': self.position,
-            'cash': self.cash
-        }
-        return params
-
-
-class BacktestEngine(PlotBase):
+class BacktestEngine(PlotBase, StrategyPipeline):
     def __init__(self, init_cash: float = 10000.0, commission: float = 0.0, slippage: float = 0.0,
                  investment: InvestmentT = None, start_time: str = '2015-01-01', end_time: str = None,
                  interval: Union[str, intervalT] = '1d', datasource: str = 'TV', indicators: IndicatorListT = None,
-                 signals: SignalListT = None, rules: RuleListT = None, runConfig: List[Dict[str, Any]] = None):
+                 signals: SignalListT = None, rules: RuleListT = None, runConfig: List[Dict[str, Any]] = None,
+                 price_data: Dict[str, Dict[str, pd.DataFrame]] = None, calculate_time: Any = None,
+                 indicator_cache: Union[str, DiskCache] = None, stop_loss: float = None, take_profit: float = None,
+                 intrabar_path: str = 'pessimistic'):
         """
         回测引擎
 
@@ -243,6 +246,14 @@ class BacktestEngine(PlotBase):
             indicators: 指标
             rules: 交易规则
             runConfig: 运行参数
+            price_data: 已加载的历史数据，{str(investment): {interval: DataFrame}}，提供时不再下载
+            calculate_time: 开始计算时间，之前的数据只用于指标预热，默认与 start_time 相同
+            indicator_cache: 指标结果的磁盘缓存（DiskCache 或缓存目录），每个指标在各K线的窗口上预先计算（或从磁盘读取）一次，
+                多次回测之间复用未变化的指标结果，结果与不使用缓存时相同（见 IndicatorExecutor.precompute）
+            stop_loss: 止损比例，事件驱动回测时由经纪商在每根K线内按最高 / 最低价检查并平仓（见
+                BacktestBrokerage.check_stops），持仓、现金与运行参数在止损K线即更新，之后的开仓规则可以再次开仓
+            take_profit: 止盈比例
+            intrabar_path: 同一根K线同时触及止损与止盈时的路径假设，见 utils.INTRABAR_PATHS
         """
         super(BacktestEngine, self).__init__()
         self.init_cash = init_cash
@@ -252,42 +263,75 @@ class BacktestEngine(PlotBase):
             investment = Investment.parse_obj(investment)
         self.instrument_target = investment
         self.start_time = start_time
-        self.start_calculate_time = datetime.strptime(start_time, '%Y-%m-%d')
+        self.calculate_time = calculate_time
+        if calculate_time is None:
+            self.start_calculate_time = datetime.strptime(start_time, '%Y-%m-%d')
+        else:
+            self.start_calculate_time = pd.Timestamp(calculate_time)
         self.end_time = end_time
         self.interval = interval
         self.datasource = datasource
+        self.price_data = price_data
+        self.stop_loss = stop_loss
+        self.take_profit = take_profit
+        self.intrabar_path = intrabar_path
 
-        # 运行参数
-        self.run_config = RunningConfig(config=runConfig)
-
-        # 指标
-        self.indicators = []
-        if indicators is not None:
-            for ind in indicators:
-                self.indicators.append(IndicatorExecutor.from_obj(ind))
-
-        # 交易动作
-        self.signals = []
-        if signals is not None:
-            for signal in signals:
-                self.signals.append(SignalExecutor.from_obj(signal))
-
-        # 交易规则
-        self.rules = []
-        if rules is not None:
-            for rule in rules:
-                self.rules.append(TradeRule.from_rule(rule))
+        # 运行参数、指标、信号与规则
+        self._init_pipeline(indicators, signals, rules, runConfig, indicator_cache)
 
         # 初始化回测经纪商
-        self._backtest_brokerage = BacktestBrokerage(init_cash=init_cash)
+        self._backtest_brokerage = BacktestBrokerage(init_cash=init_cash, stop_loss=stop_loss,
+                                                     take_profit=take_profit, intrabar_path=intrabar_path,
+                                                     commission=commission, slippage=slippage)
         # 历史数据
         self.symbol_interval_candles = {}
-        self._candle_manager = CandleManager()
         # 交易日历
         self._data_feed: BacktestDataFeed = BacktestDataFeed()
         # 事件队列
         self._events_engine = BacktestEventEngine(self._data_feed)
 
+    @classmethod
+    def from_config(cls, config: BacktestConfigT, **kwargs):
+        """
+        由 BacktestConfig 创建回测引擎，kwargs 覆盖配置中的同名参数（如 datasource、start_time）
+        """
+        if isinstance(config, dict):
+            config = BacktestConfig.parse_obj(config)
+        env = config.environment
+        params = dict(indicators=config.indicators, signals=config.signals, rules=config.rules)
+        if env is not None:
+            params.update(
+                init_cash=env.initialCapital,
+                commission=env.commission,
+                slippage=env.slippage,
+                investment=env.investment,
+                start_time=env.startTime,
+                end_time=env.endTime,
+                interval=env.interval,
+                stop_loss=env.stopLoss,
+                take_profit=env.takeProfit,
+                intrabar_path=env.intrabarPath,
+            )
+        params.update(kwargs)
+        return cls(**params)
+
+    def _load_candles(self, investment: Investment, interval: Union[str, intervalT]) -> pd.DataFrame:
+        """
+        历史数据：优先从 price_data 中按回测区间截取，否则下载
+        """
+        if self.price_data is not None:
+            candles = self.price_data.get(str(investment), {}).get(interval)
+            if candles is not None:
+                end_time = self.end_time or None
+                return candles.loc[self.start_time:end_time].copy()
+        return _load_price(
+            instrument_target=investment,
+            interval=interval,
+            start_time=self.start_time,
+            end_time=self.end_time,
+            datasource=self.datasource
+        )
+
     def _init_historical_data(self):
         """
         加载数据
@@ -311,15 +355,16 @@ class BacktestEngine(PlotBase):
             intervals = item['intervals']
             self.symbol_interval_candles[symbol] = {}
             for interval in intervals:
-                data = _load_price(
-                    instrument_target=investment,
-                    interval=interval,
-                    start_time=self.start_time,
-                    end_time=self.end_time,
-                    datasource=self.datasource
-                )
+                data = self._load_candles(investment, interval)
                 self.symbol_interval_candles[symbol][interval] = data
                 # self.logger.info(f"{symbol} [{interval}] 初始化完成：{len(data)} 条数据")
+
+        if self.indicator_cache is not None:
+            # 使用指标缓存时，每个指标在各K线的窗口上只计算（或从磁盘读取）一次，逐K线取出
+            for ind in self.indicators:
+                data = self.symbol_interval_candles[ind.investment.__str__()][ind.interval]
+                if data is not None and not data.empty:
+                    ind.precompute(data, window=MAX_CANDLES)
         # self.logger.info(f"数据加载完成！")
         # self.logger.info("-" * 20)
 
@@ -329,14 +374,10 @@ class BacktestEngine(PlotBase):
         """
         # self.logger.info(f"初始化交易日历...")
         # self.logger.info("-" * 20)
-        data = _load_price(
-            instrument_target=self.instrument_target,
-            interval=self.interval,
-            start_time=self.start_time,
-            end_time=self.end_time,
-            datasource=self.datasource
-        )
+        data = self._load_candles(self.instrument_target, self.interval)
         self._data_feed.set_data_source(data)
+        # 按K线数量预分配盯市资金曲线
+        self._backtest_brokerage.reserve(len(data))
         # self.logger.info(f"交易日历初始化完成：{len(data)} 条数据")
         # self.logger.info("-" * 20)
 
@@ -415,6 +456,16 @@ class BacktestEngine(PlotBase):
             if self._current_time < self.start_calculate_time:
                 return
 
+            # 持仓在本K线内触及止损 / 止盈时先平仓
+            res = self._backtest_brokerage.check_stops(
+                self._current_time, tick_event.open, tick_event.high, tick_event.low, tick_event.close
+            )
+            if res is not None:
+                self.run_config.update_all(**res)
+
+            # 按收盘价盯市，本K线内的成交会在下单后更新该记录
+            self._backtest_brokerage.mark_to_market(self._current_time, tick_event.close)
+
             # 更新运行参数
             bar = {
                 'current_time': self._current_time,
@@ -425,39 +476,8 @@ class BacktestEngine(PlotBase):
                 'volume': tick_event.volume
             }
             self.run_config.update_all(**bar)
-            run_config = self.run_config.get_params()
-            # 计算指标
-            for ind in self.indicators:
-                # 如果设置开仓后不再计算指标，则跳过
-                if ind.openStop and self.run_config.position > 0:
-                    continue
-                candles = self._candle_manager.get_by_symbol_and_interval(
-                    symbol=ind.investment.__str__(),
-                    interval=ind.interval,
-                    return_type='df'
-                )
-                if candles is None or len(candles) < 2:
-                    continue
-                res = ind.run(candles)
-                if res is None:
-                    continue
-                for column, series in res.items():
-                    key = f"{ind.uniqueId}.{column}"
-                    run_config[key] = series
-
-            # 计算动作
-            for signal in self.signals:
-                res = signal.run(run_config).iloc[-1]
-                run_config[signal.uniqueId] = res
-
-            # 计算规则
-            events = []
-            for rule in self.rules:
-                event = rule.run(run_config)
-                if event is not None:
-                    events.append(event)
-            # 根据优先级从小到大排序
-            events = sorted(events, key=lambda x: x.priority)
+            # 计算指标、信号与规则
+            events = self._evaluate()
             for event in events:
                 self._events_engine.put(event)
         except Exception as e:
@@ -484,34 +504,44 @@ class BacktestEngine(PlotBase):
         self.instrument_target = investment
         # self.logger.info(f'Investment set to {self.instrument_target.symbol}!')
 
-    def start_backtest(self, signals):
-        main_candles = _load_price(
-            instrument_target=self.instrument_target,
-            interval=self.interval,
-            start_time=self.start_time,
-            end_time=self.end_time,
-            datasource=self.datasource
-        )
+    def signal_candles(self, signals: pd.DataFrame):
+        """
+        回测区间内的K线，附加经纪商信号列（long_entry / short_entry / long_exit / short_exit / size）
+        与成交价 price（止损 / 止盈为K线内的成交价，其余为收盘价），即 backtest_2d 的输入
+        """
+        main_candles = self._load_candles(self.instrument_target, self.interval)
         if main_candles is None:
             # self.logger.error('No historical data found!')
-            return
+            return None
 
         main_candles['long_entry'] = False
         main_candles['short_entry'] = False
         main_candles['long_exit'] = False
         main_candles['short_exit'] = False
         main_candles['size'] = 0
+        main_candles['price'] = main_candles['close']
+
+        if not signals.empty:
+            main_candles.loc[signals.index, 'long_entry'] = signals['long_entry']
+            main_candles.loc[signals.index, 'short_entry'] = signals['short_entry']
+            main_candles.loc[signals.index, 'long_exit'] = signals['long_exit']
+            main_candles.loc[signals.index, 'short_exit'] = signals['short_exit']
+            main_candles.loc[signals.index, 'size'] = signals['size']
+            if 'price' in signals:
+                main_candles.loc[signals.index, 'price'] = signals['price']
+
+        # 预热区间不参与回测统计
+        start_time = self.start_time if self.calculate_time is None else self.start_calculate_time
+        if self.end_time is None or self.end_time == '':
+            return main_candles.loc[start_time:]
+        return main_candles.loc[start_time:self.end_time]
 
-        main_candles.loc[signals.index, 'long_entry'] = signals['long_entry']
-        main_candles.loc[signals.index, 'short_entry'] = signals['short_entry']
-        main_candles.loc[signals.index, 'long_exit'] = signals['long_exit']
-        main_candles.loc[signals.index, 'short_exit'] = signals['short_exit']
-        main_candles.loc[signals.index, 'size'] = signals['size']
+    def start_backtest(self, signals):
+        main_candles = self.signal_candles(signals)
+        if main_candles is None:
+            return
 
-        if self.end_time is None or self.end_time == '':
-            main_candles = main_candles.loc[self.start_time:]
-        else:
-            main_candles = main_candles.loc[self.start_time:self.end_time]
+        from .utils import backtest_2d
 
         res = backtest_2d(
             main_candles,
@@ -522,11 +552,26 @@ class BacktestEngine(PlotBase):
         )
         self.parse_bt_result(res)
 
-    def run(self, backtest: bool = True):
+    def generate_signals(self) -> pd.DataFrame:
+        """
+        运行事件驱动回测，返回经纪商的交易信号，不做向量化回测
+        """
         self._set_up()
         self._events_engine.run()
-        signals = self._backtest_brokerage.get_signals()
         # self.logger.info(f"Strategy execution completed!")
+        return self._backtest_brokerage.get_signals()
+
+    def run(self, backtest: bool = True):
+        signals = self.generate_signals()
         if backtest:
             self.start_backtest(signals)
+        else:
+            # 不做向量化回测时，直接使用经纪商逐K线盯市的资金曲线
+            self.parse_bt_result(self._backtest_brokerage.performance())
         return signals
+
+    def get_equity_curve(self) -> pd.DataFrame:
+        """
+        事件驱动回测过程中的盯市资金曲线
+        """
+        return self._backtest_brokerage.get_equity_curve()
@@ -1,19 +1,23 @@
+from typing import Any, Dict
+
 import numpy as np
 import pandas as pd
 from ..enums import OrderStatus, RuleType, TradeAction, SizeType
 from ..events import SignalEvent
 from ..utils import get_logger
+from ..utils.intrabar import INTRABAR_PATHS, STOP_LOSS, STOP_NONE, resolve_stop_nb, stop_levels_nb
 
 logger = get_logger('BacktestBrokerage')
 
-__all__ = ["BacktestBrokerage"]
+__all__ = ["BacktestBrokerage", "EquityTracker"]
 
 
 class Order:
-    def __init__(self, create_time, action, size):
+    def __init__(self, create_time, action, size, price=np.nan):
         self.create_time = create_time
         self.action = action
         self.size = size
+        self.price = price
 
     def __str__(self):
         return f"{self.create_time}: -{self.action}@{self.size}"
@@ -22,16 +26,202 @@ class Order:
         return {
             "create_time": self.create_time,
             "action": self.action,
-            "size": self.size
+            "size": self.size,
+            "price": self.price
         }
 
 
+class EquityTracker:
+    """
+    逐K线盯市的资金曲线，数据保存在预分配的数组中（容量不足时按倍数扩容）
+    """
+    _FIELDS = ('price', 'cash', 'position', 'position_value', 'equity', 'drawdown')
+
+    def __init__(self, capacity: int = 1024):
+        self.n = 0
+        self.timestamp = np.empty(0, dtype='datetime64[ns]')
+        # 截至每条记录的权益峰值，用于计算回撤
+        self.peak = np.empty(0, dtype=np.float64)
+        for field in self._FIELDS:
+            setattr(self, field, np.empty(0, dtype=np.float64))
+        self.reserve(capacity)
+
+    def reserve(self, capacity: int):
+        """
+        预分配容量
+        """
+        if capacity <= len(self.timestamp):
+            return
+        for field in ('timestamp', 'peak') + self._FIELDS:
+            old = getattr(self, field)
+            arr = np.empty(capacity, dtype=old.dtype)
+            arr[:self.n] = old[:self.n]
+            setattr(self, field, arr)
+
+    def mark(self, timestamp, price: float, cash: float, position: float):
+        """
+        按价格盯市；与上一条时间相同时覆盖上一条（同一根K线内成交后重新盯市）
+        """
+        timestamp = pd.Timestamp(timestamp).to_datetime64()
+        if self.n > 0 and self.timestamp[self.n - 1] == timestamp:
+            i = self.n - 1
+        else:
+            if self.n == len(self.timestamp):
+                self.reserve(max(2 * self.n, 1024))
+            i = self.n
+            self.n += 1
+        position_value = position * price
+        equity = cash + position_value
+        peak = equity if i == 0 else max(self.peak[i - 1], equity)
+        self.timestamp[i] = timestamp
+        self.peak[i] = peak
+        self.price[i] = price
+        self.cash[i] = cash
+        self.position[i] = position
+        self.position_value[i] = position_value
+        self.equity[i] = equity
+        self.drawdown[i] = equity / peak - 1 if peak > 0 else 0.0
+
+    @property
+    def last_equity(self) -> float:
+        return self.equity[self.n - 1] if self.n > 0 else np.nan
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        资金曲线 DataFrame，索引为时间
+        """
+        data = {field: getattr(self, field)[:self.n].copy() for field in self._FIELDS}
+        return pd.DataFrame(data, index=pd.DatetimeIndex(self.timestamp[:self.n].copy(), name='date'))
+
+
 class BacktestBrokerage:
-    def __init__(self, init_cash: float, position: float = 0.0):
+    def __init__(self, init_cash: float, position: float = 0.0, capacity: int = 1024, stop_loss: float = None,
+                 take_profit: float = None, intrabar_path: str = 'pessimistic', commission: float = 0.0,
+                 slippage: float = 0.0):
+        """
+        Args:
+            init_cash: 初始资金
+            position: 初始持仓
+            capacity: 资金曲线预分配容量
+            stop_loss: 止损比例，开仓后每根K线按 OHLC 检查（见 check_stops），触发后全部平仓
+            take_profit: 止盈比例
+            intrabar_path: 同一根K线同时触及止损与止盈时的路径假设，见 utils.INTRABAR_PATHS
+            commission: 手续费率，按成交金额扣除现金，同 backtest_2d 的 fees
+            slippage: 滑点比例，买入按 price * (1 + slippage)、卖出按 price * (1 - slippage) 成交；
+                订单与运行参数中仍记录信号价格，由 backtest_2d 计入滑点
+        """
+        if intrabar_path not in INTRABAR_PATHS:
+            raise ValueError(f"intrabar_path must be one of {list(INTRABAR_PATHS)}")
+        self.init_cash = init_cash
         self.cash = init_cash
         self.position = position
         self.status = OrderStatus.EMPTY
         self.orders = []
+        # 盯市资金曲线
+        self.equity_tracker = EquityTracker(capacity)
+        self.stop_loss = stop_loss
+        self.take_profit = take_profit
+        self.intrabar_path = intrabar_path
+        self.commission = commission
+        self.slippage = slippage
+        # 当前持仓的止损价与止盈价
+        self._stop_price = np.nan
+        self._target_price = np.nan
+        # 最近一次止损 / 止盈的K线时间，该K线内不再开仓
+        self._stopped_at = None
+
+    def reserve(self, capacity: int):
+        """
+        按K线数量预分配资金曲线容量
+        """
+        self.equity_tracker.reserve(capacity)
+
+    def mark_to_market(self, timestamp, price: float):
+        """
+        按最新价格盯市，记录现金、持仓市值、权益和回撤
+        """
+        self.equity_tracker.mark(timestamp, price, self.cash, self.position)
+
+    def _remark(self):
+        # 成交后按最近一次盯市价格更新当前K线的权益
+        tracker = self.equity_tracker
+        if tracker.n > 0:
+            tracker.mark(tracker.timestamp[tracker.n - 1], tracker.price[tracker.n - 1], self.cash, self.position)
+
+    @property
+    def equity(self) -> float:
+        """
+        最近一次盯市的权益，尚未盯市时为现金
+        """
+        equity = self.equity_tracker.last_equity
+        return self.cash if np.isnan(equity) else equity
+
+    def get_equity_curve(self) -> pd.DataFrame:
+        """
+        资金曲线：price, cash, position, position_value, equity, drawdown
+        """
+        return self.equity_tracker.to_frame()
+
+    def performance(self) -> Dict[str, Any]:
+        """
+        由盯市资金曲线生成 cum_return / benchmark_return / max_drawdown，格式同 backtest_2d 的结果
+        """
+        tracker = self.equity_tracker
+        n = tracker.n
+        dates = pd.DatetimeIndex(tracker.timestamp[:n]).astype(str)
+        cum_return = tracker.equity[:n] / self.init_cash - 1
+        benchmark_return = tracker.price[:n] / tracker.price[0] if n > 0 else tracker.price[:0]
+        drawdown = np.abs(tracker.drawdown[:n]) * 100
+        return {
+            'cum_return': [list(item) for item in zip(dates, cum_return.tolist())],
+            'benchmark_return': [list(item) for item in zip(dates, benchmark_return.tolist())],
+            'max_drawdown': [list(item) for item in zip(dates, drawdown.tolist())],
+        }
+
+    def check_stops(self, timestamp, open_: float, high: float, low: float, close: float):
+        """
+        按一根K线的 OHLC 检查当前持仓是否触及止损 / 止盈，触及时全部平仓，成交价同 utils.intrabar_stops_nb；
+        应在该K线盯市（mark_to_market）和下单之前调用
+
+        Returns:
+            成交后需要写回运行参数的字段，未触发时为 None
+        """
+        if self.status == OrderStatus.EMPTY or self.position == 0:
+            return
+        if self.stop_loss is None and self.take_profit is None:
+            return
+        is_long = self.position > 0
+        hit, price = resolve_stop_nb(is_long, float(open_), float(high), float(low), float(close),
+                                     self._stop_price, self._target_price, INTRABAR_PATHS.index(self.intrabar_path))
+        if hit == STOP_NONE:
+            return
+        dt = pd.Timestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+        order = Order(dt, 'long_exit' if is_long else 'short_exit', abs(self.position), price)
+        self._trade(-self.position, price)
+        self.position = 0
+        self.status = OrderStatus.EMPTY
+        self._stopped_at = dt
+        self.orders.append(order)
+        logger.info(f"{'Stop Loss' if hit == STOP_LOSS else 'Take Profit'}: {order}")
+        return {
+            'sell_time': dt,
+            'sell_price': price,
+            'position': 0,
+            'cash': self.cash,
+        }
+
+    def _trade(self, size: float, price: float):
+        """
+        成交后更新现金：size 为正买入、为负卖出，成交价计入滑点并扣除手续费
+        """
+        fill = price * (1 + self.slippage) if size > 0 else price * (1 - self.slippage)
+        self.cash -= size * fill + abs(size) * fill * self.commission
+
+    def place_order(self, event: SignalEvent):
+        run_params = self._execute_order(event)
+        if run_params is not None:
+            self._remark()
+        return run_params
 
     def _open_size(self, price: float, size: float, size_type: int = 3) -> int:
         """
@@ -58,7 +248,8 @@ class BacktestBrokerage:
         size_type = SizeType(size_type)
         if self.cash <= 0:
             return 0
-        max_amount = int(self.cash / price)
+        # 可用资金需覆盖滑点与手续费
+        max_amount = int(self.cash / (price * (1 + self.slippage) * (1 + self.commission)))
         if size_type == SizeType.Value:
             amount = int(size / price)
         elif size_type == SizeType.Percent:
@@ -95,7 +286,7 @@ class BacktestBrokerage:
             amount = int(size)
         return min(max_amount, amount)
 
-    def place_order(self, event: SignalEvent):
+    def _execute_order(self, event: SignalEvent):
         if event.rule_type == RuleType.Open:
             # 建仓
             # 1. 买涨
@@ -107,25 +298,35 @@ class BacktestBrokerage:
             # 2.2 当前有持仓并且方向为买涨，平仓，卖出size，状态为SHORT_FILLED
             # 2.3 当前有持仓并且方向为买跌，不操作
             if self.status == OrderStatus.EMPTY:
+                if self._stopped_at is not None and event.timestamp == self._stopped_at:
+                    # 本K线已止损 / 止盈
+                    return
                 size = self._open_size(event.price, event.size, event.size_type)
                 if size <= 0:
                     return
                 if event.action == TradeAction.BUY:
                     self.status = OrderStatus.LONG_FILLED
                     self.position = size
-                    self.cash -= size * event.price
+                    self._trade(size, event.price)
                     action = 'long_entry'
                 elif event.action == TradeAction.SHORT:
                     self.status = OrderStatus.SHORT_FILLED
                     self.position = -size
-                    self.cash += size * event.price
+                    self._trade(-size, event.price)
                     action = 'short_entry'
                 else:
                     return
+                self._stop_price, self._target_price = stop_levels_nb(
+                    event.action == TradeAction.BUY,
+                    event.price,
+                    np.nan if self.stop_loss is None else self.stop_loss,
+                    np.nan if self.take_profit is None else self.take_profit
+                )
                 order = Order(
                     event.timestamp,
                     action,
-                    size
+                    size,
+                    event.price
                 )
                 self.orders.append(order)
                 logger.info(f"Open Position: {order}")
@@ -148,12 +349,13 @@ class BacktestBrokerage:
             if self.status.name.startswith("LONG"):
                 if event.action == TradeAction.SELL:
                     # 平仓
-                    self.cash += self.position * event.price
+                    self._trade(-self.position, event.price)
                     self.status = OrderStatus.EMPTY
                     order = Order(
                         event.timestamp,
                         'long_exit',
-                        self.position
+                        self.position,
+                        event.price
                     )
                     self.position = 0
                     self.orders.append(order)
@@ -168,12 +370,13 @@ class BacktestBrokerage:
             elif self.status.name.startswith("SHORT"):
                 if event.action == TradeAction.BUY:
                     # 平仓
-                    self.cash += self.position * event.price
+                    self._trade(-self.position, event.price)
                     self.status = OrderStatus.EMPTY
                     order = Order(
                         event.timestamp,
                         'short_exit',
-                        -self.position
+                        -self.position,
+                        event.price
                     )
                     self.position = 0
                     self.orders.append(order)
@@ -195,12 +398,13 @@ class BacktestBrokerage:
             if self.status == OrderStatus.EMPTY:
                 return
             # 止损
-            size = self._close_size(event.size)
+            size = self._close_size(event.price, event.size, event.size_type)
             if size == 0:
                 return
             if self.status.name.startswith("LONG"):
                 if event.action == TradeAction.SELL:
                     self.position -= size
+                    self._trade(-size, event.price)
                     if self.position == 0:
                         self.status = OrderStatus.EMPTY
                     else:
@@ -208,7 +412,8 @@ class BacktestBrokerage:
                     order = Order(
                         event.timestamp,
                         'long_exit',
-                        size
+                        size,
+                        event.price
                     )
                     self.orders.append(order)
                     logger.debug(f"Stop Loss: {order}")
@@ -222,6 +427,7 @@ class BacktestBrokerage:
             elif self.status.name.startswith("SHORT"):
                 if event.action == TradeAction.BUY:
                     self.position += size
+                    self._trade(size, event.price)
                     if self.position == 0:
                         self.status = OrderStatus.EMPTY
                     else:
@@ -229,7 +435,8 @@ class BacktestBrokerage:
                     order = Order(
                         event.timestamp,
                         'short_exit',
-                        size
+                        size,
+                        event.price
                     )
                     self.orders.append(order)
                     logger.info(f"Stop Loss: {order}")
@@ -250,12 +457,13 @@ class BacktestBrokerage:
             if self.status == OrderStatus.EMPTY:
                 return
             # 止盈
-            size = self._close_size(event.size)
+            size = self._close_size(event.price, event.size, event.size_type)
             if size == 0:
                 return
             if self.status.name.startswith("LONG"):
                 if event.action == TradeAction.SELL:
                     self.position -= size
+                    self._trade(-size, event.price)
                     if self.position == 0:
                         self.status = OrderStatus.EMPTY
                     else:
@@ -263,7 +471,8 @@ class BacktestBrokerage:
                     order = Order(
                         event.timestamp,
                         'long_exit',
-                        size
+                        size,
+                        event.price
                     )
                     self.orders.append(order)
                     logger.debug(f"Take Profit: {order}")
@@ -277,6 +486,7 @@ class BacktestBrokerage:
             elif self.status.name.startswith("SHORT"):
                 if event.action == TradeAction.BUY:
                     self.position += size
+                    self._trade(size, event.price)
                     if self.position == 0:
                         self.status = OrderStatus.EMPTY
                     else:
@@ -284,7 +494,8 @@ class BacktestBrokerage:
                     order = Order(
                         event.timestamp,
                         'short_exit',
-                        size
+                        size,
+                        event.price
                     )
                     self.orders.append(order)
                     logger.debug(f"Take Profit: {order}")
@@ -316,5 +527,6 @@ class BacktestBrokerage:
         signals['short_entry'][(orders['action'] == 'short_entry')] = True
         signals['short_exit'][(orders['action'] == 'short_exit')] = True
         signals['size'] = orders['size']
+        signals['price'] = orders['price']
         signals.index = pd.to_datetime(signals.index)
         return signals
@@ -0,0 +1,51 @@
+from abc import ABCMeta, abstractmethod
+from typing import Any, Dict, Optional
+
+from ..events import SignalEvent, TickEvent
+from .backtest_brokerage import BacktestBrokerage
+
+__all__ = ["BrokerAdapter", "PaperBroker"]
+
+
+class BrokerAdapter(metaclass=ABCMeta):
+    """
+    实盘引擎的下单接口，把规则产生的 SignalEvent 转发给券商
+    """
+
+    async def on_tick(self, tick: TickEvent) -> Optional[Dict[str, Any]]:
+        """
+        收到交易标的的行情，可用于盯市或检查止损 / 止盈
+
+        :return: 止损 / 止盈成交后需要写回运行参数的字段，同 submit
+        """
+
+    @abstractmethod
+    async def submit(self, event: SignalEvent) -> Optional[Dict[str, Any]]:
+        """
+        提交订单
+
+        :return: 成交后需要写回运行参数的字段（position、cash、buy_price 等，同 BacktestBrokerage.place_order），
+            未成交或成交回报异步到达时返回 None
+        """
+
+
+class PaperBroker(BrokerAdapter):
+    def __init__(self, init_cash: float = 10000.0, stop_loss: float = None, take_profit: float = None,
+                 intrabar_path: str = 'pessimistic', commission: float = 0.0, slippage: float = 0.0):
+        """
+        模拟盘：按信号价格立即成交，成交、手续费、滑点与止损 / 止盈逻辑与回测相同（BacktestBrokerage）
+        """
+        self.brokerage = BacktestBrokerage(init_cash=init_cash, stop_loss=stop_loss, take_profit=take_profit,
+                                           intrabar_path=intrabar_path, commission=commission, slippage=slippage)
+
+    async def on_tick(self, tick: TickEvent) -> Optional[Dict[str, Any]]:
+        res = self.brokerage.check_stops(tick.timestamp, tick.open, tick.high, tick.low, tick.close)
+        self.brokerage.mark_to_market(tick.timestamp, tick.close)
+        return res
+
+    async def submit(self, event: SignalEvent) -> Optional[Dict[str, Any]]:
+        return self.brokerage.place_order(event)
+
+    @property
+    def orders(self):
+        return self.brokerage.orders
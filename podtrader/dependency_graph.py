@@ -0,0 +1,118 @@
+from collections import OrderedDict
+from typing import Dict, List, Sequence, Set
+
+from .utils import get_expr_keys
+
+__all__ = ['DependencyGraph']
+
+
+class DependencyGraph:
+    def __init__(self, indicators: Sequence, signals: Sequence, rules: Sequence):
+        """
+        指标、信号与规则之间的依赖图
+
+        依赖关系来自表达式中引用的 uniqueId：信号的 left / right 与规则交易的 expression 中，
+        `指标ID.输出列` 引用指标的某个输出，`信号ID` 引用信号。从规则出发沿依赖关系可达的节点为有效节点，
+        其余节点（以及指标中未被引用的输出列）被剪除；没有规则时不剪除任何节点
+
+        Args:
+            indicators: IndicatorExecutor 列表
+            signals: SignalExecutor 列表
+            rules: TradeRule 列表
+        """
+        self._indicators = OrderedDict((ind.uniqueId, ind) for ind in indicators)
+        self._signals = OrderedDict((sig.uniqueId, sig) for sig in signals)
+        self._rules = list(rules)
+
+        # 节点 -> 依赖的信号 / 指标输出列
+        self.signal_deps: Dict[str, Set[str]] = {}
+        self.indicator_deps: Dict[str, Dict[str, Set[str]]] = {}
+        for sig in signals:
+            keys = list(sig.left_keys) + list(sig.right_keys)
+            self._add_deps(sig.uniqueId, keys)
+        for rule in self._rules:
+            keys = [k for tx in rule.transactions for k in get_expr_keys(tx.expression)]
+            self._add_deps(rule.uniqueId, keys)
+
+        live_signals, outputs = self._live()
+        # 信号可以引用其他信号，按拓扑顺序执行
+        self.signals = [self._signals[s] for s in self._topological(live_signals)]
+        self.indicators = [ind for uid, ind in self._indicators.items() if uid in outputs]
+        self.rules = self._rules
+        # 各指标实际被引用的输出列，保持指标定义中的顺序
+        self.outputs: Dict[str, List[str]] = {}
+        for ind in self.indicators:
+            used = [name for name in ind.output_names if name in outputs[ind.uniqueId]]
+            self.outputs[ind.uniqueId] = used or list(ind.output_names)
+        self.pruned: Dict[str, List[str]] = {
+            'indicators': [uid for uid in self._indicators if uid not in outputs],
+            'signals': [uid for uid in self._signals if uid not in live_signals],
+            'outputs': [f"{ind.uniqueId}.{name}" for ind in self.indicators for name in ind.output_names
+                        if name not in self.outputs[ind.uniqueId]],
+        }
+
+    def _add_deps(self, node: str, keys: List[str]):
+        signal_deps = self.signal_deps.setdefault(node, set())
+        indicator_deps = self.indicator_deps.setdefault(node, {})
+        for key in keys:
+            if key in self._signals and key != node:
+                signal_deps.add(key)
+            elif '.' in key:
+                uid, column = key.split('.', 1)
+                if uid in self._indicators:
+                    indicator_deps.setdefault(uid, set()).add(column)
+
+    def _live(self):
+        """
+        从规则出发可达的信号，以及被引用的指标输出列 {指标ID: {列名}}
+        """
+        if not self._rules:
+            return set(self._signals), {uid: set(ind.output_names) for uid, ind in self._indicators.items()}
+        live_signals = set()
+        outputs: Dict[str, Set[str]] = {}
+        stack = [rule.uniqueId for rule in self._rules]
+        seen = set()
+        while stack:
+            node = stack.pop()
+            if node in seen:
+                continue
+            seen.add(node)
+            if node in self._signals:
+                live_signals.add(node)
+            for uid, columns in self.indicator_deps.get(node, {}).items():
+                outputs.setdefault(uid, set()).update(columns)
+            stack.extend(self.signal_deps.get(node, ()))
+        return live_signals, outputs
+
+    def _topological(self, nodes: Set[str]) -> List[str]:
+        """
+        Kahn 算法，没有依赖关系的信号保持配置中的顺序
+        """
+        order = [s for s in self._signals if s in nodes]
+        indegree = {s: len(self.signal_deps[s] & nodes) for s in order}
+        result = []
+        while len(result) < len(order):
+            ready = [s for s in order if indegree[s] == 0 and s not in result]
+            if not ready:
+                cycle = [s for s in order if s not in result]
+                raise ValueError(f"circular signal references: {cycle}")
+            node = ready[0]
+            result.append(node)
+            for s in order:
+                if node in self.signal_deps[s]:
+                    indegree[s] -= 1
+        return result
+
+    def report(self) -> str:
+        """
+        剪除节点的说明
+        """
+        lines = []
+        for kind in ('indicators', 'signals', 'outputs'):
+            if self.pruned[kind]:
+                lines.append(f"pruned {kind}: {', '.join(self.pruned[kind])}")
+        return '\n'.join(lines) or 'nothing pruned'
+
+    def __repr__(self):
+        return (f"DependencyGraph(indicators={len(self.indicators)}/{len(self._indicators)}, "
+                f"signals={len(self.signals)}/{len(self._signals)}, rules={len(self.rules)})")
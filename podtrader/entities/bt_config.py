@@ -26,6 +26,9 @@ class BacktestEnvironment(BaseModel):
     investment: Optional[InvestmentT] = Field(default=None, description="回测的投资对象")
     startTime: str = Field(default='2015-01-01', description="回测起始时间")
     endTime: Optional[str] = Field(default=None, description="回测结束时间")
+    stopLoss: Optional[float] = Field(default=None, gt=0, description="止损比例，例如 0.05 表示亏损 5% 止损")
+    takeProfit: Optional[float] = Field(default=None, gt=0, description="止盈比例")
+    intrabarPath: str = Field(default='pessimistic', description="同一根K线同时触及止损与止盈时的路径假设")
 
 
 class BacktestConfig(BaseModel):
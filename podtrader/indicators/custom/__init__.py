@@ -1,5 +1,19 @@
-from .candle import *
-from .momentum import *
-from .poly import *
-from .pattern import *
-from .lrc import *
+from ..._lazy import lazy_module
+
+# 指标名 -> 所在模块，首次访问时才导入并构建对应的 IndicatorFactory
+_INDICATORS = {
+    'HIST_PRICE_HIGH': '.candle.hist_price_high',
+    'HIST_PRICE_LOW': '.candle.hist_price_low',
+    'HIST_PRICE_CDL_HIGH': '.candle.hist_price_cdl_high',
+    'HIST_PRICE_CDL_LOW': '.candle.hist_price_cdl_low',
+    'ZIGZAG': '.momentum.zigzag',
+    'QQE': '.momentum.qqe',
+    'POLY_REG': '.poly.poly_reg',
+    'ZSCORE': '.poly.zscore',
+    'UUT': '.pattern.uut',
+    'LRC': '.lrc.linear_regression_channel',
+}
+
+__all__ = list(_INDICATORS)
+
+__getattr__, __dir__ = lazy_module(__name__, _INDICATORS)
@@ -1,4 +1,10 @@
-from .hist_price_high import *
-from .hist_price_low import *
-from .hist_price_cdl_high import *
-from .hist_price_cdl_low import *
+from ...._lazy import lazy_module
+
+__all__ = ['HIST_PRICE_HIGH', 'HIST_PRICE_LOW', 'HIST_PRICE_CDL_HIGH', 'HIST_PRICE_CDL_LOW']
+
+__getattr__, __dir__ = lazy_module(__name__, {
+    'HIST_PRICE_HIGH': '.hist_price_high',
+    'HIST_PRICE_LOW': '.hist_price_low',
+    'HIST_PRICE_CDL_HIGH': '.hist_price_cdl_high',
+    'HIST_PRICE_CDL_LOW': '.hist_price_cdl_low',
+})
@@ -1,2 +1,7 @@
-from .linear_regression_channel import *
+from ...._lazy import lazy_module
 
+__all__ = ['LRC']
+
+__getattr__, __dir__ = lazy_module(__name__, {
+    'LRC': '.linear_regression_channel',
+})
@@ -1,2 +1,8 @@
-from .zigzag import ZIGZAG
-from .qqe import QQE
+from ...._lazy import lazy_module
+
+__all__ = ['ZIGZAG', 'QQE']
+
+__getattr__, __dir__ = lazy_module(__name__, {
+    'ZIGZAG': '.zigzag',
+    'QQE': '.qqe',
+})
@@ -1,5 +1,5 @@
 from vectorbt import IndicatorFactory
-from ...pyc import qqe_signal
+from ...nb import qqe_signal_nb
 
 __all__ = ['QQE']
 
@@ -8,9 +8,8 @@ QQE = IndicatorFactory(
     param_names=["rsi_period", "smooth", "factor"],
     output_names=["long", "short"],
 ).from_apply_func(
-    qqe_signal,
+    qqe_signal_nb,
     rsi_period=14,
     smooth=5,
-    factor=4.238,
-    keep_pd=True
+    factor=4.238
 )
@@ -1 +1,7 @@
-from .uut import UUT
+from ...._lazy import lazy_module
+
+__all__ = ['UUT']
+
+__getattr__, __dir__ = lazy_module(__name__, {
+    'UUT': '.uut',
+})
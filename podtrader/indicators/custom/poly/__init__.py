@@ -1,2 +1,8 @@
-from .poly_reg import *
-from .zscore import *
+from ...._lazy import lazy_module
+
+__all__ = ['POLY_REG', 'ZSCORE']
+
+__getattr__, __dir__ = lazy_module(__name__, {
+    'POLY_REG': '.poly_reg',
+    'ZSCORE': '.zscore',
+})
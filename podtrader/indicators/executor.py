@@ -1,20 +1,25 @@
 import time
-from typing import Dict
+from typing import Dict, Optional
 
+import numpy as np
 import pandas as pd
-import vectorbt as vbt
 
-from .custom import *
+from . import custom
 from ..entities import InvestmentT, Investment, Indicator, IndicatorT
 from ..enums import IndicatorSourceType
+from ..utils import DiskCache, fingerprint
 
 __all__ = ['IndicatorExecutor']
 
+# 缓存格式版本，格式变化时递增，旧条目自然失效
+_CACHE_VERSION = 2
+_OHLCV = ['open', 'high', 'low', 'close', 'volume']
+
 
 class IndicatorExecutor:
     def __init__(self, pkg: str, func: str, investment: InvestmentT = None, uniqueId: str = None, name: str = None,
                  description: str = None, interval: str = '1d', openStop: bool = False, temporary: bool = False,
-                 params: Dict = None):
+                 params: Dict = None, cache: DiskCache = None):
         """
         指标执行器
 
@@ -29,6 +34,7 @@ class IndicatorExecutor:
             openStop: 是否在开仓后继续执行
             temporary: 是否临时指标
             params: 参数
+            cache: 指标结果的磁盘缓存，见 precompute
         """
         if uniqueId is None:
             uniqueId = str(hash(f"{func}{int(time.time() * 1000)}"))
@@ -39,15 +45,20 @@ class IndicatorExecutor:
             params = {}
         self.indicator_params = params
         self.apply_func = None
+        self.cache = cache
         pkg = IndicatorSourceType(pkg)
-        if pkg == IndicatorSourceType.Ta:
-            self.F = vbt.ta(func)
-        elif pkg == IndicatorSourceType.Talib:
-            self.F = vbt.talib(func)
-        elif pkg == IndicatorSourceType.PandasTa:
-            self.F = vbt.pandas_ta(func)
+        self.pkg = pkg
+        self.func = func
+        if pkg == IndicatorSourceType.VectorHouse:
+            self.F = getattr(custom, func)
         else:
-            self.F = globals()[func]
+            import vectorbt as vbt
+            if pkg == IndicatorSourceType.Ta:
+                self.F = vbt.ta(func)
+            elif pkg == IndicatorSourceType.Talib:
+                self.F = vbt.talib(func)
+            else:
+                self.F = vbt.pandas_ta(func)
         self.interval = interval
         if investment is not None and isinstance(investment, dict):
             investment = Investment.parse_obj(investment)
@@ -57,9 +68,15 @@ class IndicatorExecutor:
         self.input_names = self.F.input_names
         self.param_names = self.F.param_names
         self.output_names = self.F.output_names
+        # 实际需要的输出列，默认全部；由 DependencyGraph 缩减为被引用的列
+        self.outputs = list(self.output_names)
+        # precompute 得到的各窗口的结果、窗口长度及对应的K线
+        self._history: Optional[pd.DataFrame] = None
+        self._window: Optional[int] = None
+        self._windows: Optional[Dict[str, np.ndarray]] = None
 
     @classmethod
-    def from_obj(cls, indicator: IndicatorT):
+    def from_obj(cls, indicator: IndicatorT, cache: DiskCache = None):
         """
         从指标实体创建指标执行器
         """
@@ -75,7 +92,8 @@ class IndicatorExecutor:
             interval=indicator.interval,
             openStop=indicator.openStop,
             temporary=indicator.temporary,
-            params=indicator.get_params()
+            params=indicator.get_params(),
+            cache=cache
         )
 
     def _parse_params(self, open=None, high=None, low=None, close=None, volume=None):
@@ -107,12 +125,27 @@ class IndicatorExecutor:
                 params[name] = self.indicator_params[name]
         return params
 
-    def run(self, candles: pd.DataFrame):
-        """
-        执行指标
+    def _cache_key(self, candles: pd.DataFrame, window: int) -> str:
+        keys = [
+            _CACHE_VERSION,
+            self.pkg.value,
+            self.func,
+            sorted(self.indicator_params.items()),
+            self.interval,
+            str(self.investment),
+            self.outputs,
+            window,
+            candles[_OHLCV]
+        ]
+        benchmark = self.indicator_params.get('benchmark')
+        if benchmark:
+            # ZSCORE / POLY_REG 在计算时另外下载 benchmark，其数据也是输入的一部分
+            from .pyc import benchmark_close
+            keys.append(benchmark_close(benchmark, self.indicator_params.get('interval', '1d'),
+                                        end=candles.index[-1]))
+        return fingerprint(*keys)
 
-        :return:
-        """
+    def _compute(self, candles: pd.DataFrame) -> pd.DataFrame:
         params = self._parse_params(
             open=candles['open'],
             high=candles['high'],
@@ -122,10 +155,102 @@ class IndicatorExecutor:
         )
         config = self.F.run(**params)
         results = []
-        for name in self.output_names:
+        for name in self.outputs:
             results.append(getattr(config, name))
         results = pd.concat(results, axis=1)
-        results.columns = self.output_names
+        results.columns = self.outputs
+        return results
+
+    def _compute_windows(self, history: pd.DataFrame, window: int) -> Optional[Dict[str, np.ndarray]]:
+        """
+        逐K线在以该K线结束、最多 window 根K线的窗口上计算指标，第 t 行保存窗口 [max(0, t + 1 - window), t] 的结果
+        （左对齐，其余位置不使用）。结果与窗口不对齐或不是数值类型时返回 None
+        """
+        n = len(history)
+        columns = None
+        for t in range(1, n):
+            start = max(0, t + 1 - window)
+            candles = history.iloc[start:t + 1]
+            results = self._compute(candles)
+            if not results.index.equals(candles.index):
+                return None
+            if columns is None:
+                columns = {}
+                for i, column in enumerate(results.columns):
+                    if results[column].dtype.kind not in 'biuf':
+                        return None
+                    columns[f'c{i}'] = np.zeros((n, min(window, n)), dtype=results[column].dtype)
+            for i, column in enumerate(results.columns):
+                values = results[column].to_numpy()
+                if values.dtype != columns[f'c{i}'].dtype:
+                    return None
+                columns[f'c{i}'][t, :len(values)] = values
+        if columns is None:
+            return None
+        columns['columns'] = np.asarray(self.outputs, dtype=str)
+        return columns
+
+    def precompute(self, history: pd.DataFrame, window: int = None):
+        """
+        预先计算历史数据中每根K线对应窗口上的指标，窗口与回测时 run 收到的K线相同：以该K线结束、最多 window 根K线，
+        之后 run 收到的K线正是其中一个窗口时直接取出结果，与逐K线计算完全一致。
+        设置了 cache 时结果按 (pkg, func, params, interval, investment, outputs, window, 历史K线及 benchmark 数据的指纹)
+        保存到磁盘，相同数据与参数的下一次回测直接读取
+
+        :param history: 回测加载的全部K线
+        :param window: 窗口长度，默认为 CandleQueue 保留的K线数量（MAX_CANDLES）
+        """
+        if window is None:
+            from ..providers.data_board import MAX_CANDLES
+            window = MAX_CANDLES
+        arrays = None
+        key = None
+        if self.cache is not None:
+            key = self._cache_key(history, window)
+            arrays = self.cache.get(key)
+        if arrays is None:
+            arrays = self._compute_windows(history, window)
+            if arrays is None:
+                return
+            if key is not None:
+                self.cache.put(key, arrays)
+        if arrays['columns'].tolist() != list(self.outputs):
+            return
+        self._history = history
+        self._window = window
+        self._windows = arrays
+
+    def _precomputed(self, candles: pd.DataFrame) -> Optional[pd.DataFrame]:
+        """
+        candles 是 precompute 的某个窗口时返回对应的结果，否则返回 None
+        """
+        if self._windows is None or len(candles) < 2:
+            return None
+        index = self._history.index
+        first, last = candles.index[0], candles.index[-1]
+        if first not in index or last not in index:
+            return None
+        start, stop = index.get_loc(first), index.get_loc(last) + 1
+        if stop - start != len(candles) or start != max(0, stop - self._window):
+            return None
+        if self.temporary:
+            # 临时指标包含正在形成的K线，与历史数据中已收盘的K线不同时需要重新计算
+            bar = candles[_OHLCV].iloc[-1].to_numpy(dtype=np.float64)
+            if not np.array_equal(bar, self._history[_OHLCV].iloc[stop - 1].to_numpy(dtype=np.float64)):
+                return None
+        n = stop - start
+        return pd.DataFrame({column: self._windows[f'c{i}'][stop - 1, :n].copy()
+                             for i, column in enumerate(self.outputs)}, index=candles.index)
+
+    def run(self, candles: pd.DataFrame):
+        """
+        执行指标，candles 是 precompute 的某个窗口时直接取出结果
+
+        :return:
+        """
+        results = self._precomputed(candles)
+        if results is None:
+            results = self._compute(candles)
         if self.temporary:
             return results
         return results.iloc[:-1, :]
@@ -358,6 +358,306 @@ def uut(open: np.array, high: np.array, low: np.array, close: np.array) -> np.ar
     return res[:, 0], res[:, 1], R
 
 
+@njit(cache=True)
+def ema_step_nb(state: np.ndarray, value: float, period: int) -> float:
+    """
+    EMA 单步更新，结果与 talib.EMA 一致：跳过前导 NaN，以前 period 个值的均值作为首值
+    :param state: 状态数组 [count, ema]，初始为 0
+    :param value: 当前值
+    :param period: 周期
+    :return: 当前 EMA 值，数据不足时为 NaN
+    """
+    if state[0] == 0 and np.isnan(value):
+        return np.nan
+    if state[0] < period:
+        state[0] += 1
+        state[1] += value
+        if state[0] < period:
+            return np.nan
+        state[1] = state[1] / period
+        return state[1]
+    state[1] = (value - state[1]) * (2.0 / (period + 1)) + state[1]
+    return state[1]
+
+
+@njit(cache=True)
+def rsi_step_nb(state: np.ndarray, value: float, period: int) -> float:
+    """
+    RSI 单步更新（Wilder 平滑），结果与 talib.RSI 一致
+    :param state: 状态数组 [count, prev_value, avg_gain, avg_loss]，初始为 0
+    :param value: 当前价格
+    :param period: RSI周期
+    :return: 当前 RSI 值，数据不足时为 NaN
+    """
+    if state[0] == 0:
+        if np.isnan(value):
+            return np.nan
+        state[0] = 1
+        state[1] = value
+        return np.nan
+    diff = value - state[1]
+    state[1] = value
+    if state[0] > period:
+        state[2] *= period - 1
+        state[3] *= period - 1
+    if diff < 0:
+        state[3] -= diff
+    else:
+        state[2] += diff
+    state[0] += 1
+    if state[0] < period + 1:
+        return np.nan
+    state[2] /= period
+    state[3] /= period
+    total = state[2] + state[3]
+    if -0.00000001 < total < 0.00000001:
+        return 0.0
+    return 100.0 * (state[2] / total)
+
+
+@njit(cache=True)
+def qqe_state_nb() -> np.ndarray:
+    """
+    创建 QQE 的初始状态数组，配合 qqe_step_nb 逐根K线推进
+
+    状态布局：
+        0: 已处理K线数量
+        1-4: RSI 状态
+        5-6: RSI 平滑 EMA 状态
+        7-8: ATR RSI 第一层 EMA 状态
+        9-10: ATR RSI 第二层 EMA 状态
+        11: 上一根K线的 RSI 平滑值
+        12-13: 前一、前二根K线的 longband
+        14-15: 前一、前二根K线的 shortband
+        16: 上一根K线的 trend
+        17-18: 上一根K线的 qq_exlong / qq_exshort 计数
+    """
+    state = np.zeros(19, dtype=np.float64)
+    state[11] = np.nan
+    return state
+
+
+@njit(cache=True)
+def qqe_step_nb(state: np.ndarray, close: float, rsi_period: int = 14, smooth: int = 5,
+                factor: float = 4.238):
+    """
+    QQE 单步计算，每次推进一根K线
+
+    :param state: qqe_state_nb 创建的状态数组，原地更新
+    :param close: 当前收盘价
+    :param rsi_period: RSI周期
+    :param smooth: 平滑系数
+    :param factor: 系数
+    :return: (long, short)，出现多/空交叉时为 1，否则为 0
+    """
+    i = state[0]
+    wilders_period = rsi_period * 2 - 1
+
+    rsi = rsi_step_nb(state[1:5], close, rsi_period)
+    rs_index = ema_step_nb(state[5:7], rsi, smooth)
+    atr_rsi = abs(state[11] - rs_index)
+    ma_atr_rsi = ema_step_nb(state[7:9], atr_rsi, wilders_period)
+    dar = ema_step_nb(state[9:11], ma_atr_rsi, wilders_period) * factor
+    newshortband = rs_index + dar
+    newlongband = rs_index - dar
+
+    prev_rs_index = state[11]
+    longband1, longband2 = state[12], state[13]
+    shortband1, shortband2 = state[14], state[15]
+    prev_trend = state[16]
+
+    longband = 0.0
+    shortband = 0.0
+    trend = 0.0
+    if i >= 2:
+        if prev_rs_index > longband1 and rs_index > longband1:
+            longband = newlongband if newlongband > longband1 else longband1
+        else:
+            longband = newlongband
+        if prev_rs_index < shortband1 and rs_index < shortband1:
+            shortband = newshortband if newshortband < shortband1 else shortband1
+        else:
+            shortband = newshortband
+        if (rs_index > shortband1 and prev_rs_index < shortband2) \
+                or (rs_index < shortband1 and prev_rs_index > shortband2):
+            trend = 1.0
+        elif (rs_index < longband1 and prev_rs_index > longband2) \
+                or (rs_index > longband1 and prev_rs_index < longband2):
+            trend = -1.0
+        elif prev_trend != 0:
+            trend = prev_trend
+        else:
+            trend = 1.0
+
+    fast_atr_rsi_tl = longband if trend == 1 else shortband
+    qq_exlong = 0.0
+    qq_exshort = 0.0
+    if i >= 1:
+        if fast_atr_rsi_tl < rs_index:
+            qq_exlong = state[17] + 1
+        if fast_atr_rsi_tl > rs_index:
+            qq_exshort = state[18] + 1
+
+    state[0] = i + 1
+    state[11] = rs_index
+    state[12], state[13] = longband, longband1
+    state[14], state[15] = shortband, shortband1
+    state[16] = trend
+    state[17] = qq_exlong
+    state[18] = qq_exshort
+    return int(qq_exlong == 1), int(qq_exshort == 1)
+
+
+@njit(cache=True)
+def qqe_signal_nb(close: np.ndarray, rsi_period: int = 14, smooth: int = 5, factor: float = 4.238):
+    """
+    QQE Signal，RSI、Wilder EMA 以及通道递推在一次遍历中完成，结果与 pyc.qqe_signal 一致
+
+    :param close: 价格数据
+    :param rsi_period: RSI周期
+    :param smooth: 平滑系数
+    :param factor: 系数
+    :return: long, short
+    """
+    # 与 pyc.qqe_signal 一致，只使用第一列
+    close = close.reshape(close.shape[0], -1)[:, 0]
+    n = close.shape[0]
+    long = np.zeros(n, dtype=np.int64)
+    short = np.zeros(n, dtype=np.int64)
+    state = qqe_state_nb()
+    for i in range(n):
+        long[i], short[i] = qqe_step_nb(state, close[i], rsi_period, smooth, factor)
+    return long, short
+
+
+@njit(cache=True)
+def _shift_moments_nb(moments: np.ndarray, delta: float) -> None:
+    """
+    平移坐标原点：已知 moments[k] = sum(q^k * w)，原地更新为 sum((q - delta)^k * w)
+    :param moments: 各阶矩
+    :param delta: 原点平移量
+    """
+    res = np.zeros_like(moments)
+    for k in range(moments.shape[0]):
+        coef = 1.0
+        for j in range(k, -1, -1):
+            res[k] += coef * moments[j]
+            coef = coef * j / (k - j + 1) * -delta
+    moments[:] = res
+
+
+@njit(cache=True)
+def _update_moments_nb(mx: np.ndarray, my: np.ndarray, y: np.ndarray, start: int, end: int,
+                       anchor: float, sign: float) -> None:
+    """
+    将 [start, end) 区间的点加入（sign=1）或移出（sign=-1）正规方程的累计和
+    :param mx: sum(q^k)，k <= 2 * degree
+    :param my: sum(q^k * y)，k <= degree
+    :param y: 数据
+    :param start: 起始位置
+    :param end: 结束位置（不包含）
+    :param anchor: 坐标原点，q = 位置 - anchor
+    :param sign: 1 加入，-1 移出
+    """
+    for p in range(start, end):
+        q = p - anchor
+        w = sign
+        for k in range(mx.shape[0]):
+            mx[k] += w
+            if k < my.shape[0]:
+                my[k] += w * y[p]
+            w *= q
+
+
+@njit(cache=True)
+def poly_reg_nb(log_diff: np.ndarray, window_start: np.ndarray, first_idx: int, degrees: np.ndarray,
+                test_dataset: int = 5, min_periods: int = 100):
+    """
+    滚动多项式回归，结果与 sklearn 的 PolynomialFeatures + LinearRegression 一致
+
+    每 test_dataset 根K线使用 [window_start, 当前位置) 的数据重新拟合一次，拟合通过维护
+    正规方程的各阶累计和完成：窗口滑动时只加入新数据、移出旧数据，并平移坐标原点，
+    不会对整个窗口重复计算。多个 degree 共享同一组累计和。
+
+    :param log_diff: 1D 数据
+    :param window_start: 每根K线对应的训练窗口起始位置
+    :param first_idx: 开始输出的位置
+    :param degrees: 多项式阶数，可同时计算多个
+    :param test_dataset: 每个模型使用的K线数量
+    :param min_periods: 窗口最少数据量，不足时跳过
+    :return: y, y_pred（每个 degree 一列）
+    """
+    n = log_diff.shape[0]
+    n_degrees = degrees.shape[0]
+    max_degree = np.max(degrees)
+    y = np.full(n, np.nan)
+    y_pred = np.full((n, n_degrees), np.nan)
+
+    mx = np.zeros(2 * max_degree + 1)
+    my = np.zeros(max_degree + 1)
+    mx_scaled = np.empty_like(mx)
+    my_scaled = np.empty_like(my)
+    coefs = np.zeros((n_degrees, max_degree + 1))
+    lo = 0
+    hi = 0
+    anchor = 0.0
+    scale = 1.0
+    moved = 0
+    fitted = False
+    expired = 0
+    for i in range(first_idx, n):
+        if expired == 0:
+            start = window_start[i]
+            if i - start + 1 < min_periods:
+                continue
+            center = start + (i - start - 1) / 2
+            if not fitted or start < lo or start > hi or moved > i - start:
+                # 首次拟合、窗口不连续或累计平移过多时重新计算，避免误差累积
+                mx[:] = 0.0
+                my[:] = 0.0
+                _update_moments_nb(mx, my, log_diff, start, i, center, 1.0)
+                moved = 0
+            else:
+                _update_moments_nb(mx, my, log_diff, lo, start, anchor, -1.0)
+                _update_moments_nb(mx, my, log_diff, hi, i, anchor, 1.0)
+                _shift_moments_nb(mx, center - anchor)
+                _shift_moments_nb(my, center - anchor)
+                moved += i - hi
+            lo = start
+            hi = i
+            anchor = center
+            scale = max((i - start - 1) / 2, 1.0)
+
+            # 缩放到 [-1, 1] 后求解，保证高阶时的数值稳定
+            factor = 1.0
+            for k in range(mx.shape[0]):
+                mx_scaled[k] = mx[k] / factor
+                if k < my.shape[0]:
+                    my_scaled[k] = my[k] / factor
+                factor *= scale
+            for d in range(n_degrees):
+                degree = degrees[d]
+                a = np.empty((degree + 1, degree + 1))
+                b = np.empty(degree + 1)
+                for r in range(degree + 1):
+                    for c in range(degree + 1):
+                        a[r, c] = mx_scaled[r + c]
+                    b[r] = my_scaled[r]
+                coefs[d, :degree + 1] = np.linalg.solve(a, b)
+            fitted = True
+            expired = test_dataset
+
+        y[i] = log_diff[i]
+        u = (i - anchor) / scale
+        for d in range(n_degrees):
+            value = 0.0
+            for k in range(degrees[d], -1, -1):
+                value = value * u + coefs[d, k]
+            y_pred[i, d] = value
+        expired -= 1
+    return y, y_pred
+
+
 @njit(cache=True)
 def _get_val(start, end, delay, k, b, window_close, upper_deviation, lower_deviation, close, previous_high_delay_bar):
     x_val = np.arange(start, end + delay, 1)
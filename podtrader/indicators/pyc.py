@@ -1,105 +1,143 @@
-from datetime import datetime
+import time
 
 import numpy as np
 import pandas as pd
 import talib
-from dateutil.relativedelta import relativedelta
-from sklearn.preprocessing import PolynomialFeatures
-from sklearn.linear_model import LinearRegression
 
 from ..providers import download_historical_data
+from ..utils import LRUCache, fingerprint
+from .nb import qqe_signal_nb, poly_reg_nb
 
+# 滚动回归结果和 benchmark 数据的缓存，POLY_REG 与 ZSCORE 以及不同 cum_days / std_days 的 ZSCORE 共享
+_cache = LRUCache(maxsize=256, maxbytes=512 * 1024 ** 2)
+# benchmark 数据不覆盖所需时间时，两次下载之间的最短间隔（秒）
+_BENCHMARK_REFRESH = 60.0
 
-def create_model(src, degree=2):
-    x = np.arange(len(src)).reshape(-1, 1)
-    y = src.values
-    poly = PolynomialFeatures(degree)
-    x_poly = poly.fit_transform(x)
-    model = LinearRegression()
-    model.fit(x_poly, y)
-    return model, poly
 
-
-def poly_reg(close, benchmark='SPY', interval: str = '1d', degree=1, train_dataset=4, test_dataset=5,
-             train_start_time: str = '2015-01-01'):
+def clear_cache():
     """
-    Log.diff 和 多项式预测
-    :param close:
-    :param benchmark:
-    :param degree:
-    :param train_dataset:
-    :param test_dataset:
-    :param train_start_time:
-    :param interval: 1d, 1h, 15min, 5min, 1min
-    :return:
+    清空 poly_reg / zscore 的缓存
     """
-    import warnings
+    _cache.clear()
 
-    data_format = '%Y-%m-%d %H:%M:%S'
-    if isinstance(close, pd.DataFrame):
-        close = close.iloc[:, 0]
-    if benchmark is None or benchmark == '':
-        log_diff = np.log(close) - np.log(close.shift(1))
-    else:
-        # 获取benchmark的价格数据
-        benchmark_close = download_historical_data(
+
+def benchmark_close(benchmark: str, interval: str = '1d', end=None) -> pd.Series:
+    """
+    获取benchmark的价格数据，截至 end
+
+    已下载的数据覆盖 end 时直接使用；否则（如实盘或长时间运行的进程中出现了新的K线）重新下载，
+    同一 benchmark 两次下载之间至少间隔 _BENCHMARK_REFRESH 秒
+    """
+    key = ('benchmark', benchmark, interval)
+    entry = _cache.get(key)
+    if entry is None or (end is not None and entry[0].index[-1] < pd.Timestamp(end)
+                         and time.monotonic() - entry[1] >= _BENCHMARK_REFRESH):
+        series = download_historical_data(
             symbol=benchmark,
             interval=interval,
             start='2010-01-01',
             datasource='YF'
-        )
-        benchmark_close = benchmark_close['close']
+        )['close']
+        entry = (series, time.monotonic())
+        _cache.put(key, entry)
+    if end is None:
+        return entry[0]
+    return entry[0].loc[:end]
+
+
+def _log_diff(close, benchmark_close: pd.Series = None):
+    """
+    计算 Log.diff，benchmark_close 为空时为收盘价的对数收益，否则为与 benchmark 的对数价差
+    """
+    if benchmark_close is None:
+        log_diff = np.log(close) - np.log(close.shift(1))
+    else:
         combine_close = pd.DataFrame({
             'close': close,
             'benchmark': benchmark_close
         })
         combine_close = combine_close.dropna()
         log_diff = np.log(combine_close['close']) - np.log(combine_close['benchmark'])
-    log_diff = log_diff.dropna()
-    warnings.filterwarnings("ignore")
-    train_data = log_diff[train_start_time:]
-    index = train_data.index.tolist()
-
-    model = None
-    poly = None
-    expired_date = 0
-    results = []
-    train_start_idx = None
-    for idx, dt in enumerate(index):
-        dt = datetime(
-            year=dt.year,
-            month=dt.month,
-            day=dt.day,
-            hour=dt.hour,
-            minute=dt.minute,
-            second=dt.second
-        )
-        test_end_idx = dt.strftime(data_format)
-        if expired_date == 0:
-            train_start_idx = dt - relativedelta(years=train_dataset)
-            test_start_idx = train_start_idx.strftime(data_format)
-            y = log_diff.loc[test_start_idx:test_end_idx]
-            if y.shape[0] < 100:
-                continue
-            model, poly = create_model(y.iloc[:-1], degree=degree)
-            expired_date = test_dataset
-        y = log_diff.loc[train_start_idx:test_end_idx]
-        x_poly = poly.fit_transform(np.arange(len(y)).reshape(-1, 1))
-        y_pred = model.predict(x_poly)
-        dt = dt.strftime(data_format)
-        results.append([
-            dt,
-            y[-1],
-            y_pred[-1],
-        ])
-        expired_date -= 1
-    results = pd.DataFrame(results, columns=['dt', 'y', 'y_pred'])
-    results['dt'] = pd.to_datetime(results['dt'])
-    results = results.set_index('dt')
+    return log_diff.dropna()
+
+
+def _window_start(index: pd.DatetimeIndex, train_dataset: int) -> np.ndarray:
+    """
+    每根K线训练窗口的起始位置：时间戳（精确到秒）往前 train_dataset 年
+    """
+    start = index.floor('s') - pd.DateOffset(years=int(train_dataset))
+    return index.searchsorted(start, side='left')
+
 
+def poly_reg_degrees(close, benchmark='SPY', interval: str = '1d', degrees=(1,), train_dataset=4, test_dataset=5,
+                     train_start_time: str = '2015-01-01'):
+    """
+    Log.diff 和 多项式预测，同时计算多个 degree
+
+    :param close:
+    :param benchmark:
+    :param degrees: 多项式阶数列表
+    :param train_dataset:
+    :param test_dataset:
+    :param train_start_time:
+    :param interval: 1d, 1h, 15min, 5min, 1min
+    :return: y, y_pred（DataFrame，每个 degree 一列）
+    """
+    if isinstance(close, pd.DataFrame):
+        close = close.iloc[:, 0]
+    if benchmark == '':
+        benchmark = None
+    degrees = np.atleast_1d(np.asarray(degrees, dtype=np.int64))
+    bench = None if benchmark is None else benchmark_close(benchmark, interval, end=close.index[-1])
+    # 相同输入数据（包括 benchmark 数据）和参数的回归结果只计算一次，不同 degree 分别缓存
+    base_key = ('poly_reg', fingerprint(close), benchmark, None if bench is None else fingerprint(bench), interval,
+                int(train_dataset), int(test_dataset), str(train_start_time))
+    cached = {d: _cache.get(base_key + (d,)) for d in degrees.tolist()}
+    missing = np.array([d for d, v in cached.items() if v is None], dtype=np.int64)
+    if missing.shape[0] > 0:
+        log_diff = _log_diff(close, bench)
+        index = pd.DatetimeIndex(log_diff.index)
+        y, y_pred = poly_reg_nb(
+            log_diff.values.astype(np.float64),
+            _window_start(index, train_dataset),
+            index.searchsorted(pd.Timestamp(train_start_time), side='left'),
+            missing,
+            int(test_dataset)
+        )
+        for j, d in enumerate(missing.tolist()):
+            cached[d] = (index, y, y_pred[:, j].copy())
+            _cache.put(base_key + (d,), cached[d])
+    index, y, _ = cached[degrees.tolist()[0]]
+    y_pred = np.column_stack([cached[d][2] for d in degrees.tolist()])
+    results = pd.DataFrame(y_pred, index=index, columns=degrees.tolist())
+    results.insert(0, 'y', y)
     combine_result = pd.concat([close, results], axis=1)
-    combine_result = combine_result[['y', 'y_pred']]
-    return combine_result['y'], combine_result['y_pred']
+    return combine_result['y'], combine_result[degrees.tolist()]
+
+
+def poly_reg(close, benchmark='SPY', interval: str = '1d', degree=1, train_dataset=4, test_dataset=5,
+             train_start_time: str = '2015-01-01'):
+    """
+    Log.diff 和 多项式预测
+    :param close:
+    :param benchmark:
+    :param degree:
+    :param train_dataset:
+    :param test_dataset:
+    :param train_start_time:
+    :param interval: 1d, 1h, 15min, 5min, 1min
+    :return:
+    """
+    y, y_pred = poly_reg_degrees(
+        close=close,
+        benchmark=benchmark,
+        interval=interval,
+        degrees=[degree],
+        train_dataset=train_dataset,
+        test_dataset=test_dataset,
+        train_start_time=train_start_time
+    )
+    return y, y_pred.iloc[:, 0].rename('y_pred')
 
 
 def zscore(close, benchmark='SPY', interval: str = '1d', degree: int = 1, train_dataset: int = 4,
@@ -140,7 +178,7 @@ def zscore(close, benchmark='SPY', interval: str = '1d', degree: int = 1, train_
 
 def qqe_signal(close, rsi_period: int = 14, smooth: int = 5, factor: float = 4.238):
     """
-    QQE Signal
+    QQE Signal，计算由 nb.qqe_signal_nb 完成
 
     :param close: 价格数据
     :param rsi_period: RSI周期
@@ -148,55 +186,7 @@ def qqe_signal(close, rsi_period: int = 14, smooth: int = 5, factor: float = 4.2
     :param factor: 系数
     :return:
     """
-    # Sample price data (replace with your actual price data)
-    # Calculate RSI
     close = close.iloc[:, 0]
-    wilders_period = rsi_period * 2 - 1
-
-    rsi = talib.RSI(close, rsi_period)
-    rsi_ma = talib.EMA(rsi, smooth)
-    atr_rsi = abs(rsi_ma.shift(1) - rsi_ma)
-    ma_atr_rsi = talib.EMA(atr_rsi, wilders_period)
-    dar = talib.EMA(ma_atr_rsi, wilders_period) * factor
-
-    longband = np.zeros_like(close)
-    shortband = np.zeros_like(close)
-    trend = np.zeros_like(close)
-
-    delta_fast_atr_rsi = dar
-    rs_index = rsi_ma.values
-    newshortband = rs_index + delta_fast_atr_rsi
-    newlongband = rs_index - delta_fast_atr_rsi
-
-    for i in range(2, len(close)):
-        longband[i] = max(longband[i - 1], newlongband[i]) if rs_index[i - 1] > longband[i - 1] and rs_index[i] > \
-                                                              longband[i - 1] else newlongband[i]
-        shortband[i] = min(shortband[i - 1], newshortband[i]) if rs_index[i - 1] < shortband[i - 1] and rs_index[i] < \
-                                                                 shortband[i - 1] else newshortband[i]
-        if (rs_index[i] > shortband[i - 1] and rs_index[i - 1] < shortband[i - 2]) \
-                or (rs_index[i] < shortband[i - 1] and rs_index[i - 1] > shortband[i - 2]):
-            trend[i] = 1
-        elif (rs_index[i] < longband[i - 1] and rs_index[i - 1] > longband[i - 2]) \
-                or (rs_index[i] > longband[i - 1] and rs_index[i - 1] < longband[i - 2]):
-            trend[i] = -1
-        elif trend[i - 1] != 0:
-            trend[i] = trend[i - 1]
-        else:
-            trend[i] = 1
-
-    fast_atr_rsi_tl = np.where(trend == 1, longband, shortband)
-
-    # Find all the QQE Crosses
-    qq_exlong = np.zeros_like(close)
-    qq_exshort = np.zeros_like(close)
-
-    for i in range(1, len(close)):
-        qq_exlong[i] = qq_exlong[i - 1] + 1 if fast_atr_rsi_tl[i] < rs_index[i] else 0
-        qq_exshort[i] = qq_exshort[i - 1] + 1 if fast_atr_rsi_tl[i] > rs_index[i] else 0
-    long_entry = qq_exlong == 1
-    short_entry = qq_exshort == 1
-    signals = np.full(shape=(close.shape[0], 2), fill_value=0)
-    signals[long_entry, 0] = 1
-    signals[short_entry, 1] = 1
-    signals = pd.DataFrame(signals, index=close.index, columns=['long', 'short'])
+    long, short = qqe_signal_nb(close.values.astype(np.float64), rsi_period, smooth, factor)
+    signals = pd.DataFrame({'long': long, 'short': short}, index=close.index)
     return signals['long'], signals['short']
@@ -0,0 +1,167 @@
+import importlib
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+_logger = logging.getLogger(__name__)
+
+__all__ = ['warmup', 'set_cache_dir', 'KERNEL_MODULES']
+
+# 包含 numba 内核的模块
+KERNEL_MODULES = [
+    'podtrader.utils.array_utils',
+    'podtrader.utils.monte_carlo',
+    'podtrader.utils.intrabar',
+    'podtrader.indicators.nb',
+    'podtrader.signals.nb',
+]
+
+
+def _iter_dispatchers():
+    """
+    遍历内核模块中所有开启了 cache 的 numba 函数
+    """
+    from numba.core.caching import NullCache
+    from numba.core.registry import CPUDispatcher
+
+    seen = set()
+    for module_name in KERNEL_MODULES:
+        module = importlib.import_module(module_name)
+        for name, obj in vars(module).items():
+            if not isinstance(obj, CPUDispatcher) or id(obj) in seen:
+                continue
+            seen.add(id(obj))
+            if isinstance(obj._cache, NullCache):
+                continue
+            yield obj
+
+
+def set_cache_dir(path: str) -> str:
+    """
+    设置 numba 编译缓存目录，多个进程可共享同一目录
+
+    通过环境变量 NUMBA_CACHE_DIR 传递给子进程，已导入的内核也会切换到新目录
+
+    Args:
+        path: 缓存目录
+
+    Returns:
+        str: 缓存目录的绝对路径
+    """
+    import numba
+
+    path = os.path.abspath(path)
+    os.makedirs(path, exist_ok=True)
+    os.environ['NUMBA_CACHE_DIR'] = path
+    numba.config.CACHE_DIR = path
+    for dispatcher in _iter_dispatchers():
+        dispatcher.enable_caching()
+    return path
+
+
+def _standard_kernels(n: int = 64) -> List[Tuple[str, Callable, Tuple[Any, ...]]]:
+    """
+    标准签名：与指标、信号和工具函数实际调用时的参数类型一致
+
+    IndicatorFactory 传入 2D float64 数组，pyc 中的调用传入 1D float64 数组，
+    hist_price_* 只支持 1D 数组。只被其他内核调用的函数也单独列出，保证 KERNEL_MODULES 中的内核都已编译
+    """
+    from .indicators import nb as ind_nb
+    from .signals import nb as sig_nb
+    from .utils import array_utils, intrabar
+    from .utils.monte_carlo import path_stats_nb, shuffle_indices_nb
+
+    x1 = np.linspace(1.0, 2.0, n)
+    x2 = x1.reshape(-1, 1).copy()
+    b1 = np.zeros(n, dtype=np.bool_)
+    b2 = np.zeros((n, 2), dtype=np.bool_)
+    u = np.linspace(0.0, 0.99, 2 * n).reshape(2, n)
+    idx = np.zeros((2, n), dtype=np.int32)
+    return [
+        ('utils.shift', array_utils.shift, (x1, 1)),
+        ('utils.linear_regression', array_utils.linear_regression, (x1,)),
+        ('utils.linear_regression_y_value', array_utils.linear_regression_y_value, (1.0, 1.0, np.arange(n))),
+        ('utils.moving_sum_np', array_utils.moving_sum_np, (x1, 5)),
+        ('utils.moving_std_np', array_utils.moving_std_np, (x1, 5)),
+        ('utils.clean_signals', array_utils.clean_signals, (b2,)),
+        ('utils.shuffle_indices_nb', shuffle_indices_nb, (u,)),
+        ('utils.path_stats_nb', path_stats_nb, (x1, idx, 10000.0, True, 1.0)),
+        ('utils.stop_levels_nb', intrabar.stop_levels_nb, (True, 1.0, 0.05, np.nan)),
+        ('utils.resolve_stop_nb', intrabar.resolve_stop_nb, (True, 1.0, 1.1, 0.9, 1.0, 0.95, np.inf, 0)),
+        ('utils._stop_first_nb', intrabar._stop_first_nb, (0, True, 1.0, 1.0)),
+        ('utils.intrabar_stops_nb', intrabar.intrabar_stops_nb, (x1, x1, x1, x1, b1, b1, b1, b1, x1, x1, 0)),
+        ('indicators.hist_price_low_nb', ind_nb.hist_price_low_nb, (x1, 10)),
+        ('indicators.hist_price_high_nb', ind_nb.hist_price_high_nb, (x1, 10)),
+        ('indicators.hist_price_cdl_low_nb', ind_nb.hist_price_cdl_low_nb, (x1, x1, 10)),
+        ('indicators.hist_price_cdl_high_nb', ind_nb.hist_price_cdl_high_nb, (x1, x1, 10)),
+        ('indicators.zigzag', ind_nb.zigzag, (x1, x1, x1, 0.04)),
+        ('indicators.find_peaks_and_valleys', ind_nb.find_peaks_and_valleys, (x1,)),
+        ('indicators.zigzag2', ind_nb.zigzag2, (x2, x2, 12, 5, 2, 0.01)),
+        ('indicators.uut', ind_nb.uut, (x2, x2, x2, x2)),
+        ('indicators.qqe_signal_nb', ind_nb.qqe_signal_nb, (x2, 14, 5, 4.238)),
+        ('indicators.qqe_signal_nb', ind_nb.qqe_signal_nb, (x1, 14, 5, 4.238)),
+        ('indicators.ema_step_nb', ind_nb.ema_step_nb, (np.zeros(2), 1.0, 5)),
+        ('indicators.rsi_step_nb', ind_nb.rsi_step_nb, (np.zeros(4), 1.0, 14)),
+        ('indicators.qqe_state_nb', ind_nb.qqe_state_nb, ()),
+        ('indicators.qqe_step_nb', ind_nb.qqe_step_nb, (ind_nb.qqe_state_nb(), 1.0, 14, 5, 4.238)),
+        ('indicators.poly_reg_nb', ind_nb.poly_reg_nb,
+         (x1, np.zeros(n, dtype=np.int64), 0, np.array([1], dtype=np.int64), 5)),
+        ('indicators._shift_moments_nb', ind_nb._shift_moments_nb, (np.zeros(5), 0.5)),
+        ('indicators._update_moments_nb', ind_nb._update_moments_nb, (np.zeros(5), np.zeros(3), x1, 0, 5, 0.0, 1.0)),
+        ('indicators.linear_regression_channel_breakout', ind_nb.linear_regression_channel_breakout,
+         (x2, x2, x2, 30, 3, 2.5, 2.5, 0.3, 1, -1, 1)),
+        ('indicators._get_val', ind_nb._get_val, (30, 60, 1, 0.01, 1.0, x1[30:60], 2.5, 2.5, x1, 9)),
+        ('signals.dwnbreak_signal_nb', sig_nb.dwnbreak_signal_nb, (x2, x2, 1)),
+        ('signals.upbreak_signal_nb', sig_nb.upbreak_signal_nb, (x2, x2, 1)),
+        ('signals.equal_signal_nb', sig_nb.equal_signal_nb, (x2, x2, 1)),
+        ('signals.gte_signal_nb', sig_nb.gte_signal_nb, (x2, x2, 1)),
+        ('signals.lt_signal_nb', sig_nb.lt_signal_nb, (x2, x2, 1)),
+        ('signals.lte_signal_nb', sig_nb.lte_signal_nb, (x2, x2, 1)),
+    ]
+
+
+def warmup(cache_dir: str = None) -> List[Dict[str, Any]]:
+    """
+    预编译所有 numba 内核，进程池可在 initializer 中调用，避免首次回测时的 JIT 编译
+
+    已编译的签名会写入缓存目录，其他进程直接从缓存加载
+
+    Examples:
+        >>> ProcessPoolExecutor(initializer=podtrader.warmup, initargs=('/tmp/podtrader-numba',))
+
+    Args:
+        cache_dir: numba 编译缓存目录，为空时使用 NUMBA_CACHE_DIR 或 numba 默认目录
+
+    Returns:
+        List[Dict]: 每个内核的编译报告，包含 kernel、signature、seconds、source
+        （compiled: 重新编译，cache: 从缓存目录加载，memory: 当前进程已编译）
+    """
+    import numba
+
+    if cache_dir is not None:
+        set_cache_dir(cache_dir)
+    report = []
+    for name, func, args in _standard_kernels():
+        signature = ', '.join(str(numba.typeof(arg)) for arg in args)
+        overloads = len(func.overloads)
+        hits = sum(func.stats.cache_hits.values())
+        start = time.perf_counter()
+        func(*args)
+        seconds = time.perf_counter() - start
+        if len(func.overloads) == overloads:
+            source = 'memory'
+        elif sum(func.stats.cache_hits.values()) > hits:
+            source = 'cache'
+        else:
+            source = 'compiled'
+        report.append({
+            'kernel': name,
+            'signature': signature,
+            'seconds': round(seconds, 6),
+            'source': source,
+        })
+        _logger.debug(f"{name}({signature}) {source} in {seconds:.3f}s")
+    return report
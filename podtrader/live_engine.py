@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .brokerage.broker_adapter import BrokerAdapter, PaperBroker
+from .entities import BacktestConfig, BacktestConfigT, Investment
+from .events import SignalEvent, TickEvent
+from .pipeline import StrategyPipeline
+from .providers import AsyncMarketProvider
+
+_logger = logging.getLogger(__name__)
+
+__all__ = ['LiveEngine']
+
+
+class LiveEngine(StrategyPipeline):
+    def __init__(self, config: BacktestConfigT, provider: AsyncMarketProvider, broker: BrokerAdapter = None,
+                 history: Dict[str, Dict[str, pd.DataFrame]] = None, runConfig: List[Dict[str, Any]] = None):
+        """
+        实盘引擎
+
+        从 provider 读取实时行情，按指标的频率把 tick 聚合为K线，每收到交易标的的 tick 就用与回测相同的流程
+        （StrategyPipeline：指标 -> 信号 -> 规则）计算一次，产生的 SignalEvent 交给 broker 下单。
+        非临时指标只在K线收盘时重新计算，其余 tick 只计算临时指标、信号与规则
+
+        Args:
+            config: 策略配置，environment.investment 为交易标的
+            provider: 实时行情源
+            broker: 下单接口，默认为以 environment.initialCapital 为初始资金、按 environment 的止损 / 止盈设置
+                成交的模拟盘 PaperBroker
+            history: 用于指标预热的历史K线，{str(investment): {interval: DataFrame}}
+            runConfig: 运行参数
+        """
+        if isinstance(config, dict):
+            config = BacktestConfig.parse_obj(config)
+        env = config.environment
+        if env is None or env.investment is None:
+            raise ValueError("config.environment.investment is required")
+        investment = env.investment
+        if isinstance(investment, dict):
+            investment = Investment.parse_obj(investment)
+        self.config = config
+        self.instrument_target = investment
+        self.symbol = str(investment)
+        self.provider = provider
+        if broker is None:
+            broker = PaperBroker(init_cash=env.initialCapital, stop_loss=env.stopLoss, take_profit=env.takeProfit,
+                                 intrabar_path=env.intrabarPath, commission=env.commission,
+                                 slippage=env.slippage)
+        self.broker = broker
+
+        self._init_pipeline(config.indicators, config.signals, config.rules, runConfig)
+
+        # 各标的需要聚合的频率：{标的代码: {频率: 周期}}
+        self._intervals: Dict[str, Dict[str, pd.Timedelta]] = {}
+        for ind in self.indicators:
+            self._intervals.setdefault(str(ind.investment), {})[ind.interval] = pd.Timedelta(ind.interval)
+        # 正在形成的K线：{(标的代码, 频率): K线}
+        self._bars: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        if history:
+            self._warm_up(history)
+
+        # 每笔订单从收到 tick 到提交给 broker 的耗时（秒）
+        self.latencies: List[float] = []
+        self.n_ticks = 0
+        self._active = False
+
+    def _warm_up(self, history: Dict[str, Dict[str, pd.DataFrame]]):
+        for symbol, intervals in self._intervals.items():
+            for interval in intervals:
+                candles = history.get(symbol, {}).get(interval)
+                if candles is None or candles.empty:
+                    continue
+                candles = candles[['open', 'high', 'low', 'close', 'volume']].rename_axis('dt').reset_index()
+                records = candles.to_dict(orient='records')
+                self._candle_manager.put_list(symbol, interval, records)
+                # 最后一根K线可能尚未收盘，之后同一周期的 tick 继续聚合到这根K线上
+                self._bars[(symbol, interval)] = records[-1]
+
+    def _update_bar(self, symbol: str, interval: str, period: pd.Timedelta, tick: TickEvent, timestamp: pd.Timestamp):
+        """
+        把 tick 聚合到所属周期的K线上
+        """
+        dt = timestamp.floor(period)
+        bar = self._bars.get((symbol, interval))
+        if bar is not None and bar['dt'] == dt:
+            bar['high'] = max(bar['high'], tick.high)
+            bar['low'] = min(bar['low'], tick.low)
+            bar['close'] = tick.close
+            bar['volume'] += tick.volume
+        elif bar is not None and dt < bar['dt']:
+            # 迟到的 tick
+            return
+        else:
+            bar = {
+                'dt': dt,
+                'open': tick.open,
+                'high': tick.high,
+                'low': tick.low,
+                'close': tick.close,
+                'volume': tick.volume
+            }
+            self._bars[(symbol, interval)] = bar
+        self._candle_manager.put(symbol=symbol, interval=interval, candle=bar, replace=True)
+
+    async def on_tick(self, tick: TickEvent):
+        """
+        处理一个 tick：更新K线；交易标的的 tick 触发指标、信号与规则的计算并下单
+        """
+        received = time.perf_counter()
+        self.n_ticks += 1
+        timestamp = pd.Timestamp(tick.timestamp)
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.tz_localize(None)
+        for interval, period in self._intervals.get(tick.full_symbol, {}).items():
+            self._update_bar(tick.full_symbol, interval, period, tick, timestamp)
+        if tick.full_symbol != self.symbol:
+            return
+
+        res = await self.broker.on_tick(tick)
+        if res is not None:
+            self.run_config.update_all(**res)
+        self.run_config.update_all(
+            current_time=timestamp,
+            open=tick.open,
+            high=tick.high,
+            low=tick.low,
+            close=tick.close,
+            volume=tick.volume
+        )
+        try:
+            events = self._evaluate()
+        except Exception:
+            _logger.exception(f"failed to evaluate strategy at {timestamp}")
+            return
+        for event in events:
+            await self._route(event, received)
+
+    async def _route(self, event: SignalEvent, received: float):
+        event.symbol = self.instrument_target.symbol
+        event.sec_type = self.instrument_target.secType
+        event.exchange = self.instrument_target.exchange
+        res = await self.broker.submit(event)
+        self.latencies.append(time.perf_counter() - received)
+        _logger.info(f"routed {event}")
+        if res is not None:
+            self.run_config.update_all(**res)
+
+    async def run(self, max_ticks: int = None):
+        """
+        连接行情源并持续处理 tick，直到行情结束、调用 stop 或处理完 max_ticks 个 tick
+        """
+        self._active = True
+        n = 0
+        async with self.provider:
+            async for tick in self.provider.stream():
+                await self.on_tick(tick)
+                n += 1
+                if not self._active or (max_ticks is not None and n >= max_ticks):
+                    break
+        self._active = False
+
+    def start(self, max_ticks: int = None):
+        """
+        在新的事件循环中运行，阻塞直到结束
+        """
+        asyncio.run(self.run(max_ticks=max_ticks))
+
+    def stop(self):
+        self._active = False
+
+    def latency_stats(self) -> Optional[Dict[str, float]]:
+        """
+        订单延迟统计（毫秒）：count / mean / p50 / p99 / max，没有订单时返回 None
+        """
+        if not self.latencies:
+            return None
+        ms = np.asarray(self.latencies) * 1000
+        return {
+            'count': len(ms),
+            'mean': float(ms.mean()),
+            'p50': float(np.percentile(ms, 50)),
+            'p99': float(np.percentile(ms, 99)),
+            'max': float(ms.max()),
+        }
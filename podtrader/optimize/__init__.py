@@ -0,0 +1,2 @@
+from .walk_forward import *
+from .cluster import *
@@ -0,0 +1,3 @@
+from .cluster import worker_main
+
+worker_main()
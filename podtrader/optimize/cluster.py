@@ -0,0 +1,431 @@
+import argparse
+import ipaddress
+import logging
+import multiprocessing as mp
+import os
+import queue
+import secrets
+import socket
+import threading
+import time
+from collections import deque
+from multiprocessing.connection import Client, Connection, Listener, wait
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from ..entities import BacktestConfigT
+
+__all__ = [
+    'Cluster',
+    'JobResult',
+    'run_config',
+    'run_worker',
+    'spawn_local_workers',
+]
+
+_logger = logging.getLogger(__name__)
+
+AddressT = Tuple[str, int]
+
+# 只用于只监听本机回环地址的调度端
+DEFAULT_AUTHKEY = b'podtrader'
+# 调度端 / 工作端轮询间隔（秒）
+_POLL = 0.1
+
+
+class JobResult(NamedTuple):
+    """
+    一个任务的执行结果
+
+    ok: 是否成功；失败时 value 为 None，error 为错误信息（异常、超时、超出内存上限或工作节点丢失）
+    attempts: 实际派发次数，工作节点丢失后任务会重新派发
+    worker: 最后执行该任务的工作节点
+    """
+    job_id: int
+    ok: bool
+    value: Any
+    error: Optional[str]
+    attempts: int
+    worker: Optional[str]
+
+
+def run_config(config: BacktestConfigT, datasource: str = 'TV') -> dict:
+    """
+    默认任务：回测一个配置，返回 BacktestResult.to_dict()
+    """
+    from ..backtest_engine import BacktestEngine
+
+    engine = BacktestEngine.from_config(config, datasource=datasource)
+    engine.run()
+    return engine.result.to_dict()
+
+
+# ---------------------------------------------------------------- 工作端
+
+def _mp_context():
+    # 每个任务在 fork 出的子进程中执行，不必重新导入 numba / vectorbt
+    methods = mp.get_all_start_methods()
+    return mp.get_context('fork' if 'fork' in methods else None)
+
+
+def _job_main(writer: Connection, func: Callable, args: Sequence):
+    try:
+        out = (True, func(*args))
+    except BaseException as e:
+        out = (False, f"{type(e).__name__}: {e}")
+    try:
+        writer.send(out)
+    except Exception as e:
+        writer.send((False, f"result is not picklable: {type(e).__name__}: {e}"))
+    finally:
+        writer.close()
+
+
+def _rss(pid: int) -> int:
+    """
+    进程常驻内存（字节），无法读取 /proc 时返回 0
+    """
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class _RunningJob:
+    def __init__(self, process, reader: Connection, timeout: Optional[float], memory_limit: Optional[int],
+                 base_rss: int = 0):
+        self.process = process
+        self.reader = reader
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        # fork 时继承自工作节点的常驻内存，不计入任务
+        self.base_rss = base_rss
+
+    def memory_exceeded(self) -> bool:
+        return bool(self.memory_limit) and _rss(self.process.pid) - self.base_rss > self.memory_limit
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.reader.close()
+
+
+def run_worker(address: AddressT, authkey: bytes = DEFAULT_AUTHKEY, slots: int = 1, heartbeat_interval: float = 5.0,
+               name: str = None):
+    """
+    工作节点：连接调度端，接收任务并在子进程中执行，直到调度端发出停止指令或连接断开
+
+    每个任务单独 fork 一个子进程，超时或新增的常驻内存超出上限时终止该子进程并返回错误；
+    工作节点本身定期发送心跳，调度端据此判断节点是否存活
+
+    :param address: 调度端地址 (host, port)
+    :param authkey: 认证密钥，需与调度端一致
+    :param slots: 同时执行的任务数，一般为该机器的 CPU 数
+    :param heartbeat_interval: 心跳间隔（秒）
+    :param name: 节点名称，默认为 主机名:进程号
+    """
+    name = name or f"{socket.gethostname()}:{os.getpid()}"
+    ctx = _mp_context()
+    conn = Client(tuple(address), authkey=authkey)
+    conn.send(('hello', name, int(slots)))
+    running: Dict[int, _RunningJob] = {}
+    last_beat = 0.0
+
+    def finish(job_id: int, ok: bool, value: Any):
+        job = running.pop(job_id)
+        job.kill()
+        conn.send(('result', job_id, ok, value))
+
+    try:
+        while True:
+            now = time.monotonic()
+            if now - last_beat >= heartbeat_interval:
+                conn.send(('heartbeat',))
+                last_beat = now
+
+            ready = wait([conn] + [job.reader for job in running.values()], timeout=min(heartbeat_interval, _POLL))
+            if conn in ready:
+                try:
+                    msg = conn.recv()
+                except EOFError:
+                    break
+                if msg[0] == 'stop':
+                    break
+                if msg[0] == 'job':
+                    _, job_id, func, args, timeout, memory_limit = msg
+                    reader, writer = ctx.Pipe(duplex=False)
+                    base_rss = _rss(os.getpid())
+                    process = ctx.Process(target=_job_main, args=(writer, func, args), daemon=True)
+                    process.start()
+                    writer.close()
+                    running[job_id] = _RunningJob(process, reader, timeout, memory_limit, base_rss)
+
+            now = time.monotonic()
+            for job_id, job in list(running.items()):
+                if job.reader in ready:
+                    try:
+                        ok, value = job.reader.recv()
+                    except EOFError:
+                        job.process.join(1.0)
+                        ok, value = False, f"job process exited with code {job.process.exitcode}"
+                    finish(job_id, ok, value)
+                elif job.deadline is not None and now > job.deadline:
+                    finish(job_id, False, f"timeout after {job.timeout}s")
+                elif job.memory_exceeded():
+                    finish(job_id, False, f"memory limit exceeded ({job.memory_limit} bytes)")
+    except (EOFError, OSError):
+        # 调度端已关闭
+        pass
+    finally:
+        for job in running.values():
+            job.kill()
+        conn.close()
+
+
+def spawn_local_workers(address: AddressT, n: int = None, authkey: bytes = DEFAULT_AUTHKEY, slots: int = 1,
+                        heartbeat_interval: float = 5.0) -> List[mp.Process]:
+    """
+    在本机启动 n 个工作节点进程（默认为 CPU 数），用于单机运行或测试
+    """
+    n = n or os.cpu_count() or 1
+    ctx = _mp_context()
+    processes = []
+    for i in range(n):
+        # 工作节点需要创建子进程，不能是 daemon 进程
+        p = ctx.Process(target=run_worker, args=(address, authkey, slots, heartbeat_interval, f"local-{i}"))
+        p.start()
+        processes.append(p)
+    return processes
+
+
+# ---------------------------------------------------------------- 调度端
+
+class _Job:
+    def __init__(self, job_id: int, func: Callable, args: Sequence):
+        self.job_id = job_id
+        self.func = func
+        self.args = tuple(args)
+        self.attempts = 0
+        self.worker = None
+
+
+class _Worker:
+    def __init__(self, conn: Connection, name: str, slots: int):
+        self.conn = conn
+        self.name = name
+        self.slots = slots
+        self.running: Dict[int, _Job] = {}
+        self.last_seen = time.monotonic()
+
+
+def _is_loopback(host: str) -> bool:
+    try:
+        return ipaddress.ip_address(socket.gethostbyname(host)).is_loopback
+    except (OSError, ValueError):
+        return False
+
+
+class Cluster:
+    def __init__(self, address: AddressT = ('127.0.0.1', 0), authkey: bytes = None,
+                 job_timeout: float = None, memory_limit: int = None, max_retries: int = 2,
+                 heartbeat_timeout: float = 30.0):
+        """
+        基于 TCP 的回测集群调度端，不依赖外部消息队列
+
+        工作节点（run_worker，可运行在其他主机上）主动连接调度端；调度端把任务按节点的 slots 分发，
+        收集结果。任务与结果通过 pickle 传输，任务函数需能在工作节点上按模块路径导入
+
+        Args:
+            address: 监听地址，端口为 0 时由系统分配，实际地址见 address 属性
+            authkey: 认证密钥。监听回环地址时默认为 DEFAULT_AUTHKEY；监听其他地址时不能使用 DEFAULT_AUTHKEY，
+                未指定时随机生成并在日志中输出，工作节点需使用同一密钥（--authkey）
+            job_timeout: 单个任务的超时时间（秒），None 为不限制
+            memory_limit: 单个任务新增的常驻内存上限（字节，不含 fork 时继承自工作节点的部分），None 为不限制
+            max_retries: 工作节点丢失（连接断开或心跳超时）时任务的最大重试次数；
+                任务本身的异常、超时和超出内存上限不重试
+            heartbeat_timeout: 超过该时间（秒）未收到工作节点消息则视为丢失
+        """
+        if _is_loopback(address[0]):
+            if authkey is None:
+                authkey = DEFAULT_AUTHKEY
+        elif authkey is None:
+            authkey = secrets.token_hex(16).encode()
+            _logger.warning(f"cluster listening on {address[0]} with generated authkey {authkey.decode()}")
+        elif authkey == DEFAULT_AUTHKEY:
+            raise ValueError("an explicit authkey is required when the cluster listens on a non-loopback address")
+        self.authkey = authkey
+        self.job_timeout = job_timeout
+        self.memory_limit = memory_limit
+        self.max_retries = max_retries
+        self.heartbeat_timeout = heartbeat_timeout
+        self._listener = Listener(tuple(address), authkey=authkey)
+        self._new_workers: 'queue.Queue[_Worker]' = queue.Queue()
+        self._workers: List[_Worker] = []
+        self._next_id = 0
+        self._closed = False
+        self._accept_thread = threading.Thread(target=self._accept_loop, daemon=True)
+        self._accept_thread.start()
+
+    @property
+    def address(self) -> AddressT:
+        return self._listener.address
+
+    @property
+    def workers(self) -> List[str]:
+        self._add_new_workers()
+        return [w.name for w in self._workers]
+
+    def _accept_loop(self):
+        while not self._closed:
+            try:
+                conn = self._listener.accept()
+            except mp.AuthenticationError:
+                continue
+            except OSError:
+                break
+            try:
+                if not conn.poll(self.heartbeat_timeout):
+                    raise EOFError
+                kind, name, slots = conn.recv()
+                if kind != 'hello':
+                    raise EOFError
+            except (EOFError, OSError, ValueError):
+                conn.close()
+                continue
+            _logger.info(f"worker {name} joined with {slots} slots")
+            self._new_workers.put(_Worker(conn, name, max(int(slots), 1)))
+
+    def _add_new_workers(self):
+        while True:
+            try:
+                self._workers.append(self._new_workers.get_nowait())
+            except queue.Empty:
+                return
+
+    def _drop(self, worker: _Worker, reason: str, pending: deque, results: Dict[int, JobResult]):
+        """
+        移除工作节点，其上未完成的任务重新排队或记为失败
+        """
+        _logger.warning(f"worker {worker.name} lost: {reason}")
+        self._workers.remove(worker)
+        worker.conn.close()
+        for job in worker.running.values():
+            if job.attempts <= self.max_retries:
+                pending.appendleft(job)
+            else:
+                results[job.job_id] = JobResult(job.job_id, False, None, f"worker {worker.name} lost: {reason}",
+                                                job.attempts, worker.name)
+        worker.running.clear()
+
+    def map(self, func: Callable, iterable: Iterable[Sequence], wait_timeout: float = None) -> List[JobResult]:
+        """
+        对每组参数执行 func(*args)，阻塞直到全部完成，结果顺序与输入一致
+
+        :param func: 任务函数，需为模块级函数
+        :param iterable: 每个任务的参数元组
+        :param wait_timeout: 没有任何工作节点时最多等待的时间（秒），超时抛出 TimeoutError；None 为一直等待
+        """
+        jobs = []
+        for args in iterable:
+            jobs.append(_Job(self._next_id, func, args))
+            self._next_id += 1
+        pending = deque(jobs)
+        results: Dict[int, JobResult] = {}
+        idle_since = time.monotonic()
+
+        while len(results) < len(jobs):
+            self._add_new_workers()
+            if not self._workers:
+                if wait_timeout is not None and time.monotonic() - idle_since > wait_timeout:
+                    raise TimeoutError("no workers connected")
+                time.sleep(_POLL)
+                continue
+            idle_since = time.monotonic()
+
+            for worker in list(self._workers):
+                while pending and len(worker.running) < worker.slots:
+                    job = pending.popleft()
+                    job.attempts += 1
+                    job.worker = worker.name
+                    try:
+                        worker.conn.send(('job', job.job_id, job.func, job.args, self.job_timeout, self.memory_limit))
+                    except OSError as e:
+                        job.attempts -= 1
+                        pending.appendleft(job)
+                        self._drop(worker, str(e), pending, results)
+                        break
+                    worker.running[job.job_id] = job
+
+            conns = {w.conn: w for w in self._workers}
+            for conn in wait(list(conns), timeout=_POLL):
+                worker = conns[conn]
+                try:
+                    msg = conn.recv()
+                except (EOFError, OSError):
+                    self._drop(worker, 'connection closed', pending, results)
+                    continue
+                worker.last_seen = time.monotonic()
+                if msg[0] == 'result':
+                    _, job_id, ok, value = msg
+                    job = worker.running.pop(job_id, None)
+                    if job is None:
+                        continue
+                    results[job_id] = JobResult(job_id, ok, value if ok else None, None if ok else value,
+                                                job.attempts, worker.name)
+
+            now = time.monotonic()
+            for worker in list(self._workers):
+                if now - worker.last_seen > self.heartbeat_timeout:
+                    self._drop(worker, 'heartbeat timeout', pending, results)
+
+        return [results[job.job_id] for job in jobs]
+
+    def run_configs(self, configs: Iterable[BacktestConfigT], datasource: str = 'TV',
+                    wait_timeout: float = None) -> List[JobResult]:
+        """
+        分布式回测一组配置，每个结果的 value 为 BacktestResult.to_dict()
+        """
+        return self.map(run_config, [(config, datasource) for config in configs], wait_timeout=wait_timeout)
+
+    def close(self):
+        """
+        通知所有工作节点退出并停止监听
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._add_new_workers()
+        for worker in self._workers:
+            try:
+                worker.conn.send(('stop',))
+            except OSError:
+                pass
+            worker.conn.close()
+        self._workers.clear()
+        self._listener.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _parse_address(value: str) -> AddressT:
+    host, _, port = value.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+def worker_main(argv: Sequence[str] = None):
+    """
+    命令行启动工作节点：python -m podtrader.optimize HOST:PORT --slots 4
+    """
+    parser = argparse.ArgumentParser(prog='python -m podtrader.optimize', description='podtrader cluster worker')
+    parser.add_argument('address', type=_parse_address, help='scheduler address, HOST:PORT')
+    parser.add_argument('--slots', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--authkey', default=DEFAULT_AUTHKEY.decode())
+    parser.add_argument('--heartbeat', type=float, default=5.0)
+    opts = parser.parse_args(argv)
+    run_worker(opts.address, opts.authkey.encode(), opts.slots, opts.heartbeat)
@@ -0,0 +1,316 @@
+import itertools
+import math
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from ..backtest_engine import BacktestEngine, _load_price
+from ..entities import BacktestConfig, BacktestConfigT, Indicator, Investment, Parameter, Signal
+from ..utils import SharedPriceStore, get_worker_price_data, set_worker_price_data
+
+__all__ = [
+    'Fold',
+    'make_folds',
+    'parameter_grid',
+    'apply_params',
+    'load_price_data',
+    'walk_forward',
+    'WalkForwardResult',
+]
+
+WindowT = Union[int, str, pd.Timedelta, pd.DateOffset]
+
+
+class Fold(NamedTuple):
+    """
+    一个样本内 / 样本外窗口，均为闭区间
+    """
+    train_start: pd.Timestamp
+    train_end: pd.Timestamp
+    test_start: pd.Timestamp
+    test_end: pd.Timestamp
+
+
+def _advance(index: pd.DatetimeIndex, pos: int, length: WindowT) -> int:
+    """
+    从位置 pos 向后移动 length（K线数量或时间长度），返回新位置
+    """
+    if isinstance(length, (int, np.integer)):
+        return pos + int(length)
+    if pos >= len(index):
+        return len(index)
+    if isinstance(length, str):
+        length = pd.tseries.frequencies.to_offset(length)
+    return int(index.searchsorted(index[pos] + length, side='left'))
+
+
+def make_folds(index: pd.DatetimeIndex, train: WindowT, test: WindowT, step: WindowT = None,
+               anchored: bool = False) -> List[Fold]:
+    """
+    生成滚动（rolling）或锚定（anchored）的样本内 / 样本外窗口
+
+    :param index: K线时间索引
+    :param train: 样本内长度，int 为K线数量，str / Timedelta / DateOffset 为时间长度（如 '365D'）
+    :param test: 样本外长度，同 train
+    :param step: 窗口每次前移的长度，默认等于 test，即样本外窗口首尾相接
+    :param anchored: True 时样本内窗口始终从第一根K线开始，只向后扩展
+    :return: Fold 列表，最后一个样本外窗口可能不足 test
+    """
+    index = pd.DatetimeIndex(index)
+    if step is None:
+        step = test
+    n = len(index)
+    folds = []
+    start = 0
+    while start < n:
+        cut = _advance(index, start, train)
+        if cut >= n:
+            break
+        end = min(_advance(index, cut, test), n)
+        if end <= cut:
+            break
+        lo = 0 if anchored else start
+        folds.append(Fold(index[lo], index[cut - 1], index[cut], index[end - 1]))
+        next_start = _advance(index, start, step)
+        if next_start <= start:
+            raise ValueError("step must move the window forward")
+        start = next_start
+    return folds
+
+
+def parameter_grid(space: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    """
+    参数空间的笛卡尔积
+
+    :param space: {'指标或信号 uniqueId.参数 key': [候选值, ...]}
+    :return: [{'uniqueId.key': value, ...}, ...]
+    """
+    if not space:
+        return [{}]
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+
+
+def _param_type(value: Any) -> Optional[str]:
+    if isinstance(value, (bool, np.bool_)):
+        return None
+    if isinstance(value, (int, np.integer)):
+        return 'int'
+    if isinstance(value, (float, np.floating)):
+        return 'float'
+    return None
+
+
+def apply_params(config: BacktestConfigT, params: Dict[str, Any]) -> BacktestConfig:
+    """
+    将参数写入配置的副本，键为 'uniqueId.key'，uniqueId 为指标或信号的唯一标识；
+    对象中没有该参数时追加一个
+
+    :param config: 回测配置
+    :param params: {'uniqueId.key': value}
+    :return: 新的 BacktestConfig，原配置不变
+    """
+    if isinstance(config, dict):
+        config = BacktestConfig.model_validate(config)
+    config = config.model_copy(deep=True)
+    config.indicators = [Indicator.model_validate(x) if isinstance(x, dict) else x for x in config.indicators]
+    config.signals = [Signal.model_validate(x) if isinstance(x, dict) else x for x in config.signals]
+    objs = {obj.uniqueId: obj for obj in [*config.indicators, *config.signals]}
+    for name, value in params.items():
+        unique_id, _, key = name.rpartition('.')
+        if unique_id not in objs:
+            raise KeyError(f"no indicator or signal with uniqueId {unique_id!r}")
+        obj = objs[unique_id]
+        param = next((p for p in obj.params if p.key == key), None)
+        if param is None:
+            obj.params.append(Parameter(key=key, value=value, type=_param_type(value)))
+        else:
+            param.value = value
+    return config
+
+
+def _price_keys(config: BacktestConfig) -> Dict[str, tuple]:
+    """
+    回测需要的 (标的, 频率)：交易标的本身及各指标使用的数据
+    """
+    env = config.environment
+    pairs = [(env.investment, env.interval)]
+    for ind in config.indicators:
+        if isinstance(ind, dict):
+            ind = Indicator.model_validate(ind)
+        pairs.append((ind.investment, ind.interval))
+    keys = {}
+    for investment, interval in pairs:
+        if isinstance(investment, dict):
+            investment = Investment.model_validate(investment)
+        keys[(str(investment), interval)] = (investment, interval)
+    return keys
+
+
+def load_price_data(config: BacktestConfigT, datasource: str = 'TV',
+                    price_data: Dict[str, Dict[str, pd.DataFrame]] = None) -> Dict[str, Dict[str, pd.DataFrame]]:
+    """
+    一次性加载配置中用到的全部历史数据，可传给 BacktestEngine(price_data=...)
+
+    :param price_data: 已加载的数据，其中已有的 (标的, 频率) 不再重复下载，新数据写入其中
+    :return: {str(investment): {interval: DataFrame}}
+    """
+    if isinstance(config, dict):
+        config = BacktestConfig.model_validate(config)
+    env = config.environment
+    if price_data is None:
+        price_data = {}
+    for (symbol, interval), (investment, _) in _price_keys(config).items():
+        if interval in price_data.get(symbol, {}):
+            continue
+        price_data.setdefault(symbol, {})[interval] = _load_price(
+            instrument_target=investment,
+            interval=interval,
+            start_time=env.startTime,
+            end_time=env.endTime,
+            datasource=datasource
+        )
+    return price_data
+
+
+def _run_window(config: BacktestConfig, params: Dict[str, Any], index: pd.DatetimeIndex, start: pd.Timestamp,
+                end: pd.Timestamp, warmup: int, datasource: str):
+    """
+    在 [start, end] 上回测一组参数，start 之前的 warmup 根K线只用于指标预热
+    """
+    first = max(int(index.searchsorted(start)) - warmup, 0)
+    engine = BacktestEngine.from_config(
+        apply_params(config, params),
+        start_time=index[first],
+        end_time=end,
+        calculate_time=start,
+        datasource=datasource,
+        price_data=get_worker_price_data()
+    )
+    engine.run()
+    return engine.result
+
+
+def _score(result, metric: str) -> float:
+    value = result.stats().get(metric, np.nan)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _run_fold(config: BacktestConfig, grid: List[Dict[str, Any]], index: pd.DatetimeIndex, fold: Fold, metric: str,
+              maximize: bool, warmup: int, datasource: str) -> Dict[str, Any]:
+    """
+    在样本内窗口上搜索最优参数，再用最优参数回测样本外窗口
+    """
+    sign = 1.0 if maximize else -1.0
+    best_params, best_score, best_key = grid[0], np.nan, -math.inf
+    for params in grid:
+        result = _run_window(config, params, index, fold.train_start, fold.train_end, warmup, datasource)
+        score = _score(result, metric)
+        # 无法计算（NaN）的参数组合排在最后
+        key = sign * score if np.isfinite(score) else -math.inf
+        if key > best_key:
+            best_params, best_score, best_key = params, score, key
+    result = _run_window(config, best_params, index, fold.test_start, fold.test_end, warmup, datasource)
+    return {
+        'params': best_params,
+        'train_score': best_score,
+        'test_score': _score(result, metric),
+        'test_stats': result.stats(),
+        'returns': result.pf.returns(),
+    }
+
+
+class WalkForwardResult:
+    """
+    滚动前推优化结果
+
+    folds: 每个窗口的起止时间、最优参数及样本内 / 样本外得分
+    returns: 拼接后的样本外逐K线收益
+    equity: 由 returns 得到的样本外资金曲线
+    """
+
+    def __init__(self, folds: pd.DataFrame, returns: pd.Series, init_cash: float):
+        self.folds = folds
+        self.returns = returns
+        self.init_cash = init_cash
+        self.equity = init_cash * (1 + returns).cumprod()
+
+    @property
+    def total_return(self) -> float:
+        """
+        样本外总收益 [%]
+        """
+        if self.equity.empty:
+            return np.nan
+        return (self.equity.iloc[-1] / self.init_cash - 1) * 100
+
+    def __repr__(self):
+        return f"WalkForwardResult(folds={len(self.folds)}, bars={len(self.returns)})"
+
+
+def walk_forward(config: BacktestConfigT, param_space: Dict[str, Sequence[Any]], train: WindowT, test: WindowT,
+                 step: WindowT = None, anchored: bool = False, metric: str = 'Sharpe Ratio', maximize: bool = True,
+                 warmup: int = 200, datasource: str = 'TV', price_data: Dict[str, Dict[str, pd.DataFrame]] = None,
+                 n_jobs: int = None) -> WalkForwardResult:
+    """
+    滚动前推（walk-forward）优化：在每个样本内窗口上网格搜索参数，用最优参数回测紧随其后的样本外窗口，
+    并把各样本外窗口的收益拼接成一条资金曲线
+
+    各窗口在进程池中并行计算；历史数据只加载一次，写入共享内存（SharedPriceStore），各工作进程以只读视图打开，不再各自复制一份
+
+    :param config: 回测配置，回测区间为 environment.startTime ~ endTime
+    :param param_space: {'uniqueId.key': [候选值, ...]}，见 apply_params
+    :param train: 样本内长度，见 make_folds
+    :param test: 样本外长度
+    :param step: 窗口前移长度，默认等于 test
+    :param anchored: 是否锚定样本内窗口起点
+    :param metric: 优化目标，vectorbt 统计项名称，如 'Sharpe Ratio'、'Total Return [%]'
+    :param maximize: 最大化（True）或最小化 metric
+    :param warmup: 每个窗口之前用于指标预热的K线数量
+    :param datasource: 数据源
+    :param price_data: 已加载的历史数据，默认调用 load_price_data
+    :param n_jobs: 进程数，1 为在当前进程中顺序执行，默认为 CPU 数
+    """
+    if isinstance(config, dict):
+        config = BacktestConfig.model_validate(config)
+    if config.environment is None or config.environment.investment is None:
+        raise ValueError("config.environment.investment is required")
+    if price_data is None:
+        price_data = load_price_data(config, datasource=datasource)
+
+    env = config.environment
+    investment = env.investment
+    if isinstance(investment, dict):
+        investment = Investment.model_validate(investment)
+    index = price_data[str(investment)][env.interval].index
+    folds = make_folds(index, train, test, step=step, anchored=anchored)
+    if not folds:
+        raise ValueError("not enough data for one train/test window")
+    grid = parameter_grid(param_space)
+
+    args = [(config, grid, index, fold, metric, maximize, warmup, datasource) for fold in folds]
+    if n_jobs == 1:
+        set_worker_price_data(price_data)
+        try:
+            outputs = [_run_fold(*a) for a in args]
+        finally:
+            set_worker_price_data(None)
+    else:
+        # 历史数据写入共享内存，各工作进程只接收名称并以只读视图打开
+        with SharedPriceStore.publish(price_data) as store, \
+                ProcessPoolExecutor(max_workers=n_jobs, initializer=set_worker_price_data, initargs=(store,)) as pool:
+            outputs = list(pool.map(_run_fold, *zip(*args)))
+
+    rows = []
+    for fold, out in zip(folds, outputs):
+        rows.append({**fold._asdict(), 'params': out['params'], 'train_score': out['train_score'],
+                     'test_score': out['test_score']})
+    returns = pd.concat([out['returns'] for out in outputs])
+    # 样本外窗口互不重叠；step < test 时保留较晚窗口的收益
+    returns = returns[~returns.index.duplicated(keep='last')]
+    return WalkForwardResult(pd.DataFrame(rows), returns, env.initialCapital)
@@ -0,0 +1,188 @@
+from datetime import datetime
+from typing import Any, Dict, List, Union
+
+from .dependency_graph import DependencyGraph
+from .indicators import IndicatorExecutor
+from .providers import CandleManager
+from .rules import TradeRule
+from .signals import SignalExecutor
+from .utils import DiskCache
+
+__all__ = ['RunningConfig', 'StrategyPipeline']
+
+
+class RunningConfig:
+    def __init__(self, config: List[Dict[str, Any]] = None):
+        # 自定义参数
+        if config is None:
+            config = []
+        self.config = config
+
+        # 默认数据
+        self.current_time: datetime = None
+        self.open: float = None
+        self.high: float = None
+        self.low: float = None
+        self.close: float = None
+        self.volume: int = None
+
+        self.last_buy_time: Union[str, datetime] = None
+        self.last_buy_price: float = None
+        self.buy_time: Union[str, datetime] = None
+        self.buy_price: float = None
+
+        self.last_sell_time: Union[str, datetime] = None
+        self.last_sell_price: float = None
+        self.sell_time: Union[str, datetime] = None
+        self.sell_price: float = None
+
+        self.position: int = 0
+        self.cash: float = 0.0
+
+    def update(self, key: str, value: Any):
+        if hasattr(self, key):
+            setattr(self, key, value)
+
+    def update_all(self, **kwargs):
+        for key, value in kwargs.items():
+            if hasattr(self, key):
+                if key == 'buy_price':
+                    self.last_buy_price = self.buy_price
+                elif key == 'buy_time':
+                    self.last_buy_time = self.buy_time
+                elif key == 'sell_price':
+                    self.last_sell_price = self.sell_price
+                elif key == 'sell_time':
+                    self.last_sell_time = self.sell_time
+                setattr(self, key, value)
+
+    def get_params(self):
+        params = {
+            'dt': self.current_time.strftime('%Y-%m-%d %H:%M:%S'),
+            'open': self.open,
+            'high': self.high,
+            'low': self.low,
+            'close': self.close,
+            'volume': self.volume,
+            'last_buy_time': self.last_buy_time,
+            'last_buy_price': self.last_buy_price,
+            'buy_time': self.buy_time,
+            'buy_price': self.buy_price,
+            'last_sell_time': self.last_sell_time,
+            'last_sell_price': self.last_sell_price,
+            'sell_time': self.sell_time,
+            'sell_price': self.sell_price,
+            'position': self.position,
+            'cash': self.cash
+        }
+        return params
+
+
+class StrategyPipeline:
+    """
+    指标 -> 信号 -> 规则 的计算流程，回测引擎与实盘引擎共用
+
+    使用方在 __init__ 中调用 _init_pipeline，之后把K线写入 self._candle_manager、
+    用最新行情更新 self.run_config，再调用 _evaluate 得到按优先级排序的 SignalEvent
+    """
+
+    def _init_pipeline(self, indicators=None, signals=None, rules=None, runConfig: List[Dict[str, Any]] = None,
+                       indicator_cache: Union[str, DiskCache] = None):
+        # 运行参数
+        self.run_config = RunningConfig(config=runConfig)
+
+        # 指标
+        if isinstance(indicator_cache, str):
+            indicator_cache = DiskCache(indicator_cache)
+        self.indicator_cache = indicator_cache
+        self.indicators = []
+        if indicators is not None:
+            for ind in indicators:
+                self.indicators.append(IndicatorExecutor.from_obj(ind, cache=indicator_cache))
+
+        # 交易动作
+        self.signals = []
+        if signals is not None:
+            for signal in signals:
+                self.signals.append(SignalExecutor.from_obj(signal))
+
+        # 交易规则
+        self.rules = []
+        if rules is not None:
+            for rule in rules:
+                self.rules.append(TradeRule.from_rule(rule))
+
+        # 依赖图：只执行规则直接或间接引用的信号、指标及指标输出列，信号按拓扑顺序执行
+        self.dependency_graph = DependencyGraph(self.indicators, self.signals, self.rules)
+        self.indicators = self.dependency_graph.indicators
+        self.signals = self.dependency_graph.signals
+        for ind in self.indicators:
+            ind.outputs = self.dependency_graph.outputs[ind.uniqueId]
+
+        # 各标的、各频率的K线
+        self._candle_manager = CandleManager()
+        # 非临时指标的上次结果：{uniqueId: ((K线数量, 最新K线时间), 结果)}
+        self._indicator_results: Dict[str, Any] = {}
+
+    def _run_indicator(self, ind: IndicatorExecutor):
+        """
+        计算指标。非临时指标不包含正在形成的K线，结果只在该周期有K线收盘时变化，
+        其余 tick 直接使用上次的结果，计算次数与该周期的K线数量成正比，而不是与 tick 数量成正比
+        """
+        symbol = ind.investment.__str__()
+        bar = None
+        if not ind.temporary:
+            bar = self._candle_manager.last_bar(symbol, ind.interval)
+            cached = self._indicator_results.get(ind.uniqueId)
+            if bar is not None and cached is not None and cached[0] == bar:
+                return cached[1]
+        candles = self._candle_manager.get_by_symbol_and_interval(
+            symbol=symbol,
+            interval=ind.interval,
+            return_type='df'
+        )
+        if candles is None or len(candles) < 2:
+            return None
+        res = ind.run(candles)
+        if bar is not None:
+            self._indicator_results[ind.uniqueId] = (bar, res)
+        return res
+
+    def _evaluate(self) -> list:
+        """
+        按当前的K线与运行参数依次计算指标、信号与规则
+
+        :return: 规则产生的 SignalEvent，按优先级从小到大排序
+        """
+        run_config = self.run_config.get_params()
+        # 计算指标
+        for ind in self.indicators:
+            # 如果设置开仓后不再计算指标，则跳过
+            if ind.openStop and self.run_config.position > 0:
+                continue
+            res = self._run_indicator(ind)
+            if res is None:
+                continue
+            for column, series in res.items():
+                key = f"{ind.uniqueId}.{column}"
+                run_config[key] = series
+
+        # 计算动作
+        for signal in self.signals:
+            res = signal.run(run_config).iloc[-1]
+            run_config[signal.uniqueId] = res
+
+        # 计算规则
+        events = []
+        for rule in self.rules:
+            event = rule.run(run_config)
+            if event is not None:
+                events.append(event)
+        # 根据优先级从小到大排序
+        return sorted(events, key=lambda x: x.priority)
+
+    def get_pruned_nodes(self) -> Dict[str, List[str]]:
+        """
+        依赖图剪除的节点：未被规则引用的指标、信号，以及指标中未被引用的输出列（`指标ID.列名`）
+        """
+        return self.dependency_graph.pruned
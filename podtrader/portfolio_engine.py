@@ -0,0 +1,140 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+import pandas as pd
+
+from .backtest_engine import BacktestEngine, PlotBase
+from .entities import BacktestConfig, BacktestConfigT, Indicator, Investment, InvestmentT
+from .optimize import load_price_data
+from .utils import SharedPriceStore, get_worker_price_data, set_worker_price_data
+
+__all__ = ['PortfolioEngine', 'config_for_investment']
+
+
+def config_for_investment(config: BacktestConfigT, investment: InvestmentT) -> BacktestConfig:
+    """
+    将配置模板应用到某个标的：替换交易标的，以及使用模板标的（或未指定标的）的指标；
+    其他标的上的指标（如大盘过滤）保持不变
+
+    :param config: 配置模板
+    :param investment: 标的
+    :return: 新的 BacktestConfig，原配置不变
+    """
+    if isinstance(config, dict):
+        config = BacktestConfig.model_validate(config)
+    if isinstance(investment, dict):
+        investment = Investment.model_validate(investment)
+    config = config.model_copy(deep=True)
+    template = config.environment.investment
+    if isinstance(template, dict):
+        template = Investment.model_validate(template)
+    template = None if template is None else str(template)
+    config.environment.investment = investment
+
+    indicators = []
+    for ind in config.indicators:
+        if isinstance(ind, dict):
+            ind = Indicator.model_validate(ind)
+        target = ind.investment
+        if isinstance(target, dict):
+            target = Investment.model_validate(target)
+        if target is None or str(target) == template:
+            ind.investment = investment
+        indicators.append(ind)
+    config.indicators = indicators
+    return config
+
+
+def _symbol_candles(config: BacktestConfig, datasource: str) -> pd.DataFrame:
+    """
+    单个标的：运行指标 / 信号 / 规则，返回附加信号列的K线
+    """
+    engine = BacktestEngine.from_config(config, datasource=datasource, price_data=get_worker_price_data())
+    signals = engine.generate_signals()
+    return engine.signal_candles(signals)
+
+
+class PortfolioEngine(PlotBase):
+    def __init__(self, config: BacktestConfigT, universe: List[InvestmentT], datasource: str = 'TV',
+                 price_data: Dict[str, Dict[str, pd.DataFrame]] = None, n_jobs: int = None):
+        """
+        多标的组合回测引擎
+
+        同一配置模板逐个应用到 universe 中的标的（见 config_for_investment），各标的的指标、信号与规则在进程池中并行计算；
+        历史数据只加载一次，共用的数据（如大盘指标）不重复下载，并通过共享内存提供给各工作进程。各标的的信号最后在同一 Portfolio 中回测，
+        所有标的共用 environment.initialCapital 资金池，持仓按标的分别记录。
+        各标的的规则按等分的资金（initialCapital / len(universe)）计算下单数量，百分比仓位不会被第一个开仓的标的占满资金池
+
+        Args:
+            config: 配置模板，environment 为组合的资金、费用与回测区间
+            universe: 标的列表
+            datasource: 数据源
+            price_data: 已加载的历史数据，{str(investment): {interval: DataFrame}}
+            n_jobs: 进程数，1 为在当前进程中顺序执行，默认为 CPU 数
+        """
+        super(PortfolioEngine, self).__init__()
+        if isinstance(config, dict):
+            config = BacktestConfig.model_validate(config)
+        if config.environment is None:
+            raise ValueError("config.environment is required")
+        self.config = config
+        self.universe = [Investment.model_validate(x) if isinstance(x, dict) else x for x in universe]
+        self.datasource = datasource
+        self.price_data = price_data
+        self.n_jobs = n_jobs
+        # 各标的附加信号列的K线
+        self.symbol_candles: Dict[str, pd.DataFrame] = {}
+
+    def symbol_configs(self) -> Dict[str, BacktestConfig]:
+        """
+        各标的的配置，键为标的代码；initialCapital 为资金池等分后的金额
+        """
+        capital = self.config.environment.initialCapital / max(len(self.universe), 1)
+        configs = {}
+        for investment in self.universe:
+            key = investment.symbol if investment.symbol not in configs else str(investment)
+            config = config_for_investment(self.config, investment)
+            config.environment.initialCapital = capital
+            configs[key] = config
+        return configs
+
+    def run(self) -> Dict[str, pd.DataFrame]:
+        configs = self.symbol_configs()
+        price_data = dict(self.price_data or {})
+        for config in configs.values():
+            load_price_data(config, datasource=self.datasource, price_data=price_data)
+        self.price_data = price_data
+
+        symbols = list(configs)
+        args = [(configs[symbol], self.datasource) for symbol in symbols]
+        if self.n_jobs == 1:
+            set_worker_price_data(price_data)
+            try:
+                candles = [_symbol_candles(*a) for a in args]
+            finally:
+                set_worker_price_data(None)
+        else:
+            with SharedPriceStore.publish(price_data) as store, \
+                    ProcessPoolExecutor(max_workers=self.n_jobs, initializer=set_worker_price_data,
+                                        initargs=(store,)) as pool:
+                candles = list(pool.map(_symbol_candles, *zip(*args)))
+        self.symbol_candles = {s: c for s, c in zip(symbols, candles) if c is not None and not c.empty}
+
+        from .utils import backtest_portfolio
+
+        env = self.config.environment
+        res = backtest_portfolio(
+            self.symbol_candles,
+            commission=env.commission,
+            slippage=env.slippage,
+            init_cash=env.initialCapital,
+            freq=env.interval
+        )
+        self.parse_bt_result(res)
+        return self.symbol_candles
+
+    def get_symbol_stats(self) -> pd.DataFrame:
+        """
+        各标的的交易、订单与期末持仓汇总
+        """
+        return self.result.symbol_stats()
@@ -1,11 +1,18 @@
 from datetime import datetime
-from vectorbt import _typing as tp
-import vectorbt as vbt
+from typing import Optional
 
-from .yf import YFData
-from .tv import TVData
+from .._lazy import lazy_module
+from .._typings import DatetimeLike
 from .backtest_data_feed import *
-from .data_board import CandleManager
+from .data_board import CandleManager, MAX_CANDLES
+from .market_provider import *
+
+# 行情源依赖 vectorbt / yfinance / websocket，首次使用时再导入
+__getattr__, __dir__ = lazy_module(__name__, {
+    'YFData': '.yf',
+    'TVData': '.tv',
+    'ColumnStore': '.local',
+})
 
 
 def download_historical_data(
@@ -13,8 +20,8 @@ def download_historical_data(
         sec_type: str = 'stock',
         exchange: str = 'NYSE',
         interval: str = '1d',
-        start: tp.Optional[tp.DatetimeLike] = None,
-        end: tp.Optional[tp.DatetimeLike] = None,
+        start: Optional[DatetimeLike] = None,
+        end: Optional[DatetimeLike] = None,
         datasource: str = 'YF'
 ):
     import warnings
@@ -22,6 +29,7 @@ def download_historical_data(
     warnings.filterwarnings("ignore")
     """Download historical data from the provider."""
     if datasource == 'YF':
+        from .yf import YFData
         results = YFData.download(
             symbol,
             interval=interval,
@@ -62,6 +70,7 @@ def download_historical_data(
             bars = days * 24 * 60
         else:
             raise ValueError('interval must be 1d, 4h, 1h, 15min, 5min')
+        from .tv import TVData
         data = TVData.download(
             symbol,
             exchange=exchange,
@@ -78,5 +87,9 @@ def download_historical_data(
         }, axis=1)
         price.index = price.index.tz_localize(None)
         return price
+    elif datasource == 'LOCAL':
+        # 本地列式存储（见 ColumnStore），数据目录由环境变量 PODTRADER_DATA_DIR 指定
+        from .local import ColumnStore
+        return ColumnStore().read(symbol, interval, start=start, end=end, exchange=exchange)
     else:
-        raise ValueError('datasource must be YF or TV')
+        raise ValueError('datasource must be YF, TV or LOCAL')
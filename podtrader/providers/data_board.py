@@ -1,12 +1,15 @@
 from collections import deque
 from datetime import datetime
-from typing import Deque, Dict, Any, List, Union
+from typing import Deque, Dict, Any, List, Optional, Tuple, Union
 
 import pandas as pd
 
+# 每个标的、每个频率保留的K线数量，指标在这一窗口上计算
+MAX_CANDLES = 300
+
 
 class CandleQueue:
-    def __init__(self, max_length: int = 300) -> None:
+    def __init__(self, max_length: int = MAX_CANDLES) -> None:
         """
         K线队列
         """
@@ -66,6 +69,14 @@ class CandleQueue:
         """
         return list(self.queue)
 
+    def last_bar(self) -> Optional[Tuple[int, Any]]:
+        """
+        (K线数量, 最新K线的时间)，只在有新K线（即上一根K线收盘）时变化
+        """
+        if not self.queue:
+            return None
+        return len(self.queue), self.queue[-1]['dt']
+
 
 class SymbolIntervalCandleQueue:
     def __init__(self, symbol) -> None:
@@ -87,6 +98,11 @@ class SymbolIntervalCandleQueue:
             return self.interval_candle_queues[interval].get_all()
         return []
 
+    def last_bar(self, interval: str) -> Optional[Tuple[int, Any]]:
+        if interval in self.interval_candle_queues:
+            return self.interval_candle_queues[interval].last_bar()
+        return None
+
     def get_all(self) -> Dict[str, List[Dict[str, Any]]]:
         data = {}
         for k, v in self.interval_candle_queues.items():
@@ -145,6 +161,17 @@ class CandleManager:
             return []
         return pd.DataFrame(columns=['dt', 'open', 'close', 'high', 'low', 'volume'])
 
+    def last_bar(self, symbol: str, interval: str) -> Optional[Tuple[int, Any]]:
+        """
+        (K线数量, 最新K线的时间)，没有数据时返回 None；可用于判断该周期是否有K线收盘
+
+        :param symbol: 股票代码
+        :param interval: 时间间隔
+        """
+        if symbol in self.symbol_interval_candle_queues:
+            return self.symbol_interval_candle_queues[symbol].last_bar(interval)
+        return None
+
     def get_by_symbol(self, symbol: str) -> Dict[str, List[Dict[str, Any]]]:
         """
         根据股票代码获取所有K线数据
@@ -0,0 +1 @@
+from .historical import *
@@ -0,0 +1,366 @@
+import logging
+import math
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from ..._typings import DatetimeLike
+
+_logger = logging.getLogger(__name__)
+
+__all__ = [
+    'RateLimiter',
+    'HistoricalDataScheduler',
+    'BAR_SIZES',
+    'MAX_DURATIONS',
+    'query_duration',
+    'split_range',
+]
+
+# 频率 -> IB barSizeSetting
+BAR_SIZES: Dict[str, str] = {
+    '1min': '1 min',
+    '5min': '5 mins',
+    '15min': '15 mins',
+    '30min': '30 mins',
+    '1h': '1 hour',
+    '4h': '4 hours',
+    '1d': '1 day',
+}
+
+# 各频率单次请求允许的最长区间（IB 文档 Historical Data Limitations 中 Duration / Bar Size 的对应关系），
+# None 表示不限
+MAX_DURATIONS: Dict[str, Optional[pd.Timedelta]] = {
+    '1min': pd.Timedelta(days=1),
+    '5min': pd.Timedelta(weeks=1),
+    '15min': pd.Timedelta(weeks=1),
+    '30min': pd.Timedelta(days=30),
+    '1h': pd.Timedelta(days=30),
+    '4h': pd.Timedelta(days=30),
+    '1d': None,
+}
+
+# 错误码 162 既表示限流（pacing violation），也表示查询区间内没有数据
+_HMDS_ERROR = 162
+_NO_DATA = 'returned no data'
+_PACING = 'pacing violation'
+
+
+def _is_informational(error_code: int) -> bool:
+    # 2100-2199 为连接、数据农场状态等通知，10167 为改用延迟行情的提示，不表示请求失败
+    return 2100 <= error_code <= 2199 or error_code == 10167
+
+
+class RateLimiter:
+    def __init__(self, max_requests: int, period: float):
+        """
+        滑动窗口限流：任意 period 秒内最多 max_requests 个请求，按发送时间记录，线程安全
+
+        :param max_requests: 窗口内允许的请求数
+        :param period: 窗口长度（秒）
+        """
+        self.max_requests = max_requests
+        self.period = period
+        self._sent: Deque[float] = deque()
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float):
+        while self._sent and now - self._sent[0] >= self.period:
+            self._sent.popleft()
+
+    def wait_time(self) -> float:
+        """
+        距离下一个请求可以发送的秒数，0 表示当前可以发送
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            if len(self._sent) < self.max_requests:
+                return 0.0
+            return self._sent[0] + self.period - now
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            if len(self._sent) < self.max_requests:
+                self._sent.append(now)
+                return True
+            return False
+
+    def acquire(self):
+        """
+        记录一次请求，窗口已满时阻塞
+        """
+        while not self.try_acquire():
+            time.sleep(self.wait_time())
+
+
+def query_duration(start: datetime, end: datetime) -> str:
+    """
+    覆盖 [start, end] 的 IB durationStr：不足一天用秒（S），一年以内用天（D），否则用年（Y）
+    """
+    seconds = max((pd.Timestamp(end) - pd.Timestamp(start)).total_seconds(), 1)
+    if seconds <= 86400:
+        return f"{math.ceil(seconds)} S"
+    days = math.ceil(seconds / 86400)
+    if days <= 365:
+        return f"{days} D"
+    return f"{math.ceil(days / 365)} Y"
+
+
+def split_range(start: DatetimeLike, end: DatetimeLike, interval: str) -> List[Tuple[pd.Timestamp, str]]:
+    """
+    把 [start, end] 按该频率单次请求允许的最长区间，从 end 向前切分
+
+    :return: [(endDateTime, durationStr)]，按时间从后往前
+    """
+    if interval not in BAR_SIZES:
+        raise ValueError(f"interval must be one of {list(BAR_SIZES)}")
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    step = MAX_DURATIONS[interval]
+    if step is None:
+        return [(end, query_duration(start, end))]
+    chunks = []
+    while end > start:
+        chunk_start = max(start, end - step)
+        chunks.append((end, query_duration(chunk_start, end)))
+        end = chunk_start
+    return chunks
+
+
+def _parse_bar_time(value: str) -> pd.Timestamp:
+    """
+    formatDate=1 时的 bar.date：'20240102' 或 '20240102 09:30:00'（新版本带时区后缀，如 ' US/Eastern'）
+    """
+    parts = str(value).split(' ')
+    if len(parts) == 1 or not parts[1]:
+        return pd.Timestamp(datetime.strptime(parts[0], '%Y%m%d'))
+    return pd.Timestamp(datetime.strptime(f"{parts[0]} {parts[1]}", '%Y%m%d %H:%M:%S'))
+
+
+class _Request(NamedTuple):
+    symbol: str
+    end: pd.Timestamp
+    duration: str
+
+
+class _Query:
+    def __init__(self, request: _Request, attempt: int = 0):
+        self.request = request
+        self.attempt = attempt
+        self.rows: List[Dict[str, Any]] = []
+        self.sent = 0.0
+
+
+class HistoricalDataScheduler:
+    def __init__(self, client, contract_factory: Callable[[str], Any] = None, max_concurrent: int = 50,
+                 requests_per_period: int = 60, period: float = 600.0, contract_requests: int = 5,
+                 contract_period: float = 2.0, retry_delay: float = 15.0, max_retries: int = 3,
+                 timeout: float = 60.0, time_zone: str = None, first_request_id: int = 14000):
+        """
+        IB 历史数据请求调度
+
+        长区间按 MAX_DURATIONS 切分，多个标的、多个区间的请求同时发出（最多 max_concurrent 个未完成），
+        在 IB 的限流规则内尽快完成：全局每 period 秒不超过 requests_per_period 个请求，
+        同一标的每 contract_period 秒不超过 contract_requests 个请求，均按滑动窗口（RateLimiter）控制。
+        被限流（错误 162 pacing violation）或超时的请求在 retry_delay 秒后重试（IB 不允许 15 秒内的相同请求），
+        最多 max_retries 次；结果按标的合并、去重、排序
+
+        client 为 EClient（或实现 reqHistoricalData / cancelHistoricalData 的对象），
+        其 EWrapper 回调 historicalData / historicalDataEnd / error 需转发到 on_bar / on_end / on_error
+
+        Args:
+            client: EClient
+            contract_factory: 由标的代码生成 Contract，默认直接使用标的代码
+            max_concurrent: 同时未完成的请求数上限
+            requests_per_period: 全局限流的请求数
+            period: 全局限流的时间窗口（秒）
+            contract_requests: 同一标的限流的请求数
+            contract_period: 同一标的限流的时间窗口（秒）
+            retry_delay: 重试前等待的秒数
+            max_retries: 最大重试次数
+            timeout: 单个请求的超时秒数
+            time_zone: endDateTime 的时区后缀，如 'US/Eastern'，None 时使用 TWS 的本地时区
+            first_request_id: 第一个请求的 reqId
+        """
+        self.client = client
+        self.contract_factory = contract_factory or (lambda symbol: symbol)
+        self.max_concurrent = max_concurrent
+        self.limiter = RateLimiter(requests_per_period, period)
+        self.contract_requests = contract_requests
+        self.contract_period = contract_period
+        self._contract_limiters: Dict[str, RateLimiter] = {}
+        self.retry_delay = retry_delay
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.time_zone = time_zone
+
+        self._lock = threading.Lock()
+        self._next_id = first_request_id
+        self._queries: Dict[int, _Query] = {}
+        # 回调线程 -> 调度线程：(reqId, 错误码, 错误信息)，正常结束时错误码为 None
+        self._finished: 'queue.Queue[Tuple[int, Optional[int], str]]' = queue.Queue()
+
+    # ------------------------------------ EWrapper 回调 -----------------------------#
+    def on_bar(self, req_id: int, bar):
+        query = self._queries.get(req_id)
+        if query is None:
+            return
+        query.rows.append({
+            'dt': _parse_bar_time(bar.date),
+            'open': bar.open,
+            'high': bar.high,
+            'low': bar.low,
+            'close': bar.close,
+            'volume': float(bar.volume),
+        })
+
+    def on_end(self, req_id: int):
+        if req_id in self._queries:
+            self._finished.put((req_id, None, ''))
+
+    def on_error(self, req_id: int, error_code: int, error_string: str):
+        if _is_informational(error_code):
+            _logger.debug(f"historical data request {req_id}: {error_code} {error_string}")
+            return
+        if req_id in self._queries:
+            self._finished.put((req_id, error_code, error_string))
+
+    # ------------------------------------ 调度 -----------------------------#
+    def _contract_limiter(self, symbol: str) -> RateLimiter:
+        limiter = self._contract_limiters.get(symbol)
+        if limiter is None:
+            limiter = self._contract_limiters[symbol] = RateLimiter(self.contract_requests, self.contract_period)
+        return limiter
+
+    def _send(self, query: _Query, interval: str, what_to_show: str, use_rth: bool) -> int:
+        with self._lock:
+            req_id = self._next_id
+            self._next_id += 1
+        request = query.request
+        end = request.end.strftime('%Y%m%d %H:%M:%S')
+        if self.time_zone:
+            end = f"{end} {self.time_zone}"
+        query.sent = time.monotonic()
+        self._queries[req_id] = query
+        self.client.reqHistoricalData(req_id, self.contract_factory(request.symbol), end, request.duration,
+                                      BAR_SIZES[interval], what_to_show, int(use_rth), 1, False, [])
+        return req_id
+
+    def _next_ready(self, pending: Deque[Tuple[float, _Query]]) -> Tuple[Optional[_Query], float]:
+        """
+        取出第一个可以发送的请求（已过重试等待时间、所属标的未达到限流），否则返回需要等待的秒数
+        """
+        now = time.monotonic()
+        wait = math.inf
+        for i, (not_before, query) in enumerate(pending):
+            if not_before > now:
+                wait = min(wait, not_before - now)
+                continue
+            limiter = self._contract_limiter(query.request.symbol)
+            if limiter.try_acquire():
+                del pending[i]
+                return query, 0.0
+            wait = min(wait, limiter.wait_time())
+        return None, wait
+
+    def fetch(self, symbols: Sequence[str], interval: str, start: DatetimeLike, end: DatetimeLike = None,
+              what_to_show: str = 'TRADES', use_rth: bool = True) -> Dict[str, pd.DataFrame]:
+        """
+        下载多个标的 [start, end] 的K线
+
+        :param symbols: 标的代码
+        :param interval: 频率，见 BAR_SIZES
+        :param start: 开始时间
+        :param end: 结束时间，默认为当前时间
+        :param what_to_show: TRADES / MIDPOINT / BID / ASK 等
+        :param use_rth: 是否只包含常规交易时段
+        :return: {标的代码: DataFrame}，索引名为 dt，列为 open / high / low / close / volume
+        """
+        start = pd.Timestamp(start)
+        end = pd.Timestamp(datetime.now() if end is None else end)
+        chunks = split_range(start, end, interval)
+        # 按区间交错排列各标的的请求，避免同一标的的请求集中在一起被单标的限流
+        pending: Deque[Tuple[float, _Query]] = deque(
+            (0.0, _Query(_Request(symbol, chunk_end, duration)))
+            for chunk_end, duration in chunks for symbol in symbols
+        )
+        results: Dict[str, List[Dict[str, Any]]] = {symbol: [] for symbol in symbols}
+        in_flight: Dict[int, _Query] = {}
+        failures = []
+
+        while pending or in_flight:
+            # 在并发与限流允许的范围内发出请求
+            wait = math.inf
+            while pending and len(in_flight) < self.max_concurrent:
+                wait = self.limiter.wait_time()
+                if wait > 0:
+                    break
+                query, wait = self._next_ready(pending)
+                if query is None:
+                    break
+                self.limiter.try_acquire()
+                req_id = self._send(query, interval, what_to_show, use_rth)
+                in_flight[req_id] = query
+
+            # 等待完成的请求；有未发送的请求时最多等待到限流窗口允许发送
+            if in_flight:
+                deadline = min(q.sent for q in in_flight.values()) + self.timeout
+                wait = min(wait, max(deadline - time.monotonic(), 0.0))
+            try:
+                req_id, error_code, error_string = self._finished.get(timeout=None if wait == math.inf else wait)
+            except queue.Empty:
+                self._expire(in_flight, pending, failures)
+                continue
+            query = in_flight.pop(req_id, None)
+            if query is None:
+                continue
+            self._queries.pop(req_id, None)
+            request = query.request
+            if error_code is None or (error_code == _HMDS_ERROR and _NO_DATA in error_string.lower()):
+                results[request.symbol].extend(query.rows)
+            elif error_code == _HMDS_ERROR and _PACING in error_string.lower():
+                _logger.warning(f"pacing violation: {request}, retry in {self.retry_delay}s")
+                self._retry(query, pending, failures, error_string)
+            else:
+                failures.append((request, f"{error_code} {error_string}"))
+
+        if failures:
+            request, reason = failures[0]
+            raise RuntimeError(f"{len(failures)} historical data request(s) failed, "
+                               f"first: {request.symbol} {request.end} {request.duration}: {reason}")
+        return {symbol: self._merge(rows, start, end) for symbol, rows in results.items()}
+
+    def _retry(self, query: _Query, pending: Deque[Tuple[float, _Query]], failures: list, reason: str):
+        if query.attempt >= self.max_retries:
+            failures.append((query.request, reason))
+            return
+        pending.append((time.monotonic() + self.retry_delay, _Query(query.request, query.attempt + 1)))
+
+    def _expire(self, in_flight: Dict[int, _Query], pending: Deque[Tuple[float, _Query]], failures: list):
+        now = time.monotonic()
+        for req_id, query in list(in_flight.items()):
+            if now - query.sent < self.timeout:
+                continue
+            del in_flight[req_id]
+            self._queries.pop(req_id, None)
+            cancel = getattr(self.client, 'cancelHistoricalData', None)
+            if cancel is not None:
+                cancel(req_id)
+            _logger.warning(f"historical data request timed out: {query.request}")
+            self._retry(query, pending, failures, 'timeout')
+
+    @staticmethod
+    def _merge(rows: List[Dict[str, Any]], start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        if not rows:
+            return pd.DataFrame(columns=['open', 'high', 'low', 'close', 'volume'],
+                                index=pd.DatetimeIndex([], name='dt'))
+        frame = pd.DataFrame(rows).set_index('dt')
+        frame = frame[~frame.index.duplicated(keep='last')].sort_index()
+        return frame.loc[start:end]
@@ -1,33 +1,32 @@
-import logging
-import math
 import threading
 from datetime import datetime
-from typing import Optional, Dict
+from typing import Dict, Sequence
 
+import pandas as pd
 from ibapi.client import EClient
 from ibapi.common import TickerId, BarData
 from ibapi.contract import Contract
 from ibapi.order import Order
 from ibapi.wrapper import EWrapper, iswrapper
 
-from .query_subscription import QuerySubscription
-from ...entities.candle import Candle
-from ...enums.timespan import TimeSpan
+from .historical import HistoricalDataScheduler
 
 
-class InteractiveBrokersConnector(AsyncMarketProvider, EWrapper, EClient):
-    def __init__(self, host: str = "127.0.0.1", port: int = 7497, client_id: int = 100) -> None:
+class InteractiveBrokersConnector(EWrapper, EClient):
+    def __init__(self, host: str = "127.0.0.1", port: int = 7497, client_id: int = 100, **scheduler_kwargs) -> None:
+        """
+        :param scheduler_kwargs: 历史数据调度参数（并发数、限流、重试等），见 HistoricalDataScheduler
+        """
         EWrapper.__init__(self)
         EClient.__init__(self, wrapper=self)
         self.done = False
-        self.query_subscriptions_by_id: Dict[int, QuerySubscription] = {}
+        self.scheduler = HistoricalDataScheduler(self, contract_factory=self._get_contract, **scheduler_kwargs)
 
         self.nextValidOrderId = 1
         self.connect(host, port, clientId=client_id)
 
         print(f"serverVersion:{self.serverVersion()} connectionTime:{self.twsConnectionTime()}")
         self.reqIds(-1)
-        self.tick_last_query_id = 14000
 
         thread = threading.Thread(target=self.run)
         thread.daemon = True
@@ -38,71 +37,23 @@ class InteractiveBrokersConnector(AsyncMarketProvider, EWrapper, EClient):
         self.nextValidOrderId += 1
         return oid
 
+    def request_history(
+        self, symbols: Sequence[str], interval: str, from_time: datetime, to_time: datetime = None
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        并发下载多个标的的历史K线，长区间自动切分后合并
+        """
+        return self.scheduler.fetch(symbols, interval, from_time, to_time)
+
     def request_symbol_history(
-        self, symbol: str, candle_timespan: TimeSpan, from_time: datetime, to_time: datetime
-    ) -> AsyncQueryResult:
-        logging.info(f"request_symbol_history :: {symbol} ...")
-        async_query_result = AsyncQueryResult(from_time, to_time)
-        self.tick_last_query_id += 1
-        subscription = self._add_subscription(self.tick_last_query_id, symbol, candle_timespan)
-
-        async_query_result.attach_query_subscription(subscription)
-
-        self.reqHistoricalData(
-            self.tick_last_query_id,
-            self._get_contract(symbol),
-            datetime_to_api_string(to_time),
-            self._calculate_query_duration(candle_timespan, from_time, to_time),
-            timespan_to_api_str(candle_timespan),
-            "TRADES",
-            1,
-            1,
-            False,
-            [],
-        )
-
-        return async_query_result
-
-    def _calculate_query_duration(self, candle_timespan: TimeSpan, from_time: datetime, to_time: datetime) -> str:
-        if candle_timespan == TimeSpan.Day:
-            days = (to_time - from_time).days + 1
-            if days > 365:
-                return f"{math.ceil(days / 365)} Y"
-            else:
-                return f"{math.ceil(days / 7)} W"
-
-    def _add_subscription(self, query_id: int, symbol: str, candle_timespan: TimeSpan) -> QuerySubscription:
-        subscription = QuerySubscription(query_id, symbol, candle_timespan)
-        self.query_subscriptions_by_id[query_id] = subscription
-        return subscription
-
-    def _resolve_subscription(self, query_id: int) -> Optional[QuerySubscription]:
-        if query_id in self.query_subscriptions_by_id:
-            return self.query_subscriptions_by_id[query_id]
+        self, symbol: str, interval: str, from_time: datetime, to_time: datetime = None
+    ) -> pd.DataFrame:
+        return self.request_history([symbol], interval, from_time, to_time)[symbol]
 
     @iswrapper
     def historicalData(self, reqId: int, bar: BarData):
         super().historicalData(reqId, bar)
-
-        subscription = self._resolve_subscription(reqId)
-
-        try:
-            bar_time = datetime.strptime(bar.date, "%Y%m%d")
-        except Exception:
-            bar_time = datetime.strptime(bar.date, "%Y%m%d %H:%M:%S")
-
-        c = Candle(
-            subscription.symbol,
-            subscription.candle_timespan,
-            bar_time,
-            bar.open,
-            bar.close,
-            bar.high,
-            bar.low,
-            bar.volume,
-        )
-
-        subscription.push_candles([c])
+        self.scheduler.on_bar(reqId, bar)
 
     @iswrapper
     def nextValidId(self, orderId: int):
@@ -110,16 +61,14 @@ class InteractiveBrokersConnector(AsyncMarketProvider, EWrapper, EClient):
         self.nextValidOrderId = orderId
 
     @iswrapper
-    def error(self, reqId: TickerId, errorCode: int, errorString: str):
-        super().error(reqId, errorCode, errorString)
-        sub = self._resolve_subscription(reqId)
-        if sub:
-            sub.done(True)
+    def error(self, reqId: TickerId, errorCode: int, errorString: str, *args):
+        super().error(reqId, errorCode, errorString, *args)
+        self.scheduler.on_error(reqId, errorCode, errorString)
 
     @iswrapper
     def historicalDataEnd(self, reqId: int, start: str, end: str):
         super().historicalDataEnd(reqId, start, end)
-        self._resolve_subscription(reqId).done()
+        self.scheduler.on_end(reqId)
 
     def kill(self):
         self.done = True
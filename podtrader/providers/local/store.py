@@ -0,0 +1,276 @@
+import json
+import os
+import re
+import shutil
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..._typings import DatetimeLike
+
+__all__ = ['ColumnStore', 'DATA_DIR_ENV']
+
+# 默认数据目录的环境变量，未设置时为 ~/.podtrader/data
+DATA_DIR_ENV = 'PODTRADER_DATA_DIR'
+
+# 稀疏时间索引的间隔：每 SPARSE_STEP 根K线记录一个时间戳
+SPARSE_STEP = 4096
+
+_META = 'meta.json'
+_TIME = 'time'
+
+
+def _safe_name(value: str) -> str:
+    return re.sub(r'[^0-9A-Za-z._=-]', '_', str(value))
+
+
+def _as_ns(value: DatetimeLike) -> int:
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert(None)
+    return ts.as_unit('ns').value
+
+
+class ColumnStore:
+    def __init__(self, root: str = None):
+        """
+        本地列式K线存储，按 交易所 / 标的 / 频率 分目录，每列一个文件，读取时以 np.memmap 打开
+
+        目录结构::
+
+            root/exchange/symbol/interval/
+                meta.json      列名、类型与行数
+                time.bin       int64，UTC 纳秒时间戳，严格递增
+                open.bin ...   float64 或 float32
+                sparse.bin     稀疏时间索引，每 SPARSE_STEP 根K线一个时间戳
+
+        按时间范围读取时先在稀疏索引上二分，再在对应的一段时间戳上二分，只访问少量页面；
+        返回的 DataFrame 各列为 memmap 上的只读视图，数据不必全部载入内存
+
+        Args:
+            root: 数据目录，默认为环境变量 PODTRADER_DATA_DIR，未设置时为 ~/.podtrader/data
+        """
+        if root is None:
+            root = os.environ.get(DATA_DIR_ENV) or os.path.join(os.path.expanduser('~'), '.podtrader', 'data')
+        self.root = os.path.abspath(root)
+
+    def path(self, symbol: str, interval: str, exchange: str = None) -> str:
+        return os.path.join(self.root, _safe_name(exchange or '_'), _safe_name(symbol), _safe_name(interval))
+
+    @staticmethod
+    def _load_meta(path: str) -> Optional[dict]:
+        try:
+            with open(os.path.join(path, _META), encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _column(path: str, name: str, dtype: str, n_rows: int) -> np.ndarray:
+        if n_rows == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(os.path.join(path, f'{name}.bin'), dtype=dtype, mode='r', shape=(n_rows,))
+
+    def exists(self, symbol: str, interval: str, exchange: str = None) -> bool:
+        return self._load_meta(self.path(symbol, interval, exchange)) is not None
+
+    def symbols(self) -> List[Tuple[str, str, str]]:
+        """
+        已存储的 (exchange, symbol, interval)，exchange 为 None 时目录名为 '_'
+        """
+        out = []
+        if not os.path.isdir(self.root):
+            return out
+        for exchange in sorted(os.listdir(self.root)):
+            for symbol in sorted(os.listdir(os.path.join(self.root, exchange))):
+                for interval in sorted(os.listdir(os.path.join(self.root, exchange, symbol))):
+                    if os.path.exists(os.path.join(self.root, exchange, symbol, interval, _META)):
+                        out.append((exchange, symbol, interval))
+        return out
+
+    def time_range(self, symbol: str, interval: str, exchange: str = None) -> Optional[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """
+        已存储数据的首尾时间，没有数据时返回 None
+        """
+        meta = self._load_meta(self.path(symbol, interval, exchange))
+        if not meta or meta['n_rows'] == 0:
+            return None
+        return pd.Timestamp(meta['first']), pd.Timestamp(meta['last'])
+
+    def _locate(self, path: str, meta: dict, value: int, side: str) -> int:
+        """
+        时间戳在 time 列中的位置（同 np.searchsorted），O(log n)
+        """
+        n = meta['n_rows']
+        sparse = self._column(path, 'sparse', 'int64', -(-n // SPARSE_STEP))
+        block = max(int(np.searchsorted(sparse, value, side=side)) - 1, 0)
+        lo = block * SPARSE_STEP
+        hi = min(lo + SPARSE_STEP + 1, n)
+        times = self._column(path, _TIME, 'int64', n)
+        return lo + int(np.searchsorted(times[lo:hi], value, side=side))
+
+    def read(self, symbol: str, interval: str, start: DatetimeLike = None, end: DatetimeLike = None,
+             exchange: str = None, columns: List[str] = None) -> pd.DataFrame:
+        """
+        读取 [start, end] 的K线，索引名为 dt
+
+        :param columns: 只读取部分列，默认全部
+        :return: DataFrame，各列为只读 memmap 视图（不复制）
+        """
+        path = self.path(symbol, interval, exchange)
+        meta = self._load_meta(path)
+        if meta is None:
+            raise FileNotFoundError(f"no local data for {exchange}:{symbol} {interval} in {self.root}")
+        n = meta['n_rows']
+        lo = 0 if start is None or n == 0 else self._locate(path, meta, _as_ns(start), 'left')
+        hi = n if end is None or n == 0 else self._locate(path, meta, _as_ns(end), 'right')
+        hi = max(hi, lo)
+
+        index = pd.DatetimeIndex(self._column(path, _TIME, 'int64', n)[lo:hi].view('M8[ns]'), name='dt')
+        dtypes: Dict[str, str] = meta['columns']
+        data = {c: self._column(path, c, dtypes[c], n)[lo:hi] for c in (columns or dtypes)}
+        return pd.DataFrame(data, index=index, copy=False)
+
+    def _write_all(self, path: str, frame: pd.DataFrame, dtypes: Dict[str, str]):
+        """
+        写入完整数据：先写到临时目录，再整体替换
+        """
+        tmp = f'{path}.tmp'
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        times = frame.index.asi8
+        times.astype(np.int64).tofile(os.path.join(tmp, f'{_TIME}.bin'))
+        times[::SPARSE_STEP].astype(np.int64).tofile(os.path.join(tmp, 'sparse.bin'))
+        for column, dtype in dtypes.items():
+            frame[column].to_numpy(dtype=dtype).tofile(os.path.join(tmp, f'{column}.bin'))
+        self._dump_meta(tmp, dtypes, times)
+        if os.path.exists(path):
+            old = f'{path}.old'
+            shutil.rmtree(old, ignore_errors=True)
+            os.rename(path, old)
+            os.rename(tmp, path)
+            shutil.rmtree(old, ignore_errors=True)
+        else:
+            os.rename(tmp, path)
+
+    @staticmethod
+    def _dump_meta(path: str, dtypes: Dict[str, str], times: np.ndarray, n_rows: int = None):
+        n_rows = len(times) if n_rows is None else n_rows
+        meta = {
+            'columns': dtypes,
+            'n_rows': n_rows,
+            'first': str(pd.Timestamp(int(times[0]))) if len(times) else None,
+            'last': str(pd.Timestamp(int(times[-1]))) if len(times) else None,
+        }
+        tmp = os.path.join(path, f'{_META}.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(path, _META))
+
+    @staticmethod
+    def _widen(dtypes: Dict[str, str], frame: pd.DataFrame) -> Dict[str, str]:
+        """
+        整数列收到 NaN 或非整数值时改为 float64，避免写入时被强制转换（NaN -> INT_MIN，1.7 -> 1）
+        """
+        widened = dict(dtypes)
+        for column, dtype in dtypes.items():
+            if dtype != 'int64' or pd.api.types.is_integer_dtype(frame[column]):
+                continue
+            values = frame[column].to_numpy(dtype=np.float64)
+            if not (np.isfinite(values) & (values == np.trunc(values))).all():
+                widened[column] = 'float64'
+        return widened
+
+    @staticmethod
+    def _append(path: str, column: str, dtype: np.dtype, n_rows: int, values: np.ndarray):
+        """
+        在列文件的第 n_rows 行之后写入 values，丢弃其后的残留数据
+        """
+        with open(os.path.join(path, f'{column}.bin'), 'r+b') as f:
+            f.truncate(n_rows * dtype.itemsize)
+            f.seek(n_rows * dtype.itemsize)
+            values.astype(dtype, copy=False).tofile(f)
+
+    def write(self, symbol: str, interval: str, frame: pd.DataFrame, exchange: str = None,
+              float_dtype: str = 'float64') -> int:
+        """
+        写入K线。新数据全部晚于已有数据时直接追加到各列文件末尾；
+        否则与已有数据合并（时间相同的K线以新数据为准）后重写。
+        整数列（如 volume）出现 NaN 或小数时整列改为 float64 并重写
+
+        :param frame: 以时间为索引的K线，只保存数值列
+        :param float_dtype: 新建存储时浮点列的类型，'float64' 或 'float32'
+        :return: 写入后的总行数
+        """
+        path = self.path(symbol, interval, exchange)
+        meta = self._load_meta(path)
+        frame = frame[~frame.index.duplicated(keep='last')].sort_index()
+        index = frame.index
+        if index.tz is not None:
+            index = index.tz_convert(None)
+        frame = frame.set_axis(index.as_unit('ns'), axis=0)
+
+        if meta is None:
+            dtypes = {}
+            for column in frame.columns:
+                if pd.api.types.is_bool_dtype(frame[column]) or not pd.api.types.is_numeric_dtype(frame[column]):
+                    continue
+                dtypes[str(column)] = float_dtype if pd.api.types.is_float_dtype(frame[column]) else 'int64'
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._write_all(path, frame, dtypes)
+            return len(frame)
+
+        dtypes = meta['columns']
+        missing = set(dtypes) - set(frame.columns)
+        if missing:
+            raise ValueError(f"missing columns: {sorted(missing)}")
+        n = meta['n_rows']
+        widened = self._widen(dtypes, frame)
+        if n and len(frame) and (widened != dtypes or frame.index.asi8[0] <= _as_ns(meta['last'])):
+            # 与已有数据重叠或列类型改变，合并后重写
+            old = self.read(symbol, interval, exchange=exchange).astype(widened)
+            merged = pd.concat([old[~old.index.isin(frame.index)], frame[list(widened)].astype(widened)]).sort_index()
+            self._write_all(path, merged, widened)
+            return len(merged)
+        dtypes = widened
+
+        # 追加：先写数据，最后更新 meta，读取方在此之前只会看到旧的行数。
+        # 有效数据以 meta 中的行数为准，上一次追加中断时文件末尾可能残留多余的行，先截断再写入
+        self._append(path, _TIME, np.dtype(np.int64), n, frame.index.asi8)
+        for column, dtype in dtypes.items():
+            self._append(path, column, np.dtype(dtype), n, frame[column].to_numpy(dtype=dtype))
+        total = n + len(frame)
+        all_times = self._column(path, _TIME, 'int64', total)
+        all_times[::SPARSE_STEP].astype(np.int64).tofile(os.path.join(path, 'sparse.bin'))
+        self._dump_meta(path, dtypes, np.asarray(all_times[[0, -1]]) if total else all_times, n_rows=total)
+        return total
+
+    def ingest(self, symbol: str, interval: str = '1d', sec_type: str = 'stock', exchange: str = 'NYSE',
+               start: DatetimeLike = None, end: DatetimeLike = None, datasource: str = 'TV',
+               float_dtype: str = 'float64') -> int:
+        """
+        从在线数据源下载并写入本地存储，已有数据时只补充最后一根K线之后的部分（追加写入，不重写已有数据）
+        """
+        from .. import download_historical_data
+
+        time_range = self.time_range(symbol, interval, exchange)
+        last = None
+        if time_range is not None and start is None:
+            last = time_range[1]
+            # 数据源按日期下载：日线从下一天开始，日内K线从最后一根K线当天开始
+            start = (last + pd.Timedelta(days=1) if interval == '1d' else last).strftime('%Y-%m-%d')
+        frame = download_historical_data(symbol=symbol, sec_type=sec_type, exchange=exchange, interval=interval,
+                                         start=start, end=end, datasource=datasource)
+        if last is not None:
+            index = frame.index if frame.index.tz is None else frame.index.tz_convert(None)
+            frame = frame[index > last]
+            if frame.empty:
+                return self._load_meta(self.path(symbol, interval, exchange))['n_rows']
+        return self.write(symbol, interval, frame, exchange=exchange, float_dtype=float_dtype)
+
+    def delete(self, symbol: str, interval: str, exchange: str = None):
+        shutil.rmtree(self.path(symbol, interval, exchange), ignore_errors=True)
+
+    def __repr__(self):
+        return f"ColumnStore({self.root!r})"
@@ -0,0 +1,76 @@
+import asyncio
+from abc import ABCMeta, abstractmethod
+from typing import AsyncIterator, Dict, Union
+
+import pandas as pd
+
+from ..events import TickEvent
+
+__all__ = ["AsyncMarketProvider", "SimulatedMarketProvider"]
+
+
+class AsyncMarketProvider(metaclass=ABCMeta):
+    """
+    实时行情源基类，实盘引擎通过 stream 逐个读取 TickEvent
+
+    TickEvent.full_symbol 为标的代码（str(investment)），open / high / low / close / volume 为该 tick
+    （或一根实时K线）的价格与成交量
+    """
+
+    async def open(self) -> None:
+        """建立连接、订阅行情"""
+
+    async def close(self) -> None:
+        """断开连接"""
+
+    @abstractmethod
+    def stream(self) -> AsyncIterator[TickEvent]:
+        """按时间顺序产生 TickEvent，行情结束时停止迭代"""
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+
+class SimulatedMarketProvider(AsyncMarketProvider):
+    def __init__(self, data: Union[pd.DataFrame, Dict[str, pd.DataFrame]], symbol: str = 'PLACEHOLDER',
+                 delay: float = 0.0):
+        """
+        用历史K线模拟实时行情，在测试和模拟盘中代替券商的行情接口
+
+        Args:
+            data: 以时间为索引、包含 open / high / low / close / volume 的K线，
+                或 {标的代码: K线}，多个标的按时间合并后依次推送
+            symbol: data 为单个 DataFrame 时的标的代码
+            delay: 每个 tick 之间的等待秒数，0 时只让出事件循环
+        """
+        if isinstance(data, pd.DataFrame):
+            data = {symbol: data}
+        self.data = data
+        self.delay = delay
+
+    async def stream(self) -> AsyncIterator[TickEvent]:
+        frames = []
+        for symbol, frame in self.data.items():
+            frame = frame[['open', 'high', 'low', 'close', 'volume']].copy()
+            frame['full_symbol'] = symbol
+            frames.append(frame)
+        if not frames:
+            return
+        # 同一时间的多个标的保持 data 中的顺序
+        merged = pd.concat(frames).sort_index(kind='stable')
+        for row in merged.itertuples():
+            t = TickEvent()
+            t.timestamp = pd.Timestamp(row.Index)
+            t.full_symbol = row.full_symbol
+            t.open = row.open
+            t.high = row.high
+            t.low = row.low
+            t.close = row.close
+            t.price = row.close
+            t.volume = row.volume
+            yield t
+            await asyncio.sleep(self.delay)
@@ -1 +1,16 @@
-from .compare import *
+from ..._lazy import lazy_module
+
+# 信号名 -> 所在模块，首次访问时才导入并构建对应的 IndicatorFactory
+_SIGNALS = {
+    'EQ': '.compare.equal_signal',
+    'GT': '.compare.gt_signal',
+    'GTE': '.compare.gte_signal',
+    'LT': '.compare.lt_signal',
+    'LTE': '.compare.lte_signal',
+    'DWN_BREAK': '.compare.dwnbreak_signal',
+    'UP_BREAK': '.compare.upbreak_signal',
+}
+
+__all__ = list(_SIGNALS)
+
+__getattr__, __dir__ = lazy_module(__name__, _SIGNALS)
@@ -1,7 +1,13 @@
-from .equal_signal import *
-from .gt_signal import *
-from .gte_signal import *
-from .lt_signal import *
-from .lte_signal import *
-from .dwnbreak_signal import *
-from .upbreak_signal import *
+from ...._lazy import lazy_module
+
+__all__ = ['EQ', 'GT', 'GTE', 'LT', 'LTE', 'DWN_BREAK', 'UP_BREAK']
+
+__getattr__, __dir__ = lazy_module(__name__, {
+    'EQ': '.equal_signal',
+    'GT': '.gt_signal',
+    'GTE': '.gte_signal',
+    'LT': '.lt_signal',
+    'LTE': '.lte_signal',
+    'DWN_BREAK': '.dwnbreak_signal',
+    'UP_BREAK': '.upbreak_signal',
+})
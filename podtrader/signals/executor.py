@@ -2,7 +2,7 @@ import pandas as pd
 import time
 from typing import Dict
 
-from .custom import *
+from . import custom
 from ..entities import Signal, SignalT
 from ..utils import get_expr_keys
 
@@ -41,7 +41,7 @@ class SignalExecutor:
         self.left = left
         self.right = right
         self.params = params if params is not None else {}
-        self.func = globals()[func]
+        self.func = getattr(custom, func)
         self.input_names = self.func.input_names
         self.param_names = self.func.param_names
         self.output_names = self.func.output_names
@@ -1,5 +1,18 @@
+from .._lazy import lazy_module
 from .aggregation import *
 from .array_utils import *
 from .logutils import get_logger
-from .btutils import *
 from .expr_utils import *
+from .cache import *
+from .result_store import *
+from .monte_carlo import *
+from .intrabar import *
+from .price_store import *
+
+# btutils 依赖 vectorbt，首次使用时再导入
+__getattr__, __dir__ = lazy_module(__name__, {
+    'backtest_2d': '.btutils',
+    'backtest_batch': '.btutils',
+    'backtest_portfolio': '.btutils',
+    'BacktestResult': '.btutils',
+})
@@ -1,10 +1,12 @@
 import numpy as np
 import numba as nb
+import pandas as pd
 
 __all__ = [
     'shift',
     'linear_regression',
     'linear_regression_y_value',
+    'round_values',
     'myround',
     'moving_sum_np',
     'moving_std_np',
@@ -59,8 +61,119 @@ def linear_regression_y_value(k, b, x_values):
     return k * x_values + b
 
 
-def myround(value, precision: int = 4):
-    value = str(value)
+def _round_float(arr, precision: int, truncate: bool, na):
+    """
+    浮点数组按位四舍五入 / 向零截断，非有限值替换为 na；截断结果与按 str(value) 截断小数位相同
+    """
+    arr = np.asarray(arr, dtype=np.float64)
+    scale = 10.0 ** precision
+    finite = np.isfinite(arr)
+    # |x| * 10^p 超过 2^52 时整数运算不再精确：整数原样保留，其余逐个按字符串截断
+    big = np.abs(arr) * scale >= 2.0 ** 52
+    with np.errstate(invalid='ignore', over='ignore'):
+        if truncate:
+            # x * 10^p 有舍入误差（0.29 * 1e4 = 2899.9999999999995，0.8999999999999999 * 10 = 9.0）：
+            # 按十进制截断的结果 d 满足 |d| <= |x| < |d| + 10^-p，据此把 q 前后调整一位
+            sign = np.sign(arr)
+            q = np.trunc(arr * scale)
+            q = np.where(np.abs((q + sign) / scale) <= np.abs(arr), q + sign, q)
+            q = np.where(np.abs(q / scale) > np.abs(arr), q - sign, q)
+            out = q / scale
+        else:
+            out = np.round(arr, precision)
+    out = np.where(big, arr, out)
+    if truncate and (big & finite).any():
+        out = np.array(out, dtype=np.float64, ndmin=1)
+        flat_arr, flat_out = np.ravel(arr), out.reshape(-1)
+        for i in np.flatnonzero(np.ravel(big & finite)):
+            flat_out[i] = float(_truncate_large(float(flat_arr[i]), precision))
+        out = out.reshape(arr.shape)
+    # + 0.0 把 -0.0 规整为 0.0
+    out = out + 0.0
+    if finite.all():
+        return out
+    if isinstance(na, float):
+        out[~finite] = na
+        return out
+    out = out.astype(object)
+    out[~finite] = na
+    return out
+
+
+def _numeric(values: pd.Series):
+    """
+    object 列转为浮点，None 视为 NaN；含非数值（字符串、时间等）时返回 None
+    """
+    numeric = pd.to_numeric(values, errors='coerce')
+    if (numeric.isna() & values.notna()).any():
+        return None
+    return numeric.astype(np.float64)
+
+
+def round_values(values, precision: int = 4, truncate: bool = False, na=np.nan):
+    """
+    向量化的数值四舍五入（truncate=True 时向零截断）
+
+    支持标量、np.ndarray、pd.Series、pd.DataFrame。None / NaN / inf 替换为 na；
+    整数、布尔保持不变；DataFrame / Series 中的字符串、时间列原样返回
+
+    :param values: 数值
+    :param precision: 小数位数
+    :param truncate: 是否截断，默认四舍五入
+    :param na: 非有限值的替换值
+    """
+    if isinstance(values, pd.DataFrame):
+        out = values.copy()
+        for column in out.columns:
+            out[column] = round_values(out[column], precision, truncate, na)
+        return out
+    if isinstance(values, pd.Series):
+        if values.dtype == object:
+            numeric = _numeric(values)
+            if numeric is None:
+                return values
+            values = numeric
+        elif values.dtype.kind != 'f':
+            return values
+        return pd.Series(_round_float(values.to_numpy(), precision, truncate, na), index=values.index,
+                         name=values.name)
+    if np.ndim(values) == 0:
+        if values is None:
+            return na
+        if isinstance(values, (bool, np.bool_, int, np.integer)) or not isinstance(values, (float, np.floating)):
+            return values
+        return _round_float(values, precision, truncate, na).item() if np.isfinite(values) else na
+    arr = np.asarray(values)
+    if arr.dtype.kind in 'biu':
+        return arr
+    if arr.dtype.kind != 'f':
+        numeric = _numeric(pd.Series(arr.ravel()))
+        if numeric is None:
+            return arr
+        arr = numeric.to_numpy().reshape(arr.shape)
+    return _round_float(arr, precision, truncate, na)
+
+
+def _truncate_strings(arr: np.ndarray, precision: int) -> list:
+    """
+    浮点数组截断后的字符串，与 _myround_str(str(value)) 相同：被截断的值固定 precision 位小数（'1.3040'、'-0.0000'），
+    其余为 str(value)
+    """
+    arr = np.asarray(arr, dtype=np.float64).ravel()
+    # 截断与比较整列向量化，逐个元素只做一次格式化；copysign 保留截断为 0 的负数的符号，与字符串截断一致
+    truncated = np.copysign(_round_float(arr, precision, True, np.nan), arr)
+    truncated = np.where(np.isfinite(arr), truncated, arr)
+    unchanged = (truncated == arr).tolist()
+    # 超出精度范围的大数直接按字符串截断
+    big = (np.abs(arr) * 10.0 ** precision >= 2.0 ** 52).tolist()
+    fmt = f'.{precision}f'
+    return [
+        _truncate_large(v, precision) if large else str(v) if same else format(t, fmt)
+        for v, t, same, large in zip(arr.tolist(), truncated.tolist(), unchanged, big)
+    ]
+
+
+def _myround_str(value: str, precision: int) -> str:
     if value.find('.') == -1:
         return value
     int_part, dec_part = value.split('.')
@@ -69,6 +182,34 @@ def myround(value, precision: int = 4):
     return f"{int_part}.{dec_part[:precision]}"
 
 
+def _truncate_large(value: float, precision: int) -> str:
+    # 科学计数法表示的大数（>= 1e16）本身是整数，不截断
+    text = str(value)
+    return text if 'e' in text else _myround_str(text, precision)
+
+
+def myround(value, precision: int = 4):
+    """
+    截断到 precision 位小数并转为字符串，如 1.23456 -> '1.2345'，1.304000045 -> '1.3040'
+
+    结果与按 str(value) 截断小数位相同，但科学计数法表示的小数按数值截断（-3.7e-07 -> '-0.0000'）。
+    浮点数（及数组、Series、DataFrame 的浮点列）走 round_values(truncate=True) 的数值路径，整列一次格式化；
+    需要数值结果时直接使用 round_values
+    """
+    if isinstance(value, pd.DataFrame):
+        return value.apply(lambda column: myround(column, precision))
+    if isinstance(value, pd.Series):
+        values = myround(value.to_numpy(), precision)
+        return pd.Series(values, index=value.index, name=value.name, dtype=object)
+    if isinstance(value, np.ndarray):
+        if value.dtype.kind == 'f':
+            return np.array(_truncate_strings(value, precision), dtype=object).reshape(value.shape)
+        return np.array([myround(v, precision) for v in value.ravel()], dtype=object).reshape(value.shape)
+    if isinstance(value, (float, np.floating)):
+        return _truncate_strings(np.array([value]), precision)[0]
+    return _myround_str(str(value), precision)
+
+
 @nb.njit(cache=True)
 def moving_sum_np(arr: np.array, window: int = 1):
     """
@@ -1,89 +1,100 @@
 import math
-from datetime import datetime
-from typing import Any
+from typing import Any, Dict
 
 import numpy as np
 import pandas as pd
 import vectorbt as vbt
 import warnings
 
-from ..utils import myround
+from .array_utils import myround, round_values
+from .intrabar import apply_intrabar_stops
+from .result_store import RESULT_KEYS
 
 warnings.filterwarnings("ignore")
 
-__all__ = ['backtest_2d']
+__all__ = ['backtest_2d', 'backtest_batch', 'backtest_portfolio', 'BacktestResult']
 
 
-def cum_ret_cal(pf: Any, use_first_order: bool = False, benchmark_asset: str = None):
+def _series_records(series: pd.Series, dates: pd.Index = None) -> list:
     """
-    累计收益 + 基准收益
+    Series -> [[日期字符串, 值], ...]
+
+    :param dates: 已转换好的日期字符串，多个序列共用同一索引时避免重复转换
+    """
+    if dates is None:
+        dates = series.index.astype(str)
+    return [list(item) for item in zip(dates, series.to_numpy().tolist())]
+
+
+def cum_ret_series(pf: Any, use_first_order: bool = False):
+    """
+    累计收益、基准收益序列
 
     :param pf: Portfolio
     :param use_first_order: bool 是否从第一笔订单开始计算
-    :param benchmark_asset: str 基准资产
+    :return: (cum_ret, benchmark_ret)
     """
-    cum_ret = pf.get_cumulative_returns()
-    if benchmark_asset is None:
-        close = pf.close
-    else:
-        close = None
+    cum_ret = pf.cumulative_returns()
+    close = pf.close
     if use_first_order:
-        if not pf.orders.records_readable.empty:
-            signal_idx = pf.orders.records_readable['Signal Timestamp'].iloc[0]
-            cum_ret = cum_ret.loc[signal_idx:]
-            close = close.loc[signal_idx:]
-    init_close = close.iloc[0]
-    benchmark_ret = (close - init_close) / init_close + 1
-    cum_ret.index = cum_ret.index.astype(str)
-    benchmark_ret.index = benchmark_ret.index.astype(str)
-    cum_ret = cum_ret.reset_index().values.tolist()
-    benchmark_ret = benchmark_ret.reset_index().values.tolist()
+        order_idx = pf.orders.values['idx']
+        if len(order_idx) > 0:
+            cum_ret = cum_ret.iloc[order_idx[0]:]
+            close = close.iloc[order_idx[0]:]
+    if isinstance(close, pd.DataFrame):
+        # 多标的组合：等权持有各标的，上市前按现金计
+        benchmark_ret = (close / close.bfill().iloc[0]).ffill().fillna(1.0).mean(axis=1)
+    else:
+        benchmark_ret = close / close.iloc[0]
     return cum_ret, benchmark_ret
 
 
+def cum_ret_cal(pf: Any, use_first_order: bool = False, benchmark_asset: str = None):
+    """
+    累计收益 + 基准收益
+
+    :param pf: Portfolio
+    :param use_first_order: bool 是否从第一笔订单开始计算
+    :param benchmark_asset: str 基准资产，暂未支持，基准收益按 pf.close 计算
+    """
+    cum_ret, benchmark_ret = cum_ret_series(pf, use_first_order=use_first_order)
+    dates = cum_ret.index.astype(str)
+    return _series_records(cum_ret, dates), _series_records(benchmark_ret, dates)
+
+
+def drawdown_series(pf: Any) -> pd.Series:
+    """
+    回撤序列（正数，单位 %）
+    """
+    return pf.drawdown().abs() * 100
+
+
 def max_drawdown_cal(pf: Any):
     """
     最大回撤
     """
-    drawdown = pf.drawdown
-    drawdown.index = drawdown.index.astype(str)
-    drawdown = drawdown.abs() * 100
-    drawdown = drawdown.reset_index().values.tolist()
-    return drawdown
+    return _series_records(drawdown_series(pf))
 
 
 def monthly_returns_cal(pf: Any) -> dict:
     """
     月度收益
     """
-    returns = pf.returns
-    monthly_returns = returns.copy()
-    monthly_returns = monthly_returns.reset_index()
-    monthly_returns.columns = ['date', 'return']
-    monthly_returns['date'] = pd.to_datetime(monthly_returns['date'])
-    monthly_returns['year'] = monthly_returns['date'].dt.year
-    monthly_returns['month'] = monthly_returns['date'].dt.month
+    returns = pf.returns()
+    index = returns.index
+    monthly = returns.groupby([index.year, index.month]).sum() * 100
+    monthly = monthly.unstack().reindex(columns=range(1, 13))
 
     heatmap = []
     xaxis = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-    yaxis = []
-    y = -1
-    for year, group in monthly_returns.groupby('year'):
-        y = y + 1
-        yaxis.append(str(year))
-        m = -1
-        for month in range(1, 13):
-            m = m + 1
-            month_return = group[group['month'] == month]
-            if month_return.empty:
+    yaxis = [str(year) for year in monthly.index]
+    for y, row in enumerate(monthly.to_numpy().tolist()):
+        for m, value in enumerate(row):
+            value = round(value, 2)
+            if math.isnan(value) or value == 0.0:
                 heatmap.append([m, y, '-'])
             else:
-                cum_month_return = month_return['return'].sum() * 100
-                cum_month_return = round(cum_month_return, 2)
-                if math.isnan(cum_month_return) or cum_month_return == 0.0:
-                    heatmap.append([m, y, '-'])
-                else:
-                    heatmap.append([m, y, round(cum_month_return, 2)])
+                heatmap.append([m, y, value])
     month_return_heatmap = {
         'xAxis': xaxis,
         'yAxis': yaxis,
@@ -95,168 +106,180 @@ def monthly_returns_cal(pf: Any) -> dict:
 def annual_stats_cal(first_year, pf: Any):
     """
     年化统计
+
+    按年分组一次聚合持仓、回撤、基准与交易；只统计数据覆盖的年份
     """
-    orders = pf.orders.records_readable
-    orders = orders.set_index('Signal Index')
-    orders.index = pd.to_datetime(orders.index)
-    trades = pf.get_trades().records_readable
-    trades = trades.set_index('Exit Index')
-    trades.index = pd.to_datetime(trades.index)
-    position_mark = pf.position_mask
-    drawdown = pf.drawdown
-    now_year = datetime.now().year
-    results = []
-    exist_trade_years = trades.index.year.tolist()
-    exist_order_years = orders.index.year.tolist()
-    for y in range(first_year, now_year + 1, 1):
-        str_year = str(y)
-        year_positions = position_mark.loc[str_year]
-        position_coverage = year_positions[year_positions == True].shape[0] / year_positions.shape[0] * 100
-        position_coverage = round(position_coverage, 4)
-        year_drawdown = drawdown.loc[str_year]
-        max_drwadown = np.abs(year_drawdown.min()) * 100
-        max_drwadown = round(max_drwadown, 4)
-        if y in exist_trade_years:
-            year_trades = trades.loc[str_year]
-        else:
-            year_trades = pd.DataFrame()
-        if y in exist_order_years:
-            year_orders = orders.loc[str_year]
-        else:
-            year_orders = pd.DataFrame()
-        year_benchmark = pf.bm_returns.loc[str_year]
-        if year_trades.empty:
-            total_return = ''
-            best_trade = ''
-            worst_trade = ''
-            avg_winning_trade = ''
-            avg_losing_trade = ''
-        else:
-            total_return = year_trades['PnL'].sum() / 100
-            total_return = round(total_return, 4)
-            best_trade = year_trades['Return'].max() * 100
-            best_trade = round(best_trade, 4)
-            worst_trade = year_trades['Return'].min() * 100
-            worst_trade = round(worst_trade, 4)
-            avg_winning_trade = year_trades[year_trades['PnL'] > 0]['Return'].mean() * 100
-            if math.isnan(avg_winning_trade):
-                avg_winning_trade = ''
-            else:
-                avg_winning_trade = round(avg_winning_trade, 4)
-            avg_losing_trade = year_trades[year_trades['PnL'] < 0]['Return'].mean() * 100
-            if math.isnan(avg_losing_trade):
-                avg_losing_trade = ''
-            else:
-                avg_losing_trade = round(avg_losing_trade, 4)
-        benchmark_return = year_benchmark.vbt.returns.total() * 100
-        benchmark_return = round(benchmark_return, 4)
-        item = {
-            'year': y,
-            'position_coverage': position_coverage,
-            'total_return': total_return,
-            'benchmark_return': benchmark_return,
-            'max_drawdown': max_drwadown,
-            'total_orders': year_orders.shape[0],
-            'total_trades': year_trades.shape[0],
-            'best_trade': best_trade,
-            'worst_trade': worst_trade,
-            'avg_winning_trade': avg_winning_trade,
-            'avg_losing_trade': avg_losing_trade,
-        }
-        results.append(item)
-    return results
+    index = pf.wrapper.index
+    year = index.year
+    position_coverage = pf.position_mask().groupby(year).mean() * 100
+    max_drawdown = pf.drawdown().groupby(year).min().abs() * 100
+    benchmark_return = ((pf.benchmark_returns() + 1).groupby(year).prod() - 1) * 100
+
+    trades = trades_frame(pf)
+    pnl = trades['PnL']
+    ret = trades['Return']
+    trades = pd.DataFrame({
+        'pnl': pnl,
+        'ret': ret,
+        'win': ret.where(pnl > 0),
+        'loss': ret.where(pnl < 0),
+    }).groupby(trades['Exit Timestamp'].dt.year.to_numpy()).agg(
+        count=('pnl', 'size'),
+        pnl=('pnl', 'sum'),
+        best=('ret', 'max'),
+        worst=('ret', 'min'),
+        avg_win=('win', 'mean'),
+        avg_loss=('loss', 'mean'),
+    )
+    order_counts = orders_frame(pf)['Timestamp'].dt.year.value_counts()
+
+    years = position_coverage.index[position_coverage.index >= first_year]
+    trades = trades.reindex(years)
+    table = pd.DataFrame({
+        'year': years.astype(int),
+        'position_coverage': position_coverage.reindex(years).to_numpy(),
+        'total_return': (trades['pnl'] / 100).to_numpy(),
+        'benchmark_return': benchmark_return.reindex(years).to_numpy(),
+        'max_drawdown': max_drawdown.reindex(years).to_numpy(),
+        'total_orders': order_counts.reindex(years, fill_value=0).to_numpy(dtype=int),
+        'total_trades': trades['count'].fillna(0).to_numpy(dtype=int),
+        'best_trade': (trades['best'] * 100).to_numpy(),
+        'worst_trade': (trades['worst'] * 100).to_numpy(),
+        'avg_winning_trade': (trades['avg_win'] * 100).to_numpy(),
+        'avg_losing_trade': (trades['avg_loss'] * 100).to_numpy(),
+    })
+    table = round_values(table)
+    # 没有交易的年份，交易相关统计留空
+    blank = ['total_return', 'best_trade', 'worst_trade', 'avg_winning_trade', 'avg_losing_trade']
+    table[blank] = table[blank].astype(object).where(table[blank].notna(), '')
+    return table.to_dict(orient='records')
+
+
+def _enum_labels(codes: np.ndarray, enum: Any) -> np.ndarray:
+    return np.asarray(enum._fields, dtype=object)[codes]
+
+
+def _with_column(frame: pd.DataFrame, pf: Any, col: np.ndarray) -> pd.DataFrame:
+    """
+    多标的组合加上 Column 列（标的）
+    """
+    columns = pf.wrapper.columns
+    if len(columns) > 1:
+        frame['Column'] = np.asarray(columns, dtype=object)[col]
+    return frame
+
+
+def orders_frame(pf: Any) -> pd.DataFrame:
+    """
+    从订单原始记录构建 DataFrame，字段名与 ``pf.orders.records_readable`` 一致（单列组合不含 Column）
+
+    records_readable 每次调用都会把整个时间索引转成字典，长周期回测下远慢于直接按下标取值
+    """
+    records = pf.orders.values
+    return _with_column(pd.DataFrame({
+        'Order Id': records['id'],
+        'Timestamp': pf.wrapper.index[records['idx']],
+        'Size': records['size'],
+        'Price': records['price'],
+        'Fees': records['fees'],
+        'Side': _enum_labels(records['side'], vbt.portfolio.enums.OrderSide),
+    }), pf, records['col'])
+
+
+def trades_frame(pf: Any) -> pd.DataFrame:
+    """
+    从交易原始记录构建 DataFrame，字段名与 ``pf.trades.records_readable`` 一致（单列组合不含 Column）
+    """
+    records = pf.trades.values
+    index = pf.wrapper.index
+    return _with_column(pd.DataFrame({
+        'Exit Trade Id': records['id'],
+        'Size': records['size'],
+        'Entry Timestamp': index[records['entry_idx']],
+        'Avg Entry Price': records['entry_price'],
+        'Entry Fees': records['entry_fees'],
+        'Exit Timestamp': index[records['exit_idx']],
+        'Avg Exit Price': records['exit_price'],
+        'Exit Fees': records['exit_fees'],
+        'PnL': records['pnl'],
+        'Return': records['return'],
+        'Direction': _enum_labels(records['direction'], vbt.portfolio.enums.TradeDirection),
+        'Status': _enum_labels(records['status'], vbt.portfolio.enums.TradeStatus),
+        'Position Id': records['parent_id'],
+    }), pf, records['col'])
+
+
+_ORDER_COLUMNS = {
+    'Order Id': 'order_id',
+    'Timestamp': 'signal_index',
+    'Size': 'size',
+    'Price': 'price',
+    'Fees': 'fees',
+    'Side': 'side',
+}
+
+_TRADE_COLUMNS = {
+    'Size': 'size',
+    'Entry Timestamp': 'entry_index',
+    'Avg Entry Price': 'avg_entry_price',
+    'Entry Fees': 'entry_fees',
+    'Exit Timestamp': 'exit_index',
+    'Avg Exit Price': 'avg_exit_price',
+    'Exit Fees': 'exit_fees',
+    'PnL': 'pnl',
+    'Return': 'return',
+    'Direction': 'direction',
+    'Status': 'status',
+}
 
 
 def parse_orders(pf: Any):
     """
     解析订单
     """
-    orders = pf.orders.records_readable
-    trades = pf.trades.records_readable
-    orders = orders[['Order Id', 'Timestamp', 'Size', 'Price', 'Fees', 'Side']]
-    orders.columns = ['order_id', 'signal_index', 'size', 'price', 'fees', 'side']
-    orders['price'] = orders['price'].round(4)
-    orders['fees'] = orders['fees'].round(4)
-    orders['size'] = orders['size'].round(4)
-    orders = orders.to_dict(orient='records')
-
-    trades_copy = trades.copy()
-    trades_copy = trades_copy.rename(
-        columns={
-            'Size': 'size',
-            'Entry Timestamp': 'entry_index',
-            'Avg Entry Price': 'avg_entry_price',
-            'Entry Fees': 'entry_fees',
-            'Exit Timestamp': 'exit_index',
-            'Avg Exit Price': 'avg_exit_price',
-            'Exit Fees': 'exit_fees',
-            'PnL': 'pnl',
-            'Return': 'return',
-            'Direction': 'direction',
-            'Status': 'status'
-        },
-    )
-    columns = [
-        'size',
-        'entry_index',
-        'avg_entry_price',
-        'entry_fees',
-        'exit_index',
-        'avg_exit_price',
-        'exit_fees',
-        'pnl',
-        'return',
-        'direction',
-        'status'
-    ]
-    trades_copy = trades_copy[columns]
-    trades_copy['size'] = trades_copy['size'].round(4)
-    trades_copy['entry_index'] = trades_copy['entry_index'].astype(str)
-    trades_copy['exit_index'] = trades_copy['exit_index'].astype(str)
-    trades_copy['avg_entry_price'] = trades_copy['avg_entry_price'].round(4)
-    trades_copy['entry_fees'] = trades_copy['entry_fees'].round(4)
-    trades_copy['avg_exit_price'] = trades_copy['avg_exit_price'].round(4)
-    trades_copy['exit_fees'] = trades_copy['exit_fees'].round(4)
-    trades_copy['pnl'] = trades_copy['pnl'].round(4)
-    trades_copy['return'] = trades_copy['return'].round(4)
-    trades_copy['status'] = trades_copy['status'].astype(str)
+    orders = orders_frame(pf)
+    trades = trades_frame(pf)
+    # 多标的组合多出 symbol 列，订单与交易按 (时间, 标的) 关联
+    multi = 'Column' in orders
+    keys = ['symbol'] if multi else []
+    order_columns = dict(_ORDER_COLUMNS, Column='symbol') if multi else _ORDER_COLUMNS
+    trades = trades.rename(columns={'Column': 'symbol'})
+    orders = orders[list(order_columns)].rename(columns=order_columns)
+    orders[['price', 'fees', 'size']] = orders[['price', 'fees', 'size']].round(4)
+
+    trades_copy = trades[[*_TRADE_COLUMNS, *keys]].rename(columns=_TRADE_COLUMNS)
+    round_columns = ['size', 'avg_entry_price', 'entry_fees', 'avg_exit_price', 'exit_fees', 'pnl', 'return']
+    trades_copy[round_columns] = trades_copy[round_columns].round(4)
+    trades_copy[['entry_index', 'exit_index', 'status']] = trades_copy[['entry_index', 'exit_index', 'status']].astype(str)
     trades_copy = trades_copy.to_dict(orient='records')
 
-    trades = trades.set_index('Exit Timestamp')
     if not trades.empty:
-        if trades['Status'].iloc[-1] == 'Open':
-            # ['order_id', 'signal_index', 'size', 'price', 'fees', 'side']
-            abstract_order = {
-                'order_id': len(orders),
-                'signal_index': trades.index[-1],
-                'size': trades['Size'].iloc[-1],
-                'price': trades['Avg Exit Price'].iloc[-1],
-                'fees': trades['Exit Fees'].iloc[-1],
-                'side': trades['Direction'].iloc[-1]
-            }
-            orders.append(abstract_order)
-        exit_dict = {}
-        for index, row in trades.iterrows():
-            exit_dict[index] = row.to_dict()
-
-        orders = pd.DataFrame(orders)
-        orders['PnL'] = orders['signal_index'].apply(
-            lambda x: exit_dict[x].get('PnL', None) if x in exit_dict else None)
-        orders['Return'] = orders['signal_index'].apply(
-            lambda x: exit_dict[x].get('Return', None) if x in exit_dict else None)
-        orders['Direction'] = orders['signal_index'].apply(
-            lambda x: exit_dict[x].get('Direction', None) if x in exit_dict else None)
-        if 'PnL' not in orders.columns:
-            orders['PnL'] = 0.0
-        orders['PnL'] = orders['PnL'].fillna(0.0)
-        if 'Return' not in orders.columns:
-            orders['Return'] = 0.0
-        orders['Return'] = orders['Return'].fillna(0.0)
-        orders['signal_index'] = orders['signal_index'].astype(str)
+        open_trades = trades[trades['Status'] == 'Open']
+        if not open_trades.empty:
+            # 未平仓交易按最后一根K线补一笔虚拟平仓订单
+            abstract_orders = pd.DataFrame({
+                'order_id': np.arange(len(orders), len(orders) + len(open_trades)),
+                'signal_index': open_trades['Exit Timestamp'].to_numpy(),
+                'size': open_trades['Size'].to_numpy(),
+                'price': open_trades['Avg Exit Price'].to_numpy(),
+                'fees': open_trades['Exit Fees'].to_numpy(),
+                'side': open_trades['Direction'].to_numpy(),
+            })
+            if multi:
+                abstract_orders['symbol'] = open_trades['symbol'].to_numpy()
+            orders = pd.concat([orders, abstract_orders], ignore_index=True)
+        # 按平仓时间关联交易，同一时间多笔平仓取最后一笔
+        exits = trades[['Exit Timestamp', *keys, 'PnL', 'Return', 'Direction']]
+        exits = exits.drop_duplicates(['Exit Timestamp', *keys], keep='last')
+        exits = exits.rename(columns={'Exit Timestamp': 'signal_index'})
+        orders = orders.merge(exits, how='left', on=['signal_index', *keys])
+        orders[['PnL', 'Return']] = orders[['PnL', 'Return']].fillna(0.0)
+        orders['Direction'] = orders['Direction'].astype(object).where(orders['Direction'].notna(), None)
     else:
         orders['PnL'] = 0.0
         orders['Return'] = 0.0
         orders['Direction'] = None
+    orders['signal_index'] = orders['signal_index'].astype(str)
 
     return orders, trades_copy
 
@@ -282,84 +305,139 @@ def parse_stats(bt_data):
     return stats
 
 
-def stats_cal(pf: Any, orders: pd.DataFrame, init_cash: float, freq: str = '1d'):
-    stats = parse_stats(pf.stats().transpose())
-    summary = pd.DataFrame(
-        columns=['Long', 'Short', 'Total'],
-        index=['Trades', 'Wins', 'Losses', 'P&L', '% P&L']
-    )
-    additional_stats = pd.DataFrame(
-        columns=['Long', 'Short', 'Total'],
-        index=['Avg P&L', 'Total Wins', 'Total Losses', 'Avg Win', 'Avg Loss', 'Max Win', 'Max Loss']
-    )
-    # Long
-    long_orders = orders[orders['Direction'] == 'Long']
-    summary.loc['Trades', 'Long'] = long_orders.shape[0]
-    summary.loc['Wins', 'Long'] = long_orders[long_orders['PnL'] > 0].shape[0]
-    summary.loc['Losses', 'Long'] = long_orders[long_orders['PnL'] < 0].shape[0]
-    summary.loc['P&L', 'Long'] = long_orders['PnL'].sum()
-    summary.loc['% P&L', 'Long'] = long_orders['PnL'].sum() / init_cash * 100
-    additional_stats.loc['Avg P&L', 'Long'] = long_orders['PnL'].sum() / summary.loc['Trades', 'Long']
-    additional_stats.loc['Total Wins', 'Long'] = long_orders[long_orders['PnL'] > 0]['PnL'].sum()
-    additional_stats.loc['Total Losses', 'Long'] = long_orders[long_orders['PnL'] < 0]['PnL'].sum()
-    additional_stats.loc['Avg Win', 'Long'] = long_orders[long_orders['PnL'] > 0]['PnL'].mean()
-    additional_stats.loc['Avg Loss', 'Long'] = long_orders[long_orders['PnL'] < 0]['PnL'].mean()
-    additional_stats.loc['Max Win', 'Long'] = long_orders[long_orders['PnL'] > 0]['PnL'].max()
-    additional_stats.loc['Max Loss', 'Long'] = long_orders[long_orders['PnL'] < 0]['PnL'].min()
-
-    # Short
-    short_orders = orders[orders['Direction'] == 'Short']
-    summary.loc['Trades', 'Short'] = short_orders.shape[0]
-    summary.loc['Wins', 'Short'] = short_orders[short_orders['PnL'] > 0].shape[0]
-    summary.loc['Losses', 'Short'] = short_orders[short_orders['PnL'] < 0].shape[0]
-    summary.loc['P&L', 'Short'] = short_orders['PnL'].sum()
-    summary.loc['% P&L', 'Short'] = short_orders['PnL'].sum() / init_cash * 100
-    additional_stats.loc['Avg P&L', 'Short'] = short_orders['PnL'].sum() / summary.loc['Trades', 'Short']
-    additional_stats.loc['Total Wins', 'Short'] = short_orders[short_orders['PnL'] > 0]['PnL'].sum()
-    additional_stats.loc['Total Losses', 'Short'] = short_orders[short_orders['PnL'] < 0]['PnL'].sum()
-    additional_stats.loc['Avg Win', 'Short'] = short_orders[short_orders['PnL'] > 0]['PnL'].mean()
-    additional_stats.loc['Avg Loss', 'Short'] = short_orders[short_orders['PnL'] < 0]['PnL'].mean()
-    additional_stats.loc['Max Win', 'Short'] = short_orders[short_orders['PnL'] > 0]['PnL'].max()
-    additional_stats.loc['Max Loss', 'Short'] = short_orders[short_orders['PnL'] < 0]['PnL'].min()
-
-    # Total
-    summary.loc['Trades', 'Total'] = stats['Total Trades']
-    summary.loc['Wins', 'Total'] = orders[orders['PnL'] > 0].shape[0]
-    summary.loc['Losses', 'Total'] = orders[orders['PnL'] < 0].shape[0]
-    summary.loc['P&L', 'Total'] = orders['PnL'].sum()
-    summary.loc['% P&L', 'Total'] = stats['Total Return [%]']
-    if stats['Total Trades'] == 0:
-        stats['Total Trades'] = 1
-    additional_stats.loc['Avg P&L', 'Total'] = orders['PnL'].sum() / stats['Total Trades']
-    additional_stats.loc['Total Wins', 'Total'] = orders[orders['PnL'] > 0]['PnL'].sum()
-    additional_stats.loc['Total Losses', 'Total'] = orders[orders['PnL'] < 0]['PnL'].sum()
-    additional_stats.loc['Avg Win', 'Total'] = orders[orders['PnL'] > 0]['PnL'].mean()
-    additional_stats.loc['Avg Loss', 'Total'] = orders[orders['PnL'] < 0]['PnL'].mean()
-    additional_stats.loc['Max Win', 'Total'] = orders[orders['PnL'] > 0]['PnL'].max()
-    additional_stats.loc['Max Loss', 'Total'] = orders[orders['PnL'] < 0]['PnL'].min()
-
-    summary = summary.fillna(0.0)
-    additional_stats = additional_stats.fillna(0.0)
-
-    summary = summary.applymap(myround)
-    summary = summary.reset_index()
-    summary.columns = ['name', 'long', 'short', 'total']
-    summary = summary.to_dict(orient='records')
-
-    additional_stats = additional_stats.applymap(myround)
-    additional_stats = additional_stats.reset_index()
-    additional_stats.columns = ['name', 'long', 'short', 'total']
-    additional_stats = additional_stats.to_dict(orient='records')
+# 多空汇总的分组聚合：(列, 聚合函数)
+_SIDE_AGGS = {
+    'trades': ('pnl', 'size'),
+    'wins': ('win', 'count'),
+    'losses': ('loss', 'count'),
+    'pnl': ('pnl', 'sum'),
+    'total_wins': ('win', 'sum'),
+    'total_losses': ('loss', 'sum'),
+    'avg_win': ('win', 'mean'),
+    'avg_loss': ('loss', 'mean'),
+    'max_win': ('win', 'max'),
+    'max_loss': ('loss', 'min'),
+}
+
+
+def side_stats_cal(orders: pd.DataFrame) -> pd.DataFrame:
+    """
+    按 Long / Short / Total 一次分组聚合订单盈亏
+
+    :param orders: parse_orders 返回的订单，需包含 PnL、Direction 列
+    :return: DataFrame，index 为 Long/Short/Total，columns 为 _SIDE_AGGS 的键
+    """
+    pnl = orders['PnL'].astype(float).to_numpy()
+    frame = pd.DataFrame({
+        'side': orders['Direction'].to_numpy(dtype=object),
+        'pnl': pnl,
+        'win': np.where(pnl > 0, pnl, np.nan),
+        'loss': np.where(pnl < 0, pnl, np.nan),
+    })
+    # Total 作为额外的一组参与同一次 groupby
+    frame = pd.concat([frame, frame.assign(side='Total')], ignore_index=True)
+    table = frame.groupby('side', sort=False).agg(**_SIDE_AGGS)
+    table = table.reindex(['Long', 'Short', 'Total'])
+    for k in ['trades', 'wins', 'losses']:
+        table[k] = table[k].fillna(0).astype(int)
+    for k in ['pnl', 'total_wins', 'total_losses']:
+        table[k] = table[k].fillna(0.0)
+    return table
+
+
+def symbol_stats_cal(pf: Any) -> pd.DataFrame:
+    """
+    按标的汇总交易、订单与期末持仓，index 为标的（Portfolio 的列）
+    """
+    columns = pf.wrapper.columns
+    records = pf.trades.values
+    trades = pd.DataFrame({
+        'pnl': records['pnl'],
+        'ret': records['return'],
+        'win': records['pnl'] > 0,
+    }).groupby(records['col']).agg(
+        trades=('pnl', 'size'),
+        pnl=('pnl', 'sum'),
+        win_rate=('win', 'mean'),
+        avg_return=('ret', 'mean'),
+    ).reindex(range(len(columns)))
+    orders = np.bincount(pf.orders.values['col'], minlength=len(columns))
+    assets = pf.assets()
+    position = np.asarray(assets)[-1] if len(assets) else np.zeros(len(columns))
+    close = np.asarray(pf.close.ffill())[-1] if len(assets) else np.full(len(columns), np.nan)
+    return pd.DataFrame({
+        'Total Trades': trades['trades'].fillna(0).to_numpy(dtype=int),
+        'Total Orders': orders,
+        'PnL': trades['pnl'].fillna(0.0).to_numpy(),
+        'Win Rate [%]': trades['win_rate'].to_numpy() * 100,
+        'Avg Return [%]': trades['avg_return'].to_numpy() * 100,
+        'Position': np.ravel(position),
+        'Position Value': np.ravel(position * close),
+    }, index=pd.Index(columns, name='symbol'))
+
+
+def _stat_value(v, precision: int = 4):
+    """
+    total_stats 的值：与其他报表字段一样按 myround 截断为字符串，NaN / inf / NaT 记为 None
+    """
+    if v is None or v is pd.NaT:
+        return None
+    if isinstance(v, (float, np.floating)) and not np.isfinite(v):
+        return None
+    return myround(v, precision)
+
+
+def _records(table: pd.DataFrame, precision: int = 4):
+    """
+    index 为 Long/Short/Total、列为统计项的表 -> [{'name', 'long', 'short', 'total'}, ...]；
+    值（包括交易次数）按浮点数经 myround 截断为字符串，NaN 记为 '0.0'
+    """
+    table = myround(table.astype(np.float64).fillna(0.0), precision)
+    return [
+        dict(zip(('name', 'long', 'short', 'total'), [name, *table[name].tolist()]))
+        for name in table.columns
+    ]
+
+
+def stats_cal(pf: Any, orders: pd.DataFrame, init_cash: float, freq: str = '1d', pf_stats: pd.Series = None):
+    if pf_stats is None:
+        pf_stats = pf.stats()
+    side = side_stats_cal(orders)
+
+    total_trades = int(pf_stats['Total Trades'])
+    trades = np.array(side['trades'], dtype=int)
+    trades[2] = total_trades
+    # Total 的平均盈亏按 vectorbt 的交易数计算（包含未平仓交易）
+    avg_div = side['trades'].to_numpy(dtype=float)
+    avg_div[2] = total_trades if total_trades else 1
+    pnl = side['pnl'].to_numpy(dtype=float)
+    pct_pnl = pnl / init_cash * 100
+    pct_pnl[2] = pf_stats['Total Return [%]']
+
+    summary = pd.DataFrame({
+        'Trades': trades,
+        'Wins': side['wins'].to_numpy(),
+        'Losses': side['losses'].to_numpy(),
+        'P&L': pnl,
+        '% P&L': pct_pnl,
+    }, index=side.index)
+    additional_stats = pd.DataFrame({
+        # 某一方向没有交易时平均盈亏记为 0
+        'Avg P&L': np.divide(pnl, avg_div, out=np.zeros_like(pnl), where=avg_div != 0),
+        'Total Wins': side['total_wins'].to_numpy(),
+        'Total Losses': side['total_losses'].to_numpy(),
+        'Avg Win': side['avg_win'].to_numpy(),
+        'Avg Loss': side['avg_loss'].to_numpy(),
+        'Max Win': side['max_win'].to_numpy(),
+        'Max Loss': side['max_loss'].to_numpy(),
+    }, index=side.index)
+
+    summary = _records(summary)
+    additional_stats = _records(additional_stats)
 
     # sharpe_ratio = sharpe_ratio_cal(pf.returns)
     # sortino_ratio = sortino_ratio_cal(pf.returns)
-    total_stats = pf.stats().transpose()
-    # total_stats['Sharpe Ratio'] = sharpe_ratio
-    # total_stats['Sortino Ratio'] = sortino_ratio
-    total_stats = total_stats.apply(myround)
-    total_stats = total_stats.reset_index()
-    total_stats.columns = ['name', 'value']
-    total_stats = total_stats.to_dict(orient='records')
+    total_stats = [{'name': k, 'value': _stat_value(v)} for k, v in pf_stats.items()]
     return summary, additional_stats, total_stats
 
 
@@ -385,16 +463,209 @@ def sortino_ratio_cal(returns, risk_free_rate=0.05, target_rate=0.):
     return sortino
 
 
-def backtest_2d(candles: pd.DataFrame, commission: float = 0.0001, slippage: float = 0.0001, init_cash: float = 10000.0,
-                freq: str = '1d', use_first_order: bool = False, benchmark_asset: str = None):
+class _Pending:
     """
-    回测
+    BacktestResult 中尚未计算的报表部分
+    """
+    def __repr__(self):
+        return '<pending>'
+
+
+_PENDING = _Pending()
+
+
+class BacktestResult(dict):
     """
-    # 初始化年化收益率
-    vbt.settings["returns"]["year_freq"] = 252
+    backtest_2d 的回测结果
+
+    dict 子类，键同旧版 dict；保留 Portfolio 对象，各报表部分在首次取值时才计算并缓存，
+    ``in`` / ``len`` / ``keys()`` 不会触发计算。``isinstance(res, dict)``、``dict(res)``、
+    ``json.dumps(res)`` 仍可用（后两者会计算全部部分，等同 ``to_dict()``）；
+    只需要最终指标的参数扫描可直接用 ``stats()``，跳过序列化
+    """
+    def __init__(self, pf: Any, init_cash: float, freq: str = '1d', use_first_order: bool = False,
+                 benchmark_asset: str = None):
+        super().__init__(dict.fromkeys(RESULT_KEYS, _PENDING))
+        self.pf = pf
+        self.init_cash = init_cash
+        self.freq = freq
+        self.use_first_order = use_first_order
+        self.benchmark_asset = benchmark_asset
+        # 各部分共用的中间结果（vbt stats、parse_orders、原始序列等）
+        self._cache = {}
+
+    def _cached(self, key: str, func):
+        if key not in self._cache:
+            self._cache[key] = func()
+        return self._cache[key]
+
+    def stats(self) -> pd.Series:
+        """
+        vectorbt 统计指标
+        """
+        return self._cached('_stats', self.pf.stats)
+
+    def symbol_stats(self) -> pd.DataFrame:
+        """
+        各标的汇总，见 symbol_stats_cal
+        """
+        return self._cached('_symbol_stats', lambda: symbol_stats_cal(self.pf))
+
+    def parsed_orders(self):
+        """
+        parse_orders 的结果：(订单 DataFrame, 交易记录)
+        """
+        return self._cached('_parsed_orders', lambda: parse_orders(self.pf))
+
+    def series(self, key: str) -> pd.Series:
+        """
+        cum_return / benchmark_return / max_drawdown 的原始序列
+        """
+        if key == 'max_drawdown':
+            return self._cached('_drawdown', lambda: drawdown_series(self.pf))
+        cum_ret, benchmark_ret = self._cached('_cum_ret', lambda: cum_ret_series(self.pf, self.use_first_order))
+        if key == 'cum_return':
+            return cum_ret
+        if key == 'benchmark_return':
+            return benchmark_ret
+        raise KeyError(key)
+
+    def frame(self, key: str) -> pd.DataFrame:
+        """
+        各部分的 DataFrame 形式（与 PlotBase.get_* 一致），不经过 list/dict 中转
+        """
+        if key in ('cum_return', 'benchmark_return', 'max_drawdown'):
+            name = 'drawdown' if key == 'max_drawdown' else key
+            frame = self.series(key).to_frame(name)
+            frame.index.name = 'date'
+            return frame
+        if key == 'orders':
+            return self.parsed_orders()[0].copy()
+        return pd.DataFrame(self[key])
+
+    def _set(self, key: str, value):
+        super().__setitem__(key, value)
+
+    def _materialize(self, key: str):
+        if key in ('cum_return', 'benchmark_return'):
+            dates = self.series('cum_return').index.astype(str)
+            self._set('cum_return', _series_records(self.series('cum_return'), dates))
+            self._set('benchmark_return', _series_records(self.series('benchmark_return'), dates))
+        elif key == 'max_drawdown':
+            self._set(key, _series_records(self.series(key)))
+        elif key == 'annual_stats':
+            self._set(key, annual_stats_cal(self.pf.wrapper.index[0].year, self.pf))
+        elif key == 'month_return':
+            self._set(key, monthly_returns_cal(self.pf))
+        elif key in ('orders', 'trades'):
+            orders, trades = self.parsed_orders()
+            self._set('orders', orders.to_dict(orient='records'))
+            self._set('trades', trades)
+        else:
+            orders = self.parsed_orders()[0]
+            summary, additional_stats, total_stats = stats_cal(
+                self.pf,
+                orders.copy(),
+                self.init_cash,
+                freq=self.freq,
+                pf_stats=self.stats()
+            )
+            if self.use_first_order:
+                benchmark_ret = self.series('benchmark_return')
+                if len(benchmark_ret) > 0:
+                    bret = myround((float(benchmark_ret.iloc[-1]) - 1) * 100)
+                    for item in total_stats:
+                        if item['name'] == 'Benchmark Return [%]':
+                            item['value'] = bret
+                            break
+            self._set('summary', summary)
+            self._set('additional_stats', additional_stats)
+            self._set('total_stats', total_stats)
+
+    def __getitem__(self, key: str):
+        value = super().__getitem__(key)
+        if value is _PENDING:
+            self._materialize(key)
+            value = super().__getitem__(key)
+        return value
+
+    def get(self, key: str, default=None):
+        return self[key] if key in self else default
+
+    def __iter__(self):
+        # 覆盖 __iter__ 后 dict(res) / {**res} 走 keys() + __getitem__，不会直接拷贝未计算的占位值
+        return super().__iter__()
+
+    def items(self):
+        return self.to_dict().items()
+
+    def values(self):
+        return self.to_dict().values()
+
+    def copy(self) -> dict:
+        return self.to_dict()
+
+    def pop(self, key: str, *default):
+        if key in self:
+            value = self[key]
+            super().pop(key)
+            return value
+        return super().pop(key, *default)
+
+    def setdefault(self, key: str, default=None):
+        if key in self:
+            return self[key]
+        return super().setdefault(key, default)
+
+    def __eq__(self, other):
+        if isinstance(other, BacktestResult):
+            other = other.to_dict()
+        return self.to_dict() == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __reduce__(self):
+        return dict, (self.to_dict(),)
+
+    def to_dict(self) -> dict:
+        """
+        计算全部报表部分，返回普通 dict（旧版 backtest_2d 的返回值）
+        """
+        return {k: self[k] for k in self.keys()}
+
+
+def _init_returns_settings():
+    # 初始化年化收益率，一年按 252 个交易日（year_freq 需为时间间隔，整数会被当作纳秒）
+    vbt.settings["returns"]["year_freq"] = '252 days'
     vbt.settings["returns"]["defaults"]['risk_free'] = np.power((1 + 0.05), 1 / 252) - 1
 
-    first_year = candles.index[0].year
+
+def _fill_price(candles: pd.DataFrame, sl_stop, tp_stop, intrabar_path: str):
+    """
+    设置了止损 / 止盈时先按 OHLC 模拟K线内成交，返回新的 candles 与成交价（未设置时为 np.inf，即收盘价）
+    """
+    if sl_stop is not None or tp_stop is not None:
+        candles = apply_intrabar_stops(candles, sl_stop=sl_stop, tp_stop=tp_stop, path=intrabar_path)
+    price = candles['price'] if 'price' in candles else np.inf
+    return candles, price
+
+
+def backtest_2d(candles: pd.DataFrame, commission: float = 0.0001, slippage: float = 0.0001, init_cash: float = 10000.0,
+                freq: str = '1d', use_first_order: bool = False, benchmark_asset: str = None,
+                sl_stop=None, tp_stop=None, intrabar_path: str = 'pessimistic'):
+    """
+    回测
+
+    :param sl_stop: 止损比例，标量或每根K线一个值，在K线内按最高 / 最低价成交（见 apply_intrabar_stops）
+    :param tp_stop: 止盈比例
+    :param intrabar_path: 同一根K线同时触及止损与止盈时的路径假设，见 INTRABAR_PATHS
+    :return: BacktestResult，各报表部分在访问时才计算
+    """
+    _init_returns_settings()
+    candles, price = _fill_price(candles, sl_stop, tp_stop, intrabar_path)
     pf = vbt.Portfolio.from_signals(
         close=candles['close'],
         open=candles['open'],
@@ -406,6 +677,7 @@ def backtest_2d(candles: pd.DataFrame, commission: float = 0.0001, slippage: flo
         short_exits=candles['short_exit'],
         size=candles['size'],
         size_type=vbt.portfolio.enums.SizeType.Amount,
+        price=price,
         fees=commission,
         slippage=slippage,
         init_cash=init_cash,
@@ -413,44 +685,137 @@ def backtest_2d(candles: pd.DataFrame, commission: float = 0.0001, slippage: flo
         tp_stop=np.nan
     )
 
-    # 解析订单
-    orders, trades = parse_orders(pf)
-    # # 累计收益 + 基准收益
-    # cum_ret, benchmark = cum_ret_cal(
-    #     pf,
-    #     use_first_order=use_first_order,
-    #     benchmark_asset=benchmark_asset
-    # )
-    # # 最大回撤
-    # drawdown = max_drawdown_cal(pf)
-    # # 年化统计
-    # annual_stats = annual_stats_cal(first_year, pf)
-    # # 月度收益
-    # month_return_heatmap = monthly_returns_cal(pf)
-    # 统计
-    summary, additional_stats, total_stats = stats_cal(
+    return BacktestResult(
         pf,
-        orders.copy(),
         init_cash,
-        freq=freq
+        freq=freq,
+        use_first_order=use_first_order,
+        benchmark_asset=benchmark_asset
     )
-    # if use_first_order:
-    #     bret = myround((benchmark[-1][1] - 1) * 100)
-    #     for item in total_stats:
-    #         if item['name'] == '% Benchmark Return':
-    #             item['value'] = bret
-    #             break
-
-    orders = orders.to_dict(orient='records')
-    return {
-        'cum_return': [],
-        'benchmark_return': [],
-        'max_drawdown': [],
-        'annual_stats': [],
-        'month_return': [],
-        'summary': summary,
-        'additional_stats': additional_stats,
-        'total_stats': total_stats,
-        'orders': orders,
-        'trades': trades
-    }
+
+
+def _signal_frame(signal, index: pd.Index, columns: pd.Index = None) -> pd.DataFrame:
+    if isinstance(signal, pd.DataFrame):
+        return signal
+    signal = np.asarray(signal)
+    if signal.ndim == 1:
+        signal = signal[:, None]
+    return pd.DataFrame(signal, index=index, columns=columns)
+
+
+def backtest_batch(candles: pd.DataFrame, long_entry, long_exit, short_entry=None, short_exit=None, size=None,
+                   commission: float = 0.0001, slippage: float = 0.0001, init_cash: float = 10000.0,
+                   freq: str = '1d', return_pf: bool = False):
+    """
+    批量回测：同一标的上的多组信号（每列一个变体）一次广播模拟，按列向量化计算指标
+
+    :param candles: K线，需包含 open, high, low, close
+    :param long_entry: 多头开仓信号，DataFrame 或 (n, k) 数组，每列一个变体
+    :param long_exit: 多头平仓信号
+    :param short_entry: 空头开仓信号，默认无
+    :param short_exit: 空头平仓信号，默认无
+    :param size: 下单数量，标量、(n,) 或 (n, k)；默认取 candles['size']
+    :param return_pf: 是否同时返回 Portfolio
+    :return: 指标表（index 为变体列名），return_pf 时为 (指标表, Portfolio)
+    """
+    _init_returns_settings()
+    index = candles.index
+    long_entry = _signal_frame(long_entry, index)
+    columns = long_entry.columns
+    long_exit = _signal_frame(long_exit, index, columns)
+    kwargs = {}
+    if short_entry is not None:
+        kwargs['short_entries'] = _signal_frame(short_entry, index, columns)
+    if short_exit is not None:
+        kwargs['short_exits'] = _signal_frame(short_exit, index, columns)
+    if size is None:
+        size = candles['size']
+    if isinstance(size, pd.Series) or np.ndim(size) == 1:
+        size = np.asarray(size)[:, None]
+    elif np.ndim(size) == 2 and not isinstance(size, pd.DataFrame):
+        size = pd.DataFrame(size, index=index, columns=columns)
+
+    pf = vbt.Portfolio.from_signals(
+        close=candles['close'],
+        open=candles['open'],
+        high=candles['high'],
+        low=candles['low'],
+        entries=long_entry,
+        exits=long_exit,
+        size=size,
+        size_type=vbt.portfolio.enums.SizeType.Amount,
+        fees=commission,
+        slippage=slippage,
+        init_cash=init_cash,
+        freq=freq,
+        tp_stop=np.nan,
+        **kwargs
+    )
+
+    trades = pf.trades
+    metrics = pd.DataFrame({
+        'End Value': pf.final_value(),
+        'Total Return [%]': pf.total_return() * 100,
+        'Annualized Return [%]': pf.annualized_return() * 100,
+        'Max Drawdown [%]': pf.max_drawdown().abs() * 100,
+        'Sharpe Ratio': pf.sharpe_ratio(),
+        'Sortino Ratio': pf.sortino_ratio(),
+        'Calmar Ratio': pf.calmar_ratio(),
+        'Total Trades': trades.count(),
+        'Win Rate [%]': trades.win_rate() * 100,
+        'Profit Factor': trades.profit_factor(),
+        'Expectancy': trades.expectancy(),
+    })
+    metrics.index = columns
+    if return_pf:
+        return metrics, pf
+    return metrics
+
+
+def backtest_portfolio(candles: Dict[str, pd.DataFrame], commission: float = 0.0001, slippage: float = 0.0001,
+                       init_cash: float = 10000.0, freq: str = '1d', sl_stop=None, tp_stop=None,
+                       intrabar_path: str = 'pessimistic'):
+    """
+    多标的组合回测：各标的按时间对齐后在同一 Portfolio 中模拟，所有标的共用一个资金池，
+    同一根K线上先平仓释放资金再开仓
+
+    :param candles: {标的: candles}，每个 candles 与 backtest_2d 的输入相同（K线 + 信号列 + size）
+    :param sl_stop: 止损比例，各标的分别按 OHLC 模拟K线内成交，同 backtest_2d
+    :param tp_stop: 止盈比例
+    :param intrabar_path: 同一根K线同时触及止损与止盈时的路径假设
+    :return: BacktestResult，报表为组合层面；订单、交易带 symbol 列，symbol_stats() 为各标的汇总
+    """
+    _init_returns_settings()
+    if sl_stop is not None or tp_stop is not None:
+        candles = {symbol: apply_intrabar_stops(frame, sl_stop=sl_stop, tp_stop=tp_stop, path=intrabar_path)
+                   for symbol, frame in candles.items()}
+    panel = pd.concat(candles, axis=1).sort_index()
+
+    def field(name: str, fill=None) -> pd.DataFrame:
+        frame = panel.xs(name, axis=1, level=1)
+        if fill is not None:
+            frame = frame.fillna(fill).astype(type(fill))
+        return frame
+
+    pf = vbt.Portfolio.from_signals(
+        close=field('close'),
+        open=field('open'),
+        high=field('high'),
+        low=field('low'),
+        entries=field('long_entry', False),
+        exits=field('long_exit', False),
+        short_entries=field('short_entry', False),
+        short_exits=field('short_exit', False),
+        size=field('size', 0.0),
+        size_type=vbt.portfolio.enums.SizeType.Amount,
+        price=field('price').fillna(np.inf) if 'price' in panel.columns.get_level_values(1) else np.inf,
+        fees=commission,
+        slippage=slippage,
+        init_cash=init_cash,
+        freq=freq,
+        tp_stop=np.nan,
+        group_by=True,
+        cash_sharing=True,
+        call_seq='auto'
+    )
+    return BacktestResult(pf, init_cash, freq=freq)
@@ -0,0 +1,211 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+import numpy as np
+import pandas as pd
+
+__all__ = ['LRUCache', 'DiskCache', 'fingerprint', 'sizeof']
+
+
+def fingerprint(*objs: Any) -> str:
+    """
+    计算数据指纹，用于缓存键
+
+    支持 numpy 数组、pandas Series / DataFrame（包含索引，不包含 Series 名称）以及其他可转为字符串的对象
+
+    Args:
+        objs: 需要计算指纹的对象
+
+    Returns:
+        str: 指纹
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for obj in objs:
+        if isinstance(obj, (pd.Series, pd.DataFrame)):
+            if isinstance(obj, pd.DataFrame):
+                h.update(str(obj.columns.tolist()).encode())
+            h.update(pd.util.hash_pandas_object(obj, index=True).values.tobytes())
+        elif isinstance(obj, np.ndarray):
+            h.update(f"{obj.dtype}{obj.shape}".encode())
+            h.update(np.ascontiguousarray(obj).view(np.uint8).tobytes())
+        else:
+            h.update(repr(obj).encode())
+        h.update(b'|')
+    return h.hexdigest()
+
+
+def sizeof(value: Any) -> int:
+    """
+    估算缓存值占用的内存（字节），只统计 numpy / pandas 数据
+    """
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, pd.Index):
+        return int(value.memory_usage())
+    if isinstance(value, (pd.Series, pd.DataFrame)):
+        return int(np.sum(value.memory_usage(index=True)))
+    if isinstance(value, (tuple, list)):
+        return sum(sizeof(v) for v in value)
+    if isinstance(value, dict):
+        return sum(sizeof(v) for v in value.values())
+    return 0
+
+
+class LRUCache:
+    def __init__(self, maxsize: int = 128, maxbytes: int = None):
+        """
+        LRU 缓存，按条目数量和内存占用淘汰最久未使用的数据
+
+        Args:
+            maxsize: 最大条目数量
+            maxbytes: 最大内存占用（字节），None 表示不限制
+        """
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key][0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        nbytes = sizeof(value)
+        with self._lock:
+            if key in self._data:
+                self.nbytes -= self._data.pop(key)[1]
+            if self.maxbytes is not None and nbytes > self.maxbytes:
+                # 单个数据超过上限，不缓存
+                return
+            self._data[key] = (value, nbytes)
+            self.nbytes += nbytes
+            while len(self._data) > self.maxsize or (self.maxbytes is not None and self.nbytes > self.maxbytes):
+                _, (_, size) = self._data.popitem(last=False)
+                self.nbytes -= size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.nbytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class DiskCache:
+    def __init__(self, directory: str, maxbytes: int = 1024 ** 3):
+        """
+        持久化的 LRU 缓存，每个条目为一组 numpy 数组，以 .npz（不压缩、不使用 pickle）保存在 directory 下
+
+        读取时更新文件的修改时间，按修改时间淘汰最久未使用的条目，直到总大小不超过 maxbytes。
+        多个进程可共用同一目录：各进程在创建时扫描一次目录，之后只维护自己写入和读取过的条目，
+        被其他进程淘汰的条目在读取时视为未命中
+
+        Args:
+            directory: 缓存目录
+            maxbytes: 最大磁盘占用（字节）
+        """
+        self.directory = os.path.abspath(directory)
+        self.maxbytes = maxbytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._index: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self._scan()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f'{key}.npz')
+
+    def _scan(self):
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith('.npz'):
+                    continue
+                try:
+                    st = os.stat(os.path.join(root, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, name[:-4], st.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self.nbytes += size
+
+    def get(self, key: str) -> Optional[Dict[str, np.ndarray]]:
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as f:
+                value = {name: f[name] for name in f.files}
+            os.utime(path)
+        except (OSError, ValueError):
+            # 不存在、已被其他进程淘汰或文件不完整
+            with self._lock:
+                self.misses += 1
+                if key in self._index:
+                    self.nbytes -= self._index.pop(key)
+            return None
+        with self._lock:
+            self.hits += 1
+            if key in self._index:
+                self._index.move_to_end(key)
+        return value
+
+    def put(self, key: str, arrays: Dict[str, np.ndarray]) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, path)
+        size = os.path.getsize(path)
+        with self._lock:
+            if key in self._index:
+                self.nbytes -= self._index.pop(key)
+            self._index[key] = size
+            self.nbytes += size
+            while self.nbytes > self.maxbytes and self._index:
+                old, old_size = self._index.popitem(last=False)
+                self.nbytes -= old_size
+                try:
+                    os.remove(self._path(old))
+                except FileNotFoundError:
+                    pass
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in self._index:
+                try:
+                    os.remove(self._path(key))
+                except FileNotFoundError:
+                    pass
+            self._index.clear()
+            self.nbytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __repr__(self):
+        return f"DiskCache({self.directory!r}, entries={len(self)}, nbytes={self.nbytes})"
@@ -0,0 +1,190 @@
+import numba as nb
+import numpy as np
+import pandas as pd
+
+__all__ = [
+    'INTRABAR_PATHS',
+    'STOP_NONE',
+    'STOP_LOSS',
+    'TAKE_PROFIT',
+    'stop_levels_nb',
+    'resolve_stop_nb',
+    'intrabar_stops_nb',
+    'apply_intrabar_stops',
+]
+
+# 同一根K线内同时触及止损与止盈时的价格路径假设：
+# pessimistic 先止损；optimistic 先止盈；ohlc 开 -> 高 -> 低 -> 收；olhc 开 -> 低 -> 高 -> 收；
+# auto 阳线按 olhc、阴线按 ohlc
+INTRABAR_PATHS = ('pessimistic', 'optimistic', 'ohlc', 'olhc', 'auto')
+
+STOP_NONE = 0
+STOP_LOSS = 1
+TAKE_PROFIT = 2
+
+
+@nb.njit(cache=True)
+def _stop_first_nb(path: int, is_long: bool, bar_open: float, bar_close: float) -> bool:
+    """
+    同时触及止损与止盈时，是否先触及止损
+    """
+    if path == 0:
+        return True
+    if path == 1:
+        return False
+    if path == 4:
+        path = 3 if bar_close >= bar_open else 2
+    # ohlc 先到高点：多头先止盈，空头先止损
+    high_first = path == 2
+    return high_first != is_long
+
+
+@nb.njit(cache=True)
+def stop_levels_nb(is_long: bool, entry: float, sl_stop: float, tp_stop: float):
+    """
+    开仓价对应的 (止损价, 止盈价)，比例为 NaN 时对应的价格为无穷远
+    """
+    if is_long:
+        stop_price = entry * (1 - sl_stop) if not np.isnan(sl_stop) else -np.inf
+        target_price = entry * (1 + tp_stop) if not np.isnan(tp_stop) else np.inf
+    else:
+        stop_price = entry * (1 + sl_stop) if not np.isnan(sl_stop) else np.inf
+        target_price = entry * (1 - tp_stop) if not np.isnan(tp_stop) else -np.inf
+    return stop_price, target_price
+
+
+@nb.njit(cache=True)
+def resolve_stop_nb(is_long: bool, bar_open: float, bar_high: float, bar_low: float, bar_close: float,
+                    stop_price: float, target_price: float, path: int):
+    """
+    持仓期间的一根K线内是否触及止损 / 止盈：开盘跳空越过时按开盘价成交，否则按止损 / 止盈价成交
+
+    :return: (STOP_NONE / STOP_LOSS / TAKE_PROFIT, 成交价)
+    """
+    if is_long:
+        if bar_open <= stop_price:
+            return STOP_LOSS, bar_open
+        if bar_open >= target_price:
+            return TAKE_PROFIT, bar_open
+        hit_sl = bar_low <= stop_price
+        hit_tp = bar_high >= target_price
+    else:
+        if bar_open >= stop_price:
+            return STOP_LOSS, bar_open
+        if bar_open <= target_price:
+            return TAKE_PROFIT, bar_open
+        hit_sl = bar_high >= stop_price
+        hit_tp = bar_low <= target_price
+    if hit_sl and (not hit_tp or _stop_first_nb(path, is_long, bar_open, bar_close)):
+        return STOP_LOSS, stop_price
+    if hit_tp:
+        return TAKE_PROFIT, target_price
+    return STOP_NONE, np.nan
+
+
+@nb.njit(cache=True)
+def intrabar_stops_nb(open_, high, low, close, long_entry, long_exit, short_entry, short_exit,
+                      sl_stop, tp_stop, path):
+    """
+    逐K线模拟持仓，按 OHLC 判断持仓期间每根K线内是否触及止损 / 止盈（见 resolve_stop_nb）
+
+    开仓、信号平仓按收盘价成交；止损 / 止盈价为开仓价的 (1 -/+ sl_stop, 1 +/- tp_stop) 倍，
+    触发后当根K线不再开仓。sl_stop / tp_stop 为每根K线的比例（NaN 表示不设置），取开仓时的值。
+    与 BacktestBrokerage 设置 stop_loss / take_profit 时的事件驱动结果一致
+
+    :param path: INTRABAR_PATHS 中的下标
+    :return: (long_entry, long_exit, short_entry, short_exit, price, stop_type)，
+        price 为每根K线的成交价，stop_type 为 0 / STOP_LOSS / TAKE_PROFIT
+    """
+    n = close.shape[0]
+    le = np.zeros(n, dtype=np.bool_)
+    lx = np.zeros(n, dtype=np.bool_)
+    se = np.zeros(n, dtype=np.bool_)
+    sx = np.zeros(n, dtype=np.bool_)
+    price = close.copy()
+    stop_type = np.zeros(n, dtype=np.int8)
+
+    # 0 空仓，1 多头，-1 空头
+    state = 0
+    stop_price = np.nan
+    target_price = np.nan
+    for i in range(n):
+        if state != 0:
+            is_long = state == 1
+            hit, fill = resolve_stop_nb(is_long, open_[i], high[i], low[i], close[i], stop_price, target_price, path)
+            if hit != STOP_NONE:
+                if is_long:
+                    lx[i] = True
+                else:
+                    sx[i] = True
+                price[i] = fill
+                stop_type[i] = hit
+                state = 0
+                continue
+            # 未触及止损 / 止盈，按信号在收盘时平仓
+            if is_long and long_exit[i]:
+                lx[i] = True
+                state = 0
+            elif not is_long and short_exit[i]:
+                sx[i] = True
+                state = 0
+            continue
+
+        if long_entry[i]:
+            state = 1
+            le[i] = True
+            stop_price, target_price = stop_levels_nb(True, close[i], sl_stop[i], tp_stop[i])
+        elif short_entry[i]:
+            state = -1
+            se[i] = True
+            stop_price, target_price = stop_levels_nb(False, close[i], sl_stop[i], tp_stop[i])
+    return le, lx, se, sx, price, stop_type
+
+
+def _per_bar(value, n: int) -> np.ndarray:
+    if value is None:
+        return np.full(n, np.nan)
+    return np.broadcast_to(np.asarray(value, dtype=np.float64), (n,)).copy()
+
+
+def apply_intrabar_stops(candles: pd.DataFrame, sl_stop=None, tp_stop=None,
+                         path: str = 'pessimistic') -> pd.DataFrame:
+    """
+    在整段K线上一次性模拟止损 / 止盈，返回新的 candles（backtest_2d 的输入格式）：
+    信号列改为实际成交的开平仓，增加 price（成交价）与 stop_type（0 无，1 止损，2 止盈）两列
+
+    :param candles: K线与 long_entry / long_exit / short_entry / short_exit 信号列
+    :param sl_stop: 止损比例，标量或每根K线一个值，如 0.05 表示亏损 5% 止损
+    :param tp_stop: 止盈比例
+    :param path: 同一根K线同时触及止损与止盈时的路径假设，见 INTRABAR_PATHS
+    """
+    if path not in INTRABAR_PATHS:
+        raise ValueError(f"path must be one of {list(INTRABAR_PATHS)}")
+    n = len(candles)
+
+    def signal(name):
+        if name not in candles:
+            return np.zeros(n, dtype=np.bool_)
+        return candles[name].fillna(False).to_numpy(dtype=np.bool_)
+
+    le, lx, se, sx, price, stop_type = intrabar_stops_nb(
+        candles['open'].to_numpy(np.float64),
+        candles['high'].to_numpy(np.float64),
+        candles['low'].to_numpy(np.float64),
+        candles['close'].to_numpy(np.float64),
+        signal('long_entry'),
+        signal('long_exit'),
+        signal('short_entry'),
+        signal('short_exit'),
+        _per_bar(sl_stop, n),
+        _per_bar(tp_stop, n),
+        INTRABAR_PATHS.index(path)
+    )
+    candles = candles.copy()
+    candles['long_entry'] = le
+    candles['long_exit'] = lx
+    candles['short_entry'] = se
+    candles['short_exit'] = sx
+    candles['price'] = price
+    candles['stop_type'] = stop_type
+    return candles
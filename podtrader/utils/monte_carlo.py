@@ -0,0 +1,221 @@
+from collections.abc import Mapping
+from typing import Any, Sequence
+
+import numba as nb
+import numpy as np
+import pandas as pd
+
+__all__ = [
+    'resample_indices',
+    'equity_returns',
+    'monte_carlo',
+    'MonteCarloResult',
+]
+
+_METHODS = ('bootstrap', 'shuffle', 'block')
+
+
+@nb.njit(cache=True)
+def shuffle_indices_nb(u: np.ndarray) -> np.ndarray:
+    """
+    Fisher-Yates 洗牌，随机数由外部传入（shape 为 (n_paths, n) 的 [0, 1) 均匀分布），保证结果只取决于种子
+    """
+    n_paths, n = u.shape
+    idx = np.empty((n_paths, n), dtype=np.int32)
+    for p in range(n_paths):
+        for j in range(n):
+            idx[p, j] = j
+        for j in range(n - 1, 0, -1):
+            k = int(u[p, j] * (j + 1))
+            tmp = idx[p, j]
+            idx[p, j] = idx[p, k]
+            idx[p, k] = tmp
+    return idx
+
+
+def resample_indices(n: int, n_paths: int, method: str = 'bootstrap', block_size: int = None,
+                     seed: int = 42) -> np.ndarray:
+    """
+    批量生成重抽样的交易下标，shape 为 (n_paths, n)
+
+    :param n: 交易数量
+    :param n_paths: 路径数量
+    :param method: 'bootstrap' 有放回抽样；'shuffle' 随机打乱顺序；'block' 循环块自助法，保留相邻交易的相关性
+    :param block_size: block 方法的块长度，默认 sqrt(n)
+    :param seed: 随机种子
+    """
+    if method not in _METHODS:
+        raise ValueError(f"method must be one of {list(_METHODS)}")
+    rng = np.random.default_rng(seed)
+    if method == 'bootstrap':
+        return rng.integers(0, n, size=(n_paths, n), dtype=np.int32)
+    if method == 'shuffle':
+        return shuffle_indices_nb(rng.random((n_paths, n)))
+    if block_size is None:
+        block_size = max(int(round(np.sqrt(n))), 1)
+    block_size = min(int(block_size), n)
+    n_blocks = -(-n // block_size)
+    starts = rng.integers(0, n, size=(n_paths, n_blocks, 1), dtype=np.int32)
+    idx = (starts + np.arange(block_size, dtype=np.int32)) % np.int32(n)
+    return np.ascontiguousarray(idx.reshape(n_paths, n_blocks * block_size)[:, :n])
+
+
+@nb.njit(cache=True)
+def path_stats_nb(values: np.ndarray, idx: np.ndarray, init_cash: float, compound: bool, ann_factor: float):
+    """
+    按下标矩阵逐条路径累计资金，计算最终资金、最大回撤 [%] 与夏普比率
+
+    :param values: 每笔交易相对开仓时账户资金的收益率（compound=True，见 equity_returns）或盈亏金额
+    :param idx: resample_indices 生成的下标
+    :return: (final_equity, max_drawdown, sharpe)
+    """
+    n_paths, n = idx.shape
+    final_equity = np.empty(n_paths)
+    max_drawdown = np.empty(n_paths)
+    sharpe = np.full(n_paths, np.nan)
+    for p in range(n_paths):
+        equity = init_cash
+        peak = init_cash
+        mdd = 0.0
+        mean = 0.0
+        m2 = 0.0
+        for j in range(n):
+            v = values[idx[p, j]]
+            if compound:
+                r = v
+                equity = equity * (1.0 + v)
+            else:
+                r = v / equity if equity != 0.0 else np.nan
+                equity = equity + v
+            # Welford 在线均值 / 方差
+            delta = r - mean
+            mean += delta / (j + 1)
+            m2 += delta * (r - mean)
+            if equity > peak:
+                peak = equity
+            if peak > 0.0:
+                dd = 1.0 - equity / peak
+                if dd > mdd:
+                    mdd = dd
+        final_equity[p] = equity
+        max_drawdown[p] = mdd * 100
+        if n > 1:
+            std = np.sqrt(m2 / (n - 1))
+            if std > 0.0:
+                sharpe[p] = mean / std * ann_factor
+    return final_equity, max_drawdown, sharpe
+
+
+class MonteCarloResult:
+    """
+    蒙特卡洛模拟结果，每个数组长度为 n_paths
+
+    final_equity: 最终资金
+    max_drawdown: 最大回撤 [%]
+    sharpe: 按交易收益计算的夏普比率
+    """
+
+    def __init__(self, final_equity: np.ndarray, max_drawdown: np.ndarray, sharpe: np.ndarray, method: str,
+                 init_cash: float):
+        self.final_equity = final_equity
+        self.max_drawdown = max_drawdown
+        self.sharpe = sharpe
+        self.method = method
+        self.init_cash = init_cash
+
+    @property
+    def n_paths(self) -> int:
+        return len(self.final_equity)
+
+    @property
+    def total_return(self) -> np.ndarray:
+        """
+        总收益 [%]
+        """
+        return (self.final_equity / self.init_cash - 1) * 100
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({
+            'final_equity': self.final_equity,
+            'total_return': self.total_return,
+            'max_drawdown': self.max_drawdown,
+            'sharpe': self.sharpe,
+        })
+
+    def quantiles(self, q: Sequence[float] = (0.05, 0.25, 0.5, 0.75, 0.95)) -> pd.DataFrame:
+        """
+        各项指标的分位数，行为分位点，列为指标
+        """
+        frame = self.to_frame()
+        values = np.nanquantile(frame.to_numpy(), q, axis=0)
+        return pd.DataFrame(values, index=pd.Index(q, name='quantile'), columns=frame.columns)
+
+    def __repr__(self):
+        return f"MonteCarloResult(method={self.method!r}, n_paths={self.n_paths})"
+
+
+def _trades_frame(trades: Any) -> pd.DataFrame:
+    """
+    backtest_2d 结果中的 trades（list of dict / DataFrame），或直接传入 backtest_2d 的结果
+    """
+    if isinstance(trades, Mapping) and 'trades' in trades:
+        trades = trades['trades']
+    if not isinstance(trades, pd.DataFrame):
+        trades = pd.DataFrame(list(trades))
+    # 兼容 trades_frame / records_readable 的列名
+    return trades.rename(columns={'PnL': 'pnl', 'Return': 'return', 'Status': 'status',
+                                  'Entry Timestamp': 'entry_index', 'Exit Timestamp': 'exit_index'})
+
+
+def _trades_per_year(trades: pd.DataFrame) -> float:
+    if trades.empty or 'entry_index' not in trades or 'exit_index' not in trades:
+        return np.nan
+    start = pd.to_datetime(trades['entry_index']).min()
+    end = pd.to_datetime(trades['exit_index']).max()
+    years = (end - start) / pd.Timedelta(days=365.25)
+    return len(trades) / years if years > 0 else np.nan
+
+
+def equity_returns(pnl: np.ndarray, init_cash: float) -> np.ndarray:
+    """
+    按原始交易顺序把每笔盈亏换算为占账户资金的收益率：r_i = pnl_i / (init_cash + 之前各笔盈亏之和)
+
+    交易结果中的 return 是相对开仓名义金额的收益率，只在每笔交易满仓时等于账户收益率，
+    因此复利按账户资金的收益率计算，重抽样后资金按该比例随当时的资金缩放
+    """
+    equity = init_cash + np.concatenate(([0.0], np.cumsum(pnl)[:-1]))
+    if (equity <= 0).any():
+        raise ValueError("equity falls to zero or below, use compound=False")
+    return pnl / equity
+
+
+def monte_carlo(trades: Any, n_paths: int = 10000, method: str = 'bootstrap', block_size: int = None,
+                init_cash: float = 10000.0, compound: bool = False, ann_factor: float = None,
+                seed: int = 42) -> MonteCarloResult:
+    """
+    对 backtest_2d 的交易序列做蒙特卡洛重抽样，得到最终资金、最大回撤和夏普比率的分布
+
+    :param trades: backtest_2d 结果中的 trades，或 backtest_2d 的结果本身；未平仓交易不参与抽样
+    :param n_paths: 路径数量
+    :param method: 'bootstrap' / 'shuffle' / 'block'，见 resample_indices
+    :param block_size: block 方法的块长度
+    :param init_cash: 初始资金
+    :param compound: False 时按每笔盈亏（pnl）累加资金；True 时按每笔盈亏占当时账户资金的比例复利（见 equity_returns）
+    :param ann_factor: 夏普比率的年化系数，默认 sqrt(每年交易笔数)，无法由交易时间推算时为 1
+    :param seed: 随机种子，相同种子结果相同
+    """
+    trades = _trades_frame(trades)
+    if 'status' in trades:
+        trades = trades[trades['status'].astype(str) != 'Open']
+    values = trades['pnl'].to_numpy(dtype=np.float64) if 'pnl' in trades else np.empty(0)
+    if len(values) == 0:
+        raise ValueError("no closed trades to resample")
+    if compound:
+        values = equity_returns(values, float(init_cash))
+    if ann_factor is None:
+        per_year = _trades_per_year(trades)
+        ann_factor = float(np.sqrt(per_year)) if np.isfinite(per_year) else 1.0
+
+    idx = resample_indices(len(values), n_paths, method=method, block_size=block_size, seed=seed)
+    final_equity, max_drawdown, sharpe = path_stats_nb(values, idx, float(init_cash), compound, float(ann_factor))
+    return MonteCarloResult(final_equity, max_drawdown, sharpe, method, init_cash)
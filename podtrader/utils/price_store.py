@@ -0,0 +1,206 @@
+import os
+import uuid
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+__all__ = [
+    'SharedPriceStore',
+    'set_worker_price_data',
+    'get_worker_price_data',
+]
+
+PriceDataT = Dict[str, Dict[str, pd.DataFrame]]
+
+# 工作进程中的历史数据，由 set_worker_price_data 设置（进程池的 initializer），同一进程内的所有任务共享
+_WORKER_PRICE_DATA: Optional[PriceDataT] = None
+
+
+class _Entry(NamedTuple):
+    """
+    一个 (标的, 频率) 的数据在共享内存中的布局：[索引 int64 * n][数值列 float64 * n * k]，数值列按列连续存放
+    """
+    name: str
+    n_rows: int
+    columns: List[Any]
+    index_dtype: Optional[str]
+    index_name: Any
+    # 无法共享的部分（非 datetime 索引、非数值列）随句柄一起 pickle：{列名: (位置, 值)}
+    index_values: Optional[np.ndarray]
+    extra: Dict[Any, Tuple[int, np.ndarray]]
+
+    @property
+    def nbytes(self) -> int:
+        return 8 * self.n_rows * (1 + len(self.columns))
+
+
+class SharedPriceStore:
+    """
+    多进程共享的历史数据
+
+    主进程调用 publish 把 {str(investment): {interval: DataFrame}} 中每个 DataFrame 写入一块共享内存
+    （或 directory 下的内存映射文件），得到的 SharedPriceStore 只包含各块的名称与布局，可直接作为进程池的 initargs；
+    工作进程调用 attach 得到零拷贝、只读的 DataFrame，所有进程共用同一份物理内存
+
+    数值列统一以 float64 存放；非数值列（如 TV 数据的 symbol 列）无法共享，随句柄复制到各进程。
+    用完后由主进程调用 unlink（或使用 with 语句）释放
+    """
+
+    def __init__(self, entries: Dict[str, Dict[str, _Entry]], directory: str = None):
+        self.entries = entries
+        self.directory = directory
+        self._handles: List[Any] = []
+        self._frames: Optional[PriceDataT] = None
+        self._owner = False
+
+    @classmethod
+    def publish(cls, price_data: PriceDataT, directory: str = None) -> 'SharedPriceStore':
+        """
+        :param price_data: {str(investment): {interval: DataFrame}}
+        :param directory: 内存映射文件所在目录，None 时使用 multiprocessing.shared_memory
+        """
+        store = cls({}, directory)
+        store._owner = True
+        try:
+            for key, frames in price_data.items():
+                store.entries[key] = {}
+                for interval, frame in frames.items():
+                    store.entries[key][interval] = store._write(frame)
+        except BaseException:
+            store.unlink()
+            raise
+        return store
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, f'{name}.bin')
+
+    def _open(self, entry: _Entry, create: bool) -> np.ndarray:
+        """
+        打开一块数据，返回其上的 float64 视图
+        """
+        size = max(entry.nbytes, 8)
+        if self.directory is None:
+            shm = shared_memory.SharedMemory(name=entry.name, create=create, size=size if create else 0)
+            self._handles.append(shm)
+            return np.ndarray((size // 8,), dtype=np.float64, buffer=shm.buf)
+        buf = np.memmap(self._path(entry.name), dtype=np.float64, mode='w+' if create else 'r', shape=(size // 8,))
+        self._handles.append(buf)
+        return buf
+
+    def _write(self, frame: pd.DataFrame) -> _Entry:
+        n = len(frame)
+        numeric = [c for c in frame.columns if pd.api.types.is_numeric_dtype(frame[c])
+                   and not pd.api.types.is_bool_dtype(frame[c])]
+        extra = {c: (i, frame[c].to_numpy()) for i, c in enumerate(frame.columns) if c not in numeric}
+        index = frame.index
+        shared_index = isinstance(index, pd.DatetimeIndex) and index.tz is None
+        entry = _Entry(
+            name=f'podtrader_{uuid.uuid4().hex[:16]}',
+            n_rows=n,
+            columns=numeric,
+            index_dtype=str(index.dtype) if shared_index else None,
+            index_name=index.name,
+            index_values=None if shared_index else index.to_numpy(),
+            extra=extra,
+        )
+        buf = self._open(entry, create=True)
+        if shared_index:
+            buf[:n].view(np.int64)[:] = index.asi8
+        if numeric:
+            buf[n:n * (1 + len(numeric))].reshape(len(numeric), n)[:] = frame[numeric].to_numpy(np.float64).T
+        if isinstance(buf, np.memmap):
+            buf.flush()
+        return entry
+
+    def _read(self, entry: _Entry) -> pd.DataFrame:
+        n, k = entry.n_rows, len(entry.columns)
+        buf = self._open(entry, create=False)
+        if entry.index_dtype is not None:
+            index = pd.DatetimeIndex(buf[:n].view(np.int64).view(entry.index_dtype), name=entry.index_name)
+        else:
+            index = pd.Index(entry.index_values, name=entry.index_name)
+        values = buf[n:n * (1 + k)].reshape(k, n)
+        values.flags.writeable = False
+        # 转置后为 F 连续，pandas 直接以 values 作为数据块，不复制
+        frame = pd.DataFrame(values.T, index=index, columns=entry.columns, copy=False)
+        for column, (loc, data) in entry.extra.items():
+            frame.insert(loc, column, data)
+        return frame
+
+    def attach(self) -> PriceDataT:
+        """
+        在当前进程中打开全部数据，返回 {str(investment): {interval: DataFrame}}，重复调用返回同一结果
+        """
+        if self._frames is None:
+            self._frames = {key: {interval: self._read(entry) for interval, entry in frames.items()}
+                            for key, frames in self.entries.items()}
+        return self._frames
+
+    def close(self):
+        """
+        关闭当前进程中打开的数据，仍被引用的 DataFrame 保持可用，直到被回收
+        """
+        self._frames = None
+        for handle in self._handles:
+            if isinstance(handle, shared_memory.SharedMemory):
+                try:
+                    handle.close()
+                except BufferError:
+                    pass
+        self._handles = []
+
+    def unlink(self):
+        """
+        释放全部数据，只应由 publish 所在的进程调用
+        """
+        self.close()
+        for frames in self.entries.values():
+            for entry in frames.values():
+                try:
+                    if self.directory is None:
+                        shared_memory.SharedMemory(name=entry.name).unlink()
+                    else:
+                        os.remove(self._path(entry.name))
+                except FileNotFoundError:
+                    pass
+        self.entries = {}
+
+    @property
+    def nbytes(self) -> int:
+        return sum(entry.nbytes for frames in self.entries.values() for entry in frames.values())
+
+    def __getstate__(self):
+        # 只传递名称与布局
+        return {'entries': self.entries, 'directory': self.directory}
+
+    def __setstate__(self, state):
+        self.__init__(state['entries'], state['directory'])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._owner:
+            self.unlink()
+        else:
+            self.close()
+
+    def __repr__(self):
+        n = sum(len(frames) for frames in self.entries.values())
+        return f"SharedPriceStore(frames={n}, nbytes={self.nbytes})"
+
+
+def set_worker_price_data(price_data: Optional[Any]):
+    """
+    设置当前进程的历史数据，可作为进程池的 initializer；传入 SharedPriceStore 时在此打开共享数据
+    """
+    global _WORKER_PRICE_DATA
+    if isinstance(price_data, SharedPriceStore):
+        price_data = price_data.attach()
+    _WORKER_PRICE_DATA = price_data
+
+
+def get_worker_price_data() -> Optional[PriceDataT]:
+    return _WORKER_PRICE_DATA
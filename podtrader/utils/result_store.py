@@ -0,0 +1,255 @@
+import os
+from collections.abc import Mapping
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+
+__all__ = ['save_results', 'load_results', 'StoredResult', 'RESULT_KEYS']
+
+# 回测结果（backtest_2d / PlotBase）的各部分
+RESULT_KEYS = (
+    'cum_return',
+    'benchmark_return',
+    'max_drawdown',
+    'annual_stats',
+    'month_return',
+    'summary',
+    'additional_stats',
+    'total_stats',
+    'orders',
+    'trades',
+)
+
+# 表名 -> 文件名（不含扩展名）
+_TABLES = ('equity', 'orders', 'trades', 'annual_stats', 'month_return', 'summary', 'additional_stats',
+           'total_stats')
+
+_FORMATS = {
+    'parquet': '.parquet',
+    'arrow': '.arrow',
+}
+
+# 没有订单 / 交易时写入的空表结构，列同 btutils.parse_orders
+_ORDER_SCHEMA = {
+    'order_id': 'int64',
+    'signal_index': 'datetime64[ns]',
+    'size': 'float64',
+    'price': 'float64',
+    'fees': 'float64',
+    'side': 'object',
+    'PnL': 'float64',
+    'Return': 'float64',
+    'Direction': 'object',
+}
+_TRADE_SCHEMA = {
+    'size': 'float64',
+    'entry_index': 'datetime64[ns]',
+    'avg_entry_price': 'float64',
+    'entry_fees': 'float64',
+    'exit_index': 'datetime64[ns]',
+    'avg_exit_price': 'float64',
+    'exit_fees': 'float64',
+    'pnl': 'float64',
+    'return': 'float64',
+    'direction': 'object',
+    'status': 'object',
+}
+
+_MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise ImportError("保存/读取列式回测结果需要 pyarrow：pip install pyarrow") from e
+
+
+def _write(frame: pd.DataFrame, path: str, fmt: str):
+    frame = frame.reset_index(drop=True)
+    if fmt == 'parquet':
+        frame.to_parquet(path, index=False)
+    else:
+        # Arrow IPC（Feather v2）
+        frame.to_feather(path)
+
+
+def _read(path: str, fmt: str) -> pd.DataFrame:
+    if fmt == 'parquet':
+        return pd.read_parquet(path)
+    return pd.read_feather(path)
+
+
+def _equity_table(result) -> pd.DataFrame:
+    """
+    累计收益、基准收益、回撤按日期合并为一张表
+    """
+    frames = [result.get_cum_return(), result.get_benchmark_return(), result.get_max_drawdown()]
+    equity = pd.concat(frames, axis=1)
+    equity.index.name = 'date'
+    return equity.reset_index()
+
+
+def _month_table(month_return: Dict[str, Any]) -> pd.DataFrame:
+    """
+    月度收益热力图 -> (year, month, return)，'-' 记为 NaN
+    """
+    heatmap = month_return.get('heatmap', [])
+    years = np.asarray(month_return.get('yAxis', []), dtype=object)
+    if not heatmap:
+        return pd.DataFrame({'year': pd.Series(dtype='int64'), 'month': pd.Series(dtype='int64'),
+                             'return': pd.Series(dtype='float64')})
+    cells = pd.DataFrame(heatmap, columns=['m', 'y', 'value'])
+    return pd.DataFrame({
+        'year': years[cells['y'].to_numpy()].astype('int64'),
+        'month': cells['m'].to_numpy() + 1,
+        'return': pd.to_numeric(cells['value'], errors='coerce'),
+    })
+
+
+def _empty_table(frame: pd.DataFrame, schema: Dict[str, str]) -> pd.DataFrame:
+    """
+    没有记录（也没有列）的 orders / trades 按 schema 写入空表，读取后仍有完整的列
+    """
+    if len(frame.columns) > 0:
+        return frame
+    return pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in schema.items()})
+
+
+def _text_table(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    summary / additional_stats / total_stats 的值是 myround 截断后的字符串（total_stats 缺失值为 None），
+    按文本列原样保存
+    """
+    frame = frame.copy()
+    for column in frame.columns:
+        frame[column] = frame[column].astype(object).where(frame[column].notna(), None)
+    return frame
+
+
+def save_results(result, path: str, fmt: str = 'parquet'):
+    """
+    将回测结果按列式格式保存到目录，每个部分一个文件，列带类型（时间为 datetime64，数值为 float64）；
+    summary / additional_stats / total_stats 为 myround 字符串，按文本保存
+
+    :param result: PlotBase / BacktestEngine，或 parse_bt_result 之后的对象
+    :param path: 目录
+    :param fmt: 'parquet' 或 'arrow'（Arrow IPC / Feather v2）
+    """
+    if fmt not in _FORMATS:
+        raise ValueError(f"fmt must be one of {list(_FORMATS)}")
+    _require_pyarrow()
+    os.makedirs(path, exist_ok=True)
+
+    orders = _empty_table(result.get_orders(), _ORDER_SCHEMA)
+    orders['signal_index'] = pd.to_datetime(orders['signal_index'])
+    trades = _empty_table(result.get_trades(), _TRADE_SCHEMA)
+    for column in ['entry_index', 'exit_index']:
+        trades[column] = pd.to_datetime(trades[column])
+    annual_stats = result.get_annual_stats()
+    for column in annual_stats.columns:
+        annual_stats[column] = pd.to_numeric(annual_stats[column], errors='coerce')
+
+    tables = {
+        'equity': _equity_table(result),
+        'orders': orders,
+        'trades': trades,
+        'annual_stats': annual_stats,
+        'month_return': _month_table(result.get_month_return()),
+        'summary': _text_table(result.get_summary()),
+        'additional_stats': _text_table(result.get_additional_stats()),
+        'total_stats': _text_table(result.get_total_stats()),
+    }
+    ext = _FORMATS[fmt]
+    for name, frame in tables.items():
+        _write(frame, os.path.join(path, name + ext), fmt)
+    return path
+
+
+class StoredResult(Mapping):
+    """
+    save_results 保存的结果，键与 backtest_2d 的结果相同
+
+    frame(key) 直接由列式表得到 PlotBase.get_* 的 DataFrame；list/dict 形式只在按键读取时才生成
+    """
+
+    def __init__(self, tables: Dict[str, pd.DataFrame]):
+        self.tables = tables
+        self._cache = {}
+
+    def _equity(self, column: str) -> pd.Series:
+        equity = self.tables['equity'].set_index('date')
+        return equity[column].dropna()
+
+    def frame(self, key: str) -> pd.DataFrame:
+        if key in ('cum_return', 'benchmark_return', 'max_drawdown'):
+            name = 'drawdown' if key == 'max_drawdown' else key
+            return self._equity(name).to_frame(name)
+        if key in ('orders', 'trades'):
+            frame = self.tables[key].copy()
+            # 时间列还原为字符串，与 parse_orders 的结果相同（NaT 为 'NaT'）
+            for column in ['signal_index', 'entry_index', 'exit_index']:
+                if column in frame:
+                    frame[column] = frame[column].astype(str)
+            return frame
+        if key == 'annual_stats':
+            annual_stats = self.tables['annual_stats']
+            blank = annual_stats.isna()
+            annual_stats = annual_stats.astype(object).where(~blank, '')
+            for column in ['year', 'total_orders', 'total_trades']:
+                if column in annual_stats:
+                    annual_stats[column] = annual_stats[column].astype('int64')
+            return annual_stats
+        if key in ('summary', 'additional_stats', 'total_stats'):
+            return _text_table(self.tables[key])
+        raise KeyError(key)
+
+    def _month_return(self) -> Dict[str, Any]:
+        table = self.tables['month_return']
+        years = np.unique(table['year'].to_numpy())
+        y = np.searchsorted(years, table['year'].to_numpy())
+        values = table['return'].astype(object).where(table['return'].notna(), '-')
+        return {
+            'xAxis': list(_MONTHS),
+            'yAxis': [str(year) for year in years],
+            'heatmap': [list(item) for item in zip((table['month'] - 1).tolist(), y.tolist(), values.tolist())],
+        }
+
+    def __getitem__(self, key: str):
+        if key not in RESULT_KEYS:
+            raise KeyError(key)
+        if key not in self._cache:
+            if key == 'month_return':
+                self._cache[key] = self._month_return()
+            elif key in ('cum_return', 'benchmark_return', 'max_drawdown'):
+                series = self.frame(key).iloc[:, 0]
+                self._cache[key] = [list(item) for item in zip(series.index.astype(str), series.tolist())]
+            else:
+                self._cache[key] = self.frame(key).to_dict(orient='records')
+        return self._cache[key]
+
+    def __contains__(self, key):
+        return key in RESULT_KEYS
+
+    def __iter__(self):
+        return iter(RESULT_KEYS)
+
+    def __len__(self):
+        return len(RESULT_KEYS)
+
+
+def load_results(path: str, fmt: str = None) -> StoredResult:
+    """
+    读取 save_results 保存的结果，可直接传给 PlotBase.parse_bt_result
+
+    :param path: 目录
+    :param fmt: 'parquet' 或 'arrow'，默认按目录中的文件扩展名判断
+    """
+    _require_pyarrow()
+    if fmt is None:
+        fmt = next((k for k, ext in _FORMATS.items() if os.path.exists(os.path.join(path, 'equity' + ext))), None)
+        if fmt is None:
+            raise FileNotFoundError(f"no saved backtest results in {path}")
+    ext = _FORMATS[fmt]
+    return StoredResult({name: _read(os.path.join(path, name + ext), fmt) for name in _TABLES})
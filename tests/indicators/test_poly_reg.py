@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from podtrader.indicators.pyc import poly_reg, zscore
+
+# 重写为 numba 内核之前（sklearn 逐窗口拟合）的 poly_reg / zscore 输出，
+# degree=2, train_dataset=1, test_dataset=5，zscore 另有 cum_days=3, std_days=5
+BASELINE_Y_PRED = [
+    -1.916626724557e-03, -2.003975947014e-03, -2.093818868245e-03, -2.186155488252e-03,
+    -2.280985807035e-03, -1.172251489469e-03, -1.226431079628e-03, -1.282389240621e-03,
+    -1.340125972449e-03, -1.399641275110e-03, -1.190469025489e-03, -1.243777102401e-03,
+    -1.298717687948e-03, -1.355290782129e-03, -1.413496384944e-03, -9.401510221921e-04,
+    -9.841565915392e-04, -1.029551434906e-03, -1.076335552292e-03, -1.124508943699e-03,
+    -1.073150892356e-03, -1.119861123355e-03, -1.167896203613e-03, -1.217256133128e-03,
+    -1.267940911902e-03, -3.557396891208e-03, -3.681693934433e-03, -3.808250282486e-03,
+    -3.937065935367e-03, -4.068140893074e-03,
+]
+BASELINE_ZSCORE = [
+    -6.132585979483e-01, 3.912936698546e-01, 9.070886824806e-01, 7.195939176425e-01,
+    1.202408079135e+00, 4.079126120902e+00, 1.749318513936e+00, -3.974436384408e-01,
+    -9.255530195190e-01, -8.995847668904e-01, -9.122498613427e-01, -3.497311482991e+00,
+    1.024789489717e+00, 7.962763438945e-01, 1.559766704450e+00, 2.344129040770e-02,
+    -4.429092483029e-01, -1.807534075772e+00, -1.762463230242e+00, -1.843758367583e+00,
+    -2.327902458622e+00, 1.753500458203e-01, -1.830404532293e+00, 7.834324241193e-01,
+]
+
+
+def _close():
+    rng = np.random.default_rng(7)
+    return pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.01, 130))),
+                     index=pd.bdate_range('2019-06-03', periods=130), name='close')
+
+
+def test_poly_reg_matches_baseline():
+    close = _close()
+    kwargs = dict(benchmark=None, degree=2, train_dataset=1, test_dataset=5, train_start_time='2019-06-01')
+    y, y_pred = poly_reg(close, **kwargs)
+    # 训练窗口不足 100 根K线时没有预测值
+    assert y_pred.first_valid_index() == pd.Timestamp('2019-10-21')
+    assert y_pred.notna().sum() == len(BASELINE_Y_PRED)
+    np.testing.assert_allclose(y_pred.dropna().to_numpy(), BASELINE_Y_PRED, rtol=1e-9)
+    assert y.index.equals(close.index) and y.notna().sum() == len(BASELINE_Y_PRED)
+    np.testing.assert_allclose(y.dropna().to_numpy(), np.log(close).diff().iloc[-len(BASELINE_Y_PRED):].to_numpy())
+
+    z = zscore(close, cum_days=3, std_days=5, **kwargs)
+    assert z.first_valid_index() == pd.Timestamp('2019-10-29')
+    assert z.notna().sum() == len(BASELINE_ZSCORE)
+    np.testing.assert_allclose(z.dropna().to_numpy(), BASELINE_ZSCORE, rtol=1e-9)
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+from podtrader.indicators.custom.momentum.qqe import QQE
+from podtrader.indicators.nb import qqe_signal_nb, qqe_state_nb, qqe_step_nb
+from podtrader.indicators.pyc import qqe_signal
+
+# 改为 numba 内核之前（talib + pandas）的 qqe_signal 输出中信号所在的位置，默认参数 14 / 5 / 4.238
+BASELINE_LONG = [71, 92, 117, 136, 168, 211, 247, 271]
+BASELINE_SHORT = [85, 99, 126, 148, 180, 231, 268, 277]
+
+
+def _close(n=300):
+    return 100 * np.exp(np.cumsum(np.random.default_rng(0).normal(0, 0.01, n)))
+
+
+def test_qqe_matches_baseline():
+    close = _close()
+    long, short = qqe_signal_nb(close)
+    assert np.flatnonzero(long).tolist() == BASELINE_LONG
+    assert np.flatnonzero(short).tolist() == BASELINE_SHORT
+
+    frame = pd.DataFrame({'close': close}, index=pd.bdate_range('2020-01-01', periods=len(close)))
+    long_pd, short_pd = qqe_signal(frame)
+    assert np.array_equal(long_pd.to_numpy(), long) and np.array_equal(short_pd.to_numpy(), short)
+    res = QQE.run(frame['close'])
+    assert np.array_equal(res.long.to_numpy(), long) and np.array_equal(res.short.to_numpy(), short)
+
+
+def test_qqe_stream_matches_batch():
+    close = _close(1000)
+    long, short = qqe_signal_nb(close)
+    # 逐根K线推进的结果应与批量计算一致
+    state = qqe_state_nb()
+    stream = np.array([qqe_step_nb(state, c) for c in close])
+    assert np.array_equal(stream[:, 0], long)
+    assert np.array_equal(stream[:, 1], short)
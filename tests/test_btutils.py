@@ -0,0 +1,294 @@
+import json
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+import vectorbt as vbt
+
+from podtrader.utils import backtest_2d, backtest_batch, backtest_portfolio
+from podtrader.backtest_engine import PlotBase
+from podtrader.utils import btutils
+
+
+def _candles(n=200, seed=4):
+    close = 100 * np.exp(np.cumsum(np.random.default_rng(seed).normal(0.0005, 0.01, n)))
+    candles = pd.DataFrame({'open': close, 'high': close, 'low': close, 'close': close},
+                           index=pd.bdate_range('2020-01-01', periods=n))
+    for column in ('long_entry', 'long_exit', 'short_entry', 'short_exit'):
+        candles[column] = False
+    candles['size'] = 10.0
+    return candles
+
+
+def _stats(res) -> dict:
+    return {item['name']: item['value'] for item in res['total_stats']}
+
+
+def test_annualised_ratios_use_252_trading_days():
+    candles = _candles()
+    candles.iloc[10, candles.columns.get_loc('long_entry')] = True
+    candles.iloc[150, candles.columns.get_loc('long_exit')] = True
+    res = backtest_2d(candles, commission=0.0, slippage=0.0)
+    stats = _stats(res)
+
+    returns = res.pf.returns().to_numpy()
+    risk_free = 1.05 ** (1 / 252) - 1
+    excess = returns - risk_free
+    sharpe = excess.mean() / excess.std(ddof=1) * np.sqrt(252)
+    downside = np.sqrt(np.mean(np.minimum(returns, 0) ** 2)) * np.sqrt(252)
+    sortino = returns.mean() * 252 / downside
+    annual_return = np.prod(1 + returns) ** (252 / len(returns)) - 1
+    equity = np.cumprod(1 + returns)
+    max_drawdown = np.max(1 - equity / np.maximum.accumulate(equity))
+    assert float(stats['Sharpe Ratio']) == pytest.approx(sharpe, abs=1e-4)
+    assert float(stats['Sortino Ratio']) == pytest.approx(sortino, abs=1e-4)
+    assert float(stats['Calmar Ratio']) == pytest.approx(annual_return / max_drawdown, abs=1e-4)
+    assert abs(sharpe) > 0.1
+
+
+def test_backtest_batch_matches_single_runs():
+    candles = _candles(120, seed=1)
+    rng = np.random.default_rng(2)
+    long_entry = pd.DataFrame(rng.random((120, 3)) < 0.08, index=candles.index, columns=['a', 'b', 'c'])
+    long_exit = pd.DataFrame(rng.random((120, 3)) < 0.08, index=candles.index, columns=['a', 'b', 'c'])
+    metrics, pf = backtest_batch(candles, long_entry, long_exit, commission=0.001, slippage=0.001, return_pf=True)
+    assert list(metrics.index) == ['a', 'b', 'c']
+
+    for column in metrics.index:
+        single = candles.assign(long_entry=long_entry[column], long_exit=long_exit[column])
+        res = backtest_2d(single, commission=0.001, slippage=0.001)
+        assert metrics.loc[column, 'Total Return [%]'] == pytest.approx(res.pf.total_return() * 100)
+        assert metrics.loc[column, 'Total Trades'] == res.pf.trades.count() > 0
+        batch_orders = pf[column].orders.records_readable.drop(columns=['Order Id', 'Column'])
+        single_orders = res.pf.orders.records_readable.drop(columns=['Order Id', 'Column'])
+        pd.testing.assert_frame_equal(batch_orders, single_orders)
+
+
+def test_backtest_portfolio_shares_cash():
+    index = pd.bdate_range('2020-01-01', periods=3)
+    a = _candles(3)
+    a[['open', 'high', 'low', 'close']] = np.array([[10.0] * 4, [12.0] * 4, [12.0] * 4])
+    b = _candles(3)
+    b[['open', 'high', 'low', 'close']] = np.array([[20.0] * 4, [20.0] * 4, [22.0] * 4])
+    a.index = b.index = index
+    # A 用 800 开仓；下一根K线 A 平仓得到 960，B 开仓需要 1000，只有先平仓释放资金才能全部成交
+    a['size'], b['size'] = 80.0, 50.0
+    a.iloc[0, a.columns.get_loc('long_entry')] = True
+    a.iloc[1, a.columns.get_loc('long_exit')] = True
+    b.iloc[1, b.columns.get_loc('long_entry')] = True
+    res = backtest_portfolio({'A': a, 'B': b}, commission=0.0, slippage=0.0, init_cash=1000.0)
+
+    orders = res.pf.orders.records_readable
+    assert orders['Size'].tolist() == [80.0, 80.0, 50.0]
+    np.testing.assert_allclose(res.pf.cash().to_numpy(), [200.0, 160.0, 160.0])
+    np.testing.assert_allclose(res.pf.value().to_numpy(), [1000.0, 1160.0, 160.0 + 50 * 22.0])
+
+
+def _multi_year_result():
+    # 2020-01 至 2022-06：2020 年开仓、2021 年平仓；2021 年再开仓、2022 年平仓
+    candles = _candles(640, seed=7)
+    for row, column in ((30, 'long_entry'), (300, 'long_exit'), (450, 'long_entry'), (560, 'long_exit')):
+        candles.iloc[row, candles.columns.get_loc(column)] = True
+    return candles, backtest_2d(candles, commission=0.0, slippage=0.0)
+
+
+def test_cum_ret_and_drawdown_series_match_returns():
+    candles, res = _multi_year_result()
+    equity = np.cumprod(1 + res.pf.returns().to_numpy())
+
+    cum_ret, benchmark_ret = btutils.cum_ret_series(res.pf)
+    np.testing.assert_allclose(cum_ret.to_numpy(), equity - 1, atol=1e-12)
+    np.testing.assert_allclose(benchmark_ret.to_numpy(), candles['close'] / candles['close'].iloc[0])
+
+    cum_ret, _ = btutils.cum_ret_series(res.pf, use_first_order=True)
+    assert cum_ret.index[0] == candles.index[30]
+
+    drawdown = btutils.drawdown_series(res.pf)
+    np.testing.assert_allclose(drawdown.to_numpy(), (1 - equity / np.maximum.accumulate(equity)) * 100,
+                               atol=1e-10)
+
+
+def test_monthly_returns_table():
+    candles, res = _multi_year_result()
+    returns = res.pf.returns()
+    table = btutils.monthly_returns_cal(res.pf)
+
+    assert table['yAxis'] == ['2020', '2021', '2022']
+    assert len(table['xAxis']) == 12
+    assert len(table['heatmap']) == 3 * 12
+    cells = {(m, y): value for m, y, value in table['heatmap']}
+    for y, year in enumerate((2020, 2021, 2022)):
+        for m in range(12):
+            month = returns[(returns.index.year == year) & (returns.index.month == m + 1)]
+            expected = round(month.sum() * 100, 2)
+            if month.empty or expected == 0.0:
+                assert cells[(m, y)] == '-'
+            else:
+                assert cells[(m, y)] == pytest.approx(expected)
+    # 2022 年 6 月之后没有数据，1 月在第一笔开仓之前
+    assert cells[(11, 2)] == '-'
+    assert cells[(0, 0)] == '-'
+
+
+def test_annual_stats_per_year():
+    candles, res = _multi_year_result()
+    close = candles['close']
+    equity = pd.Series(np.cumprod(1 + res.pf.returns().to_numpy()), index=candles.index)
+    drawdown = 1 - equity / equity.cummax()
+    pnl = {2021: 10 * (close.iloc[300] - close.iloc[30]), 2022: 10 * (close.iloc[560] - close.iloc[450])}
+
+    stats = btutils.annual_stats_cal(2020, res.pf)
+    assert [item['year'] for item in stats] == [2020, 2021, 2022]
+    for item in stats:
+        year = item['year']
+        in_year = candles.index.year == year
+        prev_close = close[candles.index.year < year].iloc[-1] if year > 2020 else close.iloc[0]
+        assert item['max_drawdown'] == pytest.approx(drawdown[in_year].max() * 100, abs=1e-4)
+        assert item['benchmark_return'] == pytest.approx((close[in_year].iloc[-1] / prev_close - 1) * 100, abs=1e-4)
+        if year in pnl:
+            assert item['total_return'] == pytest.approx(pnl[year] / 100, abs=1e-4)
+            assert item['total_trades'] == 1
+        else:
+            assert item['total_return'] == ''
+            assert item['total_trades'] == 0
+    assert [item['total_orders'] for item in stats] == [1, 2, 1]
+    assert stats[0]['position_coverage'] == pytest.approx(
+        np.mean(np.arange(len(candles))[candles.index.year == 2020] >= 30) * 100, abs=1e-4)
+
+    assert [item['year'] for item in btutils.annual_stats_cal(2021, res.pf)] == [2021, 2022]
+
+
+def _counting(monkeypatch, name):
+    calls = []
+    func = getattr(btutils, name)
+
+    def wrapper(*args, **kwargs):
+        calls.append(name)
+        return func(*args, **kwargs)
+
+    monkeypatch.setattr(btutils, name, wrapper)
+    return calls
+
+
+def _traded_result():
+    candles = _candles(60, seed=3)
+    candles.iloc[5, candles.columns.get_loc('long_entry')] = True
+    candles.iloc[40, candles.columns.get_loc('long_exit')] = True
+    return backtest_2d(candles, commission=0.001, slippage=0.001)
+
+
+def test_backtest_result_sections_are_lazy_and_cached(monkeypatch):
+    calls = {name: _counting(monkeypatch, name) for name in
+             ('monthly_returns_cal', 'annual_stats_cal', 'stats_cal', 'parse_orders', 'cum_ret_series')}
+    res = _traded_result()
+    assert 'month_return' in res and len(res) == len(btutils.RESULT_KEYS)
+    assert not any(calls.values())
+
+    month_return = res['month_return']
+    assert res['month_return'] is month_return
+    assert calls['monthly_returns_cal'] == ['monthly_returns_cal']
+    assert not any(calls[name] for name in ('annual_stats_cal', 'stats_cal', 'parse_orders', 'cum_ret_series'))
+
+    # summary / additional_stats / total_stats 一次算出，共用 parse_orders
+    res['summary'], res['total_stats']
+    res['orders'], res['trades']
+    assert calls['stats_cal'] == ['stats_cal']
+    assert calls['parse_orders'] == ['parse_orders']
+    assert not calls['annual_stats_cal'] and not calls['cum_ret_series']
+
+
+def test_backtest_result_is_a_dict():
+    res = _traded_result()
+    assert isinstance(res, dict)
+    expected = res.to_dict()
+    assert type(expected) is dict and list(expected) == list(btutils.RESULT_KEYS)
+    assert dict(res) == {**res} == expected
+    assert res == expected
+    assert json.loads(json.dumps(res)) == json.loads(json.dumps(expected))
+    assert json.loads(json.dumps(_traded_result())) == json.loads(json.dumps(expected))
+    assert res.get('annual_stats') == expected['annual_stats'] and res.get('missing') is None
+
+
+def test_plot_base_reads_frames_from_result():
+    res = _traded_result()
+    frames = []
+    frame = res.frame
+    res.frame = lambda key: frames.append(key) or frame(key)
+    plot = PlotBase().parse_bt_result(res)
+
+    cum_return = plot.get_cum_return()
+    orders = plot.get_orders()
+    plot.get_orders()
+    assert frames == ['cum_return', 'orders']
+    # 直接由原始序列 / DataFrame 生成，不经过 [[日期, 值], ...] / records
+    assert dict.__getitem__(res, 'cum_return') is btutils._PENDING
+    assert dict.__getitem__(res, 'orders') is btutils._PENDING
+
+    reference = PlotBase().parse_bt_result(res.to_dict())
+    pd.testing.assert_frame_equal(cum_return, reference.get_cum_return(), check_freq=False)
+    pd.testing.assert_frame_equal(orders, reference.get_orders(), check_dtype=False)
+
+
+def _parse_orders_loop(pf):
+    # 旧版 parse_orders 的逐笔关联，作为对照
+    orders = pf.orders.records_readable
+    orders = orders[['Order Id', 'Timestamp', 'Size', 'Price', 'Fees', 'Side']]
+    orders.columns = ['order_id', 'signal_index', 'size', 'price', 'fees', 'side']
+    orders[['price', 'fees', 'size']] = orders[['price', 'fees', 'size']].round(4)
+    orders = orders.to_dict(orient='records')
+    trades = pf.trades.records_readable.set_index('Exit Timestamp')
+    if trades['Status'].iloc[-1] == 'Open':
+        orders.append({
+            'order_id': len(orders),
+            'signal_index': trades.index[-1],
+            'size': trades['Size'].iloc[-1],
+            'price': trades['Avg Exit Price'].iloc[-1],
+            'fees': trades['Exit Fees'].iloc[-1],
+            'side': trades['Direction'].iloc[-1]
+        })
+    exit_dict = {}
+    for index, row in trades.iterrows():
+        exit_dict[index] = row.to_dict()
+    orders = pd.DataFrame(orders)
+    for column in ('PnL', 'Return', 'Direction'):
+        orders[column] = orders['signal_index'].apply(
+            lambda x: exit_dict[x].get(column, None) if x in exit_dict else None)
+    orders[['PnL', 'Return']] = orders[['PnL', 'Return']].fillna(0.0)
+    orders['signal_index'] = orders['signal_index'].astype(str)
+    return orders
+
+
+def test_parse_orders_matches_loop():
+    close = pd.Series([10.0, 10.5, 11.0, 11.5, 11.2, 10.8, 10.4, 10.6, 10.9, 11.3, 11.1],
+                      index=pd.bdate_range('2020-01-01', periods=11))
+    # 开多 10 -> 部分平仓 4 -> 反手（平多 6 开空 10） -> 平空 -> 开空 5 持有到最后
+    size = pd.Series(np.nan, index=close.index)
+    size.iloc[[1, 3, 5, 7, 9]] = [10.0, -4.0, -16.0, 10.0, -5.0]
+    pf = vbt.Portfolio.from_orders(close, size, fees=0.001, init_cash=1000.0, freq='1d')
+    trades = pf.trades.records_readable
+    assert trades['Status'].tolist()[-1] == 'Open'
+    assert trades['Direction'].tolist() == ['Long', 'Long', 'Short', 'Short']
+
+    orders, trades_records = btutils.parse_orders(pf)
+    expected = _parse_orders_loop(pf)
+    assert len(orders) == pf.orders.count() + 1
+    pd.testing.assert_frame_equal(orders, expected, check_dtype=False)
+    assert [t['size'] for t in trades_records] == [4.0, 6.0, 10.0, 5.0]
+
+    # 最后一根K线部分平仓：平仓部分与未平仓部分的平仓时间相同，取最后一笔
+    size = pd.Series(np.nan, index=close.index)
+    size.iloc[[1, -1]] = [10.0, -4.0]
+    pf = vbt.Portfolio.from_orders(close, size, fees=0.001, init_cash=1000.0, freq='1d')
+    assert pf.trades.records_readable['Exit Timestamp'].nunique() == 1 < pf.trades.count()
+    pd.testing.assert_frame_equal(btutils.parse_orders(pf)[0], _parse_orders_loop(pf), check_dtype=False)
+
+
+def test_side_without_trades_has_zero_avg_pnl():
+    res = _traded_result()
+    res.stats(), res.parsed_orders()
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', RuntimeWarning)
+        additional_stats = {row['name']: row for row in res['additional_stats']}
+    assert additional_stats['Avg P&L']['short'] == '0.0'
+    assert additional_stats['Avg P&L']['long'] == additional_stats['Avg P&L']['total'] != '0.0'
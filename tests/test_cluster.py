@@ -0,0 +1,80 @@
+import math
+import os
+import signal
+import time
+
+import pytest
+
+from podtrader.optimize import Cluster, spawn_local_workers
+
+
+def _kill_worker_once(marker):
+    # 第一次执行时杀掉所在的工作节点，模拟节点宕机
+    if not os.path.exists(marker):
+        open(marker, 'w').close()
+        os.kill(os.getppid(), signal.SIGKILL)
+        time.sleep(10)
+    return 'done'
+
+
+def _allocate(n_bytes):
+    data = bytearray(n_bytes)
+    time.sleep(2)
+    return len(data)
+
+
+@pytest.fixture
+def cluster():
+    cluster = Cluster(job_timeout=1.0, memory_limit=200 * 2 ** 20, heartbeat_timeout=5.0)
+    workers = spawn_local_workers(cluster.address, n=2, heartbeat_interval=0.5)
+    yield cluster
+    cluster.close()
+    for p in workers:
+        p.join(5)
+        if p.is_alive():
+            p.kill()
+
+
+def test_cluster_map(cluster):
+    results = cluster.map(math.factorial, [(i,) for i in range(20)], wait_timeout=30)
+    assert [r.value for r in results] == [math.factorial(i) for i in range(20)]
+    assert all(r.ok and r.attempts == 1 for r in results)
+    assert sorted(cluster.workers) == ['local-0', 'local-1']
+
+    failed, slow, big = cluster.map(math.factorial, [(-1,)]) + cluster.map(time.sleep, [(10,)]) \
+        + cluster.map(_allocate, [(400 * 2 ** 20,)])
+    assert not failed.ok and failed.error.startswith('ValueError')
+    assert not slow.ok and 'timeout' in slow.error
+    assert not big.ok and 'memory limit' in big.error
+
+
+def test_cluster_retries_lost_worker(cluster, tmp_path):
+    result, = cluster.map(_kill_worker_once, [(str(tmp_path / 'marker'),)], wait_timeout=30)
+    assert result.ok and result.value == 'done'
+    assert result.attempts == 2
+    assert len(cluster.workers) == 1
+
+
+def test_cluster_authkey_on_public_address():
+    from podtrader.optimize.cluster import DEFAULT_AUTHKEY
+
+    with Cluster() as local:
+        assert local.authkey == DEFAULT_AUTHKEY
+    with pytest.raises(ValueError):
+        Cluster(('0.0.0.0', 0), authkey=DEFAULT_AUTHKEY)
+    with Cluster(('0.0.0.0', 0)) as public:
+        assert public.authkey != DEFAULT_AUTHKEY and len(public.authkey) == 32
+
+
+def test_memory_limit_excludes_inherited_memory():
+    # fork 时继承自工作节点的内存不计入任务
+    ballast = b'\x01' * (300 * 2 ** 20)
+    with Cluster(memory_limit=200 * 2 ** 20) as cluster:
+        workers = spawn_local_workers(cluster.address, n=1, heartbeat_interval=0.5)
+        result, = cluster.map(_allocate, [(10 * 2 ** 20,)], wait_timeout=30)
+    for p in workers:
+        p.join(5)
+        if p.is_alive():
+            p.kill()
+    assert result.ok and result.value == 10 * 2 ** 20
+    assert len(ballast) == 300 * 2 ** 20
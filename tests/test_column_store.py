@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+
+from podtrader.providers import download_historical_data
+from podtrader.providers.local import ColumnStore, store as store_module
+
+
+def _bars(start, periods):
+    index = pd.date_range(start, periods=periods, freq='min')
+    close = np.arange(periods, dtype=float) + 100
+    return pd.DataFrame({'open': close, 'high': close + 1, 'low': close - 1, 'close': close,
+                         'volume': np.arange(periods), 'symbol': 'X:AAA'}, index=index)
+
+
+def test_column_store_read_write(tmp_path, monkeypatch):
+    monkeypatch.setattr(store_module, 'SPARSE_STEP', 7)
+    store = ColumnStore(str(tmp_path))
+    bars = _bars('2020-01-01', 100)
+    assert store.write('AAA', '1min', bars.iloc[:60], exchange='X') == 60
+    # 追加，以及与已有数据重叠的写入
+    assert store.write('AAA', '1min', bars.iloc[60:], exchange='X') == 100
+    patch = bars.iloc[10:12].assign(close=0.0)
+    assert store.write('AAA', '1min', patch, exchange='X') == 100
+    expected = bars.drop(columns='symbol')
+    expected.iloc[10:12, expected.columns.get_loc('close')] = 0.0
+
+    out = store.read('AAA', '1min', exchange='X')
+    pd.testing.assert_frame_equal(out, expected.rename_axis('dt'), check_freq=False)
+    assert not out['close'].to_numpy().flags.writeable
+
+    for start, end in [('2020-01-01 00:13', '2020-01-01 00:41'), ('2020-01-01 00:13:30', None),
+                       (None, '2019-12-31'), ('2020-01-01 00:14', '2020-01-01 00:14')]:
+        got = store.read('AAA', '1min', start=start, end=end, exchange='X')
+        pd.testing.assert_frame_equal(got, expected.loc[start:end].rename_axis('dt'), check_freq=False)
+
+    assert store.time_range('AAA', '1min', exchange='X') == (bars.index[0], bars.index[-1])
+    assert store.symbols() == [('X', 'AAA', '1min')]
+
+    monkeypatch.setenv('PODTRADER_DATA_DIR', str(tmp_path))
+    local = download_historical_data('AAA', exchange='X', interval='1min', start='2020-01-01 01:00',
+                                     datasource='LOCAL')
+    assert len(local) == 40 and local['volume'].dtype == np.int64
+
+
+def test_integer_column_widens_instead_of_casting(tmp_path):
+    store = ColumnStore(str(tmp_path))
+    bars = _bars('2020-01-01', 10).drop(columns='symbol')
+    store.write('AAA', '1min', bars.iloc[:5])
+    more = bars.iloc[5:].astype({'volume': float})
+    more.iloc[0, more.columns.get_loc('volume')] = np.nan
+    more.iloc[1, more.columns.get_loc('volume')] = 1.7
+    assert store.write('AAA', '1min', more) == 10
+    volume = store.read('AAA', '1min')['volume']
+    assert volume.dtype == np.float64
+    np.testing.assert_array_equal(volume.to_numpy(), [0, 1, 2, 3, 4, np.nan, 1.7, 7, 8, 9])
+    # 整数值的浮点数据仍写入整数列
+    store.write('BBB', '1min', bars.iloc[:5])
+    store.write('BBB', '1min', bars.iloc[5:].astype({'volume': float}))
+    assert store.read('BBB', '1min')['volume'].dtype == np.int64
+
+
+def test_ingest_appends_after_last_bar(tmp_path, monkeypatch):
+    import podtrader.providers as providers
+
+    index = pd.date_range('2020-01-01', periods=6, freq='D')
+    daily = pd.DataFrame({'close': np.arange(6.0), 'volume': np.arange(6)}, index=index)
+    starts = []
+
+    def download(symbol, sec_type, exchange, interval, start, end, datasource):
+        starts.append(start)
+        # 数据源返回的区间包含已存储的最后一根K线
+        return daily.loc[pd.Timestamp(start or '2020-01-01') - pd.Timedelta(days=1):end]
+
+    monkeypatch.setattr(providers, 'download_historical_data', download)
+    store = ColumnStore(str(tmp_path))
+    assert store.ingest('AAA', end='2020-01-03') == 3
+    rewrites = []
+    monkeypatch.setattr(store, '_write_all', lambda *args: rewrites.append(args))
+    assert store.ingest('AAA') == 6
+    assert starts == [None, '2020-01-04'] and not rewrites
+    pd.testing.assert_frame_equal(store.read('AAA', '1d', exchange='NYSE'), daily.rename_axis('dt'),
+                                  check_freq=False)
+
+
+def test_append_after_interrupted_write(tmp_path):
+    store = ColumnStore(str(tmp_path))
+    bars = _bars('2020-01-01', 10).drop(columns='symbol')
+    store.write('AAA', '1min', bars.iloc[:5], exchange='X')
+    # 上一次追加写入了 time.bin 与 close.bin，但 meta.json 尚未更新
+    path = store.path('AAA', '1min', 'X')
+    with open(f'{path}/time.bin', 'ab') as f:
+        bars.index[5:7].asi8.tofile(f)
+    with open(f'{path}/close.bin', 'ab') as f:
+        np.array([-1.0, -1.0]).tofile(f)
+    assert len(store.read('AAA', '1min', exchange='X')) == 5
+
+    assert store.write('AAA', '1min', bars.iloc[5:], exchange='X') == 10
+    out = store.read('AAA', '1min', exchange='X')
+    pd.testing.assert_frame_equal(out, bars.rename_axis('dt'), check_freq=False)
+    pd.testing.assert_frame_equal(store.read('AAA', '1min', exchange='X', start=bars.index[6]),
+                                  bars.iloc[6:].rename_axis('dt'), check_freq=False)
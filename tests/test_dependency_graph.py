@@ -0,0 +1,35 @@
+from types import SimpleNamespace
+
+import pytest
+
+from podtrader.dependency_graph import DependencyGraph
+
+
+def _ind(uid, outputs=('real',)):
+    return SimpleNamespace(uniqueId=uid, output_names=list(outputs))
+
+
+def _sig(uid, left, right):
+    return SimpleNamespace(uniqueId=uid, left_keys=[left], right_keys=[right])
+
+
+def _rule(uid, *expressions):
+    return SimpleNamespace(uniqueId=uid, transactions=[SimpleNamespace(expression=e) for e in expressions])
+
+
+def test_dependency_graph_prunes_unreferenced_nodes():
+    graph = DependencyGraph(
+        indicators=[_ind('fast'), _ind('slow'), _ind('macd', ('macd', 'signal', 'hist')), _ind('unused')],
+        signals=[_sig('S3', 'S2', '0'), _sig('S1', 'fast.real', 'slow.real'), _sig('S2', 'macd.hist', 'close'),
+                 _sig('S4', 'unused.real', '1')],
+        rules=[_rule('R1', 'S1 & S3'), _rule('R2', 'macd.macd > 0')],
+    )
+    assert [s.uniqueId for s in graph.signals] == ['S1', 'S2', 'S3']
+    assert [i.uniqueId for i in graph.indicators] == ['fast', 'slow', 'macd']
+    assert graph.outputs['macd'] == ['macd', 'hist']
+    assert graph.pruned == {'indicators': ['unused'], 'signals': ['S4'], 'outputs': ['macd.signal']}
+
+
+def test_dependency_graph_cycle():
+    with pytest.raises(ValueError):
+        DependencyGraph([], [_sig('A', 'B', '0'), _sig('B', 'A', '0')], [_rule('R', 'A')])
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from podtrader.backtest_engine import BacktestEngine
+from podtrader.entities import (
+    BacktestConfig,
+    BacktestEnvironment,
+    CascadeTransaction,
+    Indicator,
+    Investment,
+    Parameter,
+    Rule,
+    Signal,
+)
+from podtrader.utils import backtest_2d
+
+INV = Investment(symbol='A', secType='stock', exchange='X')
+
+
+def _config(**kwargs):
+    def sma(uid, period):
+        return Indicator(uniqueId=uid, pkg='talib', func='SMA', interval='1d', investment=INV,
+                         params=[Parameter(key='timeperiod', value=period, type='int')])
+
+    return BacktestConfig(
+        environment=BacktestEnvironment(interval='1d', initialCapital=5000, investment=INV, startTime='2020-01-01',
+                                        **kwargs),
+        indicators=[sma('fast', 3), sma('slow', 8)],
+        signals=[Signal(uniqueId='S1', left='fast.real', func='GT', right='slow.real'),
+                 Signal(uniqueId='S2', left='fast.real', func='LT', right='slow.real')],
+        rules=[Rule(uniqueId='R1', ruleType=4, action=1, transactions=[CascadeTransaction(expression='S1', size=100)]),
+               Rule(uniqueId='R2', ruleType=1, action=2, transactions=[CascadeTransaction(expression='S2', size=100)])],
+    )
+
+
+@pytest.mark.parametrize('stop_loss', [None, 0.015])
+def test_equity_curve_matches_backtest_with_fees(stop_loss):
+    close = 100 * np.exp(np.cumsum(np.random.default_rng(1).normal(0, 0.02, 50)))
+    candles = pd.DataFrame({'open': close, 'high': close * 1.01, 'low': close * 0.99, 'close': close,
+                            'volume': 1e5}, index=pd.bdate_range('2020-01-01', periods=50, name='dt'))
+    engine = BacktestEngine.from_config(_config(commission=0.002, slippage=0.001, stopLoss=stop_loss),
+                                        price_data={str(INV): {'1d': candles}}, calculate_time=candles.index[15])
+    signals = engine.generate_signals()
+    assert signals['long_entry'].sum() >= 2
+
+    curve = engine.get_equity_curve()
+    res = backtest_2d(engine.signal_candles(signals), commission=0.002, slippage=0.001, init_cash=5000)
+    np.testing.assert_allclose(curve['equity'].to_numpy(), res.pf.value().to_numpy())
+    np.testing.assert_allclose(curve['cash'].to_numpy(), res.pf.cash().to_numpy())
+    # 不计费用时权益更高
+    plain = BacktestEngine.from_config(_config(stopLoss=stop_loss), price_data={str(INV): {'1d': candles}},
+                                       calculate_time=candles.index[15])
+    plain.generate_signals()
+    assert plain.get_equity_curve()['equity'].iloc[-1] > curve['equity'].iloc[-1]
@@ -0,0 +1,96 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pandas as pd
+
+from podtrader.providers.ib import HistoricalDataScheduler, RateLimiter, query_duration, split_range
+
+
+class FakeIBClient:
+    """
+    模拟 TWS 的 EClient：请求在后台线程中延迟应答，统计同时未完成的请求数；
+    每个请求先收到一条带 reqId 的提示信息，第 fail_on 个请求返回 162 pacing violation
+    """
+
+    def __init__(self, latency=0.05, fail_on=None):
+        self.wrapper = None
+        self.latency = latency
+        self.fail_on = fail_on
+        self.requests = []
+        self.open = 0
+        self.max_open = 0
+        self._lock = threading.Lock()
+
+    def reqHistoricalData(self, reqId, contract, endDateTime, durationStr, barSizeSetting, whatToShow,
+                          useRTH, formatDate, keepUpToDate, chartOptions):
+        with self._lock:
+            self.requests.append((contract, endDateTime, durationStr))
+            self.open += 1
+            self.max_open = max(self.max_open, self.open)
+            n = len(self.requests)
+        threading.Thread(target=self._reply, args=(reqId, endDateTime, durationStr, n), daemon=True).start()
+
+    def _reply(self, req_id, end, duration, n):
+        time.sleep(self.latency)
+        with self._lock:
+            self.open -= 1
+        self.wrapper.on_error(req_id, 10167, 'Requested market data is not subscribed. '
+                                             'Displaying delayed market data.')
+        if n == self.fail_on:
+            self.wrapper.on_error(req_id, 162, 'Historical Market Data Service error message:API historical data '
+                                               'query cancelled: pacing violation')
+            return
+        value, unit = duration.split()
+        span = pd.Timedelta(seconds=int(value)) if unit == 'S' else pd.Timedelta(days=int(value))
+        end = pd.Timestamp(end)
+        for dt in pd.date_range(end - span, end, freq='1h', inclusive='left'):
+            bar = SimpleNamespace(date=dt.strftime('%Y%m%d %H:%M:%S'), open=1.0, high=2.0, low=0.5,
+                                  close=dt.hour, volume=10)
+            self.wrapper.on_bar(req_id, bar)
+        self.wrapper.on_end(req_id)
+
+
+def test_split_range_and_duration():
+    assert query_duration(pd.Timestamp('2024-01-01'), pd.Timestamp('2024-01-01 06:00')) == '21600 S'
+    assert query_duration(pd.Timestamp('2024-01-01'), pd.Timestamp('2024-03-01')) == '60 D'
+    assert query_duration(pd.Timestamp('2020-01-01'), pd.Timestamp('2024-01-01')) == '5 Y'
+    chunks = split_range('2024-01-01', '2024-03-01', '1h')
+    assert [d for _, d in chunks] == ['30 D', '30 D']
+    assert chunks[0][0] == pd.Timestamp('2024-03-01')
+    assert len(split_range('2000-01-01', '2024-01-01', '1d')) == 1
+
+
+def test_rate_limiter_sliding_window():
+    limiter = RateLimiter(max_requests=3, period=0.3)
+    sent = []
+    for _ in range(3):
+        assert limiter.try_acquire()
+        sent.append(time.monotonic())
+    assert not limiter.try_acquire() and limiter.wait_time() > 0.2
+    for _ in range(4):
+        limiter.acquire()
+        sent.append(time.monotonic())
+    # 任意 0.3 秒内不超过 3 个请求
+    for i in range(len(sent) - 3):
+        assert sent[i + 3] - sent[i] >= 0.3 - 1e-3
+
+
+def test_scheduler_fetches_concurrently_and_merges():
+    client = FakeIBClient(fail_on=3)
+    scheduler = HistoricalDataScheduler(client, max_concurrent=4, retry_delay=0.05)
+    client.wrapper = scheduler
+    t = time.monotonic()
+    res = scheduler.fetch(['A', 'B', 'C'], '1h', '2024-01-01', '2024-03-01')
+    elapsed = time.monotonic() - t
+
+    # 每个标的 2 个区间，另有 1 个被限流后重试
+    assert len(client.requests) == 7
+    assert 1 < client.max_open <= 4
+    assert elapsed < 7 * client.latency
+    expected = pd.date_range('2024-01-01', '2024-03-01', freq='1h', inclusive='left')
+    for symbol in 'ABC':
+        frame = res[symbol]
+        assert frame.index.is_monotonic_increasing and frame.index.is_unique
+        assert frame.index.equals(pd.DatetimeIndex(expected, name='dt'))
+        assert frame['close'].tolist() == list(expected.hour)
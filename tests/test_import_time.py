@@ -0,0 +1,57 @@
+import json
+import subprocess
+import sys
+
+# 导入 podtrader.backtest_engine 的时间预算（秒），vectorbt 等重依赖全部预加载时约 7 秒
+IMPORT_BUDGET = 3.0
+
+# 只应在首次使用时才导入的模块
+LAZY_MODULES = [
+    'vectorbt',
+    'matplotlib',
+    'sklearn',
+    'talib',
+    'yfinance',
+    'websocket',
+    'requests',
+    'podtrader.utils.btutils',
+    'podtrader.providers.yf',
+    'podtrader.providers.tv',
+    'podtrader.indicators.custom.momentum.qqe',
+    'podtrader.signals.custom.compare.gt_signal',
+]
+
+_SCRIPT = """
+import json, sys, time
+t = time.perf_counter()
+import podtrader.backtest_engine
+print(json.dumps({'seconds': time.perf_counter() - t, 'modules': sorted(sys.modules)}))
+"""
+
+
+def _import_in_fresh_interpreter():
+    out = subprocess.run([sys.executable, '-c', _SCRIPT], check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def test_import_time():
+    res = _import_in_fresh_interpreter()
+    loaded = [m for m in LAZY_MODULES if m in res['modules']]
+    assert not loaded, f"eagerly imported: {loaded}"
+    assert res['seconds'] < IMPORT_BUDGET, f"import took {res['seconds']:.2f}s > {IMPORT_BUDGET}s"
+
+
+def test_lazy_lookup():
+    from podtrader.indicators import IndicatorExecutor
+    from podtrader.indicators.custom.momentum.qqe import QQE
+    from podtrader.signals import SignalExecutor
+    from podtrader.signals.custom.compare.gt_signal import GT
+
+    assert IndicatorExecutor('vector-house', 'QQE').F is QQE
+    assert SignalExecutor('a', 'GT', 'b').func is GT
+
+
+if __name__ == '__main__':
+    res = _import_in_fresh_interpreter()
+    print(f"import podtrader.backtest_engine: {res['seconds']:.2f}s")
+    print([m for m in LAZY_MODULES if m in res['modules']])
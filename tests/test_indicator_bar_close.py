@@ -0,0 +1,35 @@
+from types import SimpleNamespace
+
+import pandas as pd
+
+from podtrader.backtest_engine import BacktestEngine
+from podtrader.entities import Investment
+
+
+class _CountingIndicator:
+    def __init__(self, temporary):
+        self.uniqueId = 'ind'
+        self.investment = Investment(symbol='A')
+        self.interval = '1d'
+        self.temporary = temporary
+        self.calls = 0
+
+    def run(self, candles):
+        self.calls += 1
+        return SimpleNamespace(n=len(candles))
+
+
+def test_non_temporary_indicator_runs_on_bar_close():
+    engine = BacktestEngine(investment=Investment(symbol='A'))
+    symbol = str(Investment(symbol='A'))
+    fixed, temporary = _CountingIndicator(False), _CountingIndicator(True)
+    for day in pd.date_range('2020-01-01', periods=3):
+        # 每根日K线收到 5 个 tick
+        for i in range(5):
+            bar = {'dt': day, 'open': 1.0, 'high': 1.0 + i, 'low': 1.0, 'close': 1.0, 'volume': 1.0}
+            engine._candle_manager.put(symbol, '1d', bar, replace=False)
+            engine._run_indicator(fixed)
+            engine._run_indicator(temporary)
+    # 少于 2 根K线时不计算
+    assert fixed.calls == 2
+    assert temporary.calls == 10
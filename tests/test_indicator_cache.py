@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+
+from podtrader.backtest_engine import BacktestEngine
+from podtrader.entities import (
+    BacktestConfig,
+    BacktestEnvironment,
+    CascadeTransaction,
+    Indicator,
+    Investment,
+    Parameter,
+    Rule,
+    Signal,
+)
+from podtrader.indicators import IndicatorExecutor
+from podtrader.utils import DiskCache
+
+
+def test_disk_cache_lru(tmp_path):
+    cache = DiskCache(str(tmp_path), maxbytes=3000)
+    for i in range(3):
+        cache.put(f'k{i}', {'a': np.arange(100, dtype=np.float64)})
+    assert len(cache) == 2 and 'k0' not in cache
+    assert cache.get('k0') is None
+    np.testing.assert_array_equal(cache.get('k1')['a'], np.arange(100))
+    # k1 刚被读取，下一次淘汰的是 k2
+    cache.put('k3', {'a': np.zeros(100)})
+    assert 'k1' in cache and 'k2' not in cache
+    # 新进程打开同一目录时保留已有条目
+    assert sorted(DiskCache(str(tmp_path), maxbytes=3000)._index) == sorted(cache._index)
+
+
+def _candles(n=50):
+    index = pd.date_range('2020-01-01', periods=n, name='dt')
+    close = pd.Series(np.linspace(1, 2, n), index=index)
+    return pd.DataFrame({'open': close, 'high': close, 'low': close, 'close': close, 'volume': 1.0})
+
+
+def test_indicator_cache(tmp_path):
+    candles = _candles()
+    cache = DiskCache(str(tmp_path))
+    plain = IndicatorExecutor('talib', 'EMA', uniqueId='ema', params={'timeperiod': 5})
+    for _ in range(2):
+        ind = IndicatorExecutor('talib', 'EMA', uniqueId='ema', params={'timeperiod': 5}, cache=cache)
+        ind.precompute(candles, window=20)
+        # 以某根K线结束、最多 20 根K线的窗口直接取出，与在该窗口上计算完全相同
+        for end in (10, 30, 50):
+            window = candles.iloc[max(end - 20, 0):end]
+            pd.testing.assert_frame_equal(ind.run(window), plain.run(window))
+    assert (cache.hits, cache.misses, len(cache)) == (1, 1, 1)
+
+    # 窗口长度不同或不在历史数据中的K线（如正在形成的K线）重新计算
+    longer = candles.iloc[:30]
+    pd.testing.assert_frame_equal(ind.run(longer), plain.run(longer))
+    other = candles.iloc[:20].copy()
+    other.iloc[-1, 0] += 1
+    pd.testing.assert_frame_equal(ind.run(other), plain.run(other))
+
+    # 补充数据、修改参数或窗口后为新的缓存条目
+    ind.precompute(candles.iloc[:-1], window=20)
+    ind.precompute(candles, window=30)
+    IndicatorExecutor('talib', 'EMA', params={'timeperiod': 6}, cache=cache).precompute(candles, window=20)
+    assert len(cache) == 4
+
+
+def test_engine_indicator_cache(tmp_path):
+    inv = Investment(symbol='A')
+    close = 100 * np.exp(np.cumsum(np.random.default_rng(2).normal(0, 0.02, 60)))
+    index = pd.bdate_range('2020-01-01', periods=60, name='dt')
+    candles = pd.DataFrame({'open': close, 'high': close, 'low': close, 'close': close, 'volume': 1.0}, index=index)
+
+    def sma(uid, period):
+        return Indicator(uniqueId=uid, pkg='talib', func='SMA', interval='1d', investment=inv,
+                         params=[Parameter(key='timeperiod', value=period, type='int')])
+
+    config = BacktestConfig(
+        environment=BacktestEnvironment(investment=inv, startTime='2020-01-01', initialCapital=10000),
+        indicators=[sma('fast', 3), sma('slow', 8)],
+        signals=[Signal(uniqueId='up', left='fast.real', func='GT', right='slow.real'),
+                 Signal(uniqueId='down', left='fast.real', func='LT', right='slow.real')],
+        rules=[Rule(uniqueId='open', ruleType=4, action=1, transactions=[CascadeTransaction(expression='up')]),
+               Rule(uniqueId='close', ruleType=1, action=2, transactions=[CascadeTransaction(expression='down')])],
+    )
+    price_data = {str(inv): {'1d': candles}}
+    expected = BacktestEngine.from_config(config, price_data=price_data).generate_signals()
+    cache = DiskCache(str(tmp_path))
+    for _ in range(2):
+        engine = BacktestEngine.from_config(config, price_data=price_data, indicator_cache=cache)
+        pd.testing.assert_frame_equal(engine.generate_signals(), expected)
+    # 每个指标一个条目，第二次回测全部命中
+    assert (len(cache), cache.misses, cache.hits) == (2, 2, 2)
+
+
+def test_engine_indicator_cache_matches_windows(tmp_path):
+    # K线多于 CandleQueue 保留的 300 根时，递推指标的结果取决于窗口，缓存不应改变信号
+    inv = Investment(symbol='A')
+    close = 100 * np.exp(np.cumsum(np.random.default_rng(5).normal(0, 0.01, 360)))
+    index = pd.bdate_range('2019-01-01', periods=360, name='dt')
+    candles = pd.DataFrame({'open': close, 'high': close, 'low': close, 'close': close, 'volume': 1.0}, index=index)
+
+    def ema(uid, period):
+        return Indicator(uniqueId=uid, pkg='talib', func='EMA', interval='1d', investment=inv,
+                         params=[Parameter(key='timeperiod', value=period, type='int')])
+
+    config = BacktestConfig(
+        environment=BacktestEnvironment(investment=inv, startTime='2019-01-01', initialCapital=10000),
+        indicators=[ema('fast', 20), ema('slow', 200)],
+        signals=[Signal(uniqueId='up', left='fast.real', func='GT', right='slow.real'),
+                 Signal(uniqueId='down', left='fast.real', func='LT', right='slow.real')],
+        rules=[Rule(uniqueId='open', ruleType=4, action=1, transactions=[CascadeTransaction(expression='up')]),
+               Rule(uniqueId='close', ruleType=1, action=2, transactions=[CascadeTransaction(expression='down')])],
+    )
+    kwargs = dict(price_data={str(inv): {'1d': candles}}, calculate_time=index[300])
+    engine = BacktestEngine.from_config(config, **kwargs)
+    expected = engine.generate_signals()
+    assert not expected.empty
+    cached = BacktestEngine.from_config(config, indicator_cache=str(tmp_path), **kwargs)
+    pd.testing.assert_frame_equal(cached.generate_signals(), expected)
+    # 最后一根K线的指标结果一致
+    for uid in ('fast', 'slow'):
+        pd.testing.assert_frame_equal(cached._indicator_results[uid][1], engine._indicator_results[uid][1])
@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from podtrader.backtest_engine import BacktestEngine
+from podtrader.brokerage.backtest_brokerage import BacktestBrokerage
+from podtrader.entities import (
+    BacktestConfig,
+    BacktestEnvironment,
+    CascadeTransaction,
+    Indicator,
+    Investment,
+    Parameter,
+    Rule,
+    Signal,
+)
+from podtrader.enums import RuleType, TradeAction
+from podtrader.events import SignalEvent
+from podtrader.utils import apply_intrabar_stops
+
+
+def _candles(rows, long_entry=(), short_entry=()):
+    frame = pd.DataFrame(rows, columns=['open', 'high', 'low', 'close'],
+                         index=pd.bdate_range('2020-01-01', periods=len(rows)), dtype=float)
+    frame['long_entry'] = np.isin(np.arange(len(rows)), long_entry)
+    frame['long_exit'] = False
+    frame['short_entry'] = np.isin(np.arange(len(rows)), short_entry)
+    frame['short_exit'] = False
+    frame['size'] = 10.0
+    return frame
+
+
+@pytest.mark.parametrize('path, stop_type, price', [
+    ('pessimistic', 1, 95.0),
+    ('optimistic', 2, 110.0),
+    # 开 -> 高 -> 低：多头先触及止盈
+    ('ohlc', 2, 110.0),
+    ('olhc', 1, 95.0),
+    # 阴线按 ohlc
+    ('auto', 2, 110.0),
+])
+def test_intrabar_path(path, stop_type, price):
+    candles = _candles([[100, 100, 100, 100], [100, 112, 94, 98], [98, 98, 98, 98]], long_entry=[0])
+    res = apply_intrabar_stops(candles, sl_stop=0.05, tp_stop=0.1, path=path)
+    assert res['long_exit'].tolist() == [False, True, False]
+    assert res['stop_type'].iloc[1] == stop_type
+    assert res['price'].iloc[1] == pytest.approx(price)
+
+
+def test_gaps_fill_at_open_and_signals_are_cleaned():
+    candles = _candles([[100, 100, 100, 100], [90, 92, 88, 91], [91, 91, 91, 91], [91, 91, 91, 91],
+                        [94, 101, 93, 100]], long_entry=[0, 1, 3], short_entry=[2])
+    res = apply_intrabar_stops(candles, sl_stop=0.05)
+    # 跳空低开越过止损价，按开盘价止损；止损当根不再开仓
+    assert res['price'].iloc[1] == 90
+    assert res['long_entry'].tolist() == [True, False, False, False, False]
+    # 空头止损价 91 * 1.05，第 4 根K线最高价 101 触及
+    assert res['short_entry'].iloc[2] and res['short_exit'].iloc[4]
+    assert res['price'].iloc[4] == pytest.approx(91 * 1.05)
+
+
+def test_brokerage_stop_loss_closes_position():
+    broker = BacktestBrokerage(init_cash=1000.0)
+    event = SignalEvent()
+    event.rule_type, event.action, event.price, event.size, event.size_type = \
+        RuleType.Open, TradeAction.BUY, 10.0, 50, 0
+    broker.place_order(event)
+    event.rule_type, event.action, event.price, event.size = RuleType.StopLoss, TradeAction.SELL, 9.0, 20
+    res = broker.place_order(event)
+    assert res['position'] == 30
+    assert res['cash'] == pytest.approx(1000 - 500 + 180)
+
+
+def _stop_engine(candles, **kwargs):
+    inv = Investment(symbol='A', secType='stock', exchange='X')
+    config = BacktestConfig(
+        environment=BacktestEnvironment(interval='1d', initialCapital=10000, investment=inv,
+                                        startTime='2020-01-01', stopLoss=0.05, **kwargs),
+        indicators=[Indicator(uniqueId='sma', pkg='talib', func='SMA', interval='1d', investment=inv,
+                              params=[Parameter(key='timeperiod', value=2, type='int')])],
+        signals=[Signal(uniqueId='S1', left='sma.real', func='GT', right='0')],
+        rules=[Rule(uniqueId='R1', ruleType=4, action=1, transactions=[CascadeTransaction(expression='S1', size=10)])],
+    )
+    ohlc = candles.assign(volume=1e5)
+    ohlc.index.name = 'dt'
+    return BacktestEngine.from_config(config, price_data={str(inv): {'1d': ohlc}}, calculate_time=candles.index[3])
+
+
+def test_engine_reenters_after_stop():
+    rows = [[100, 100, 100, 100]] * 5 + [[100, 100, 90, 92], [92, 93, 91, 92], [92, 93, 91, 92]]
+    candles = _candles(rows)[['open', 'high', 'low', 'close']]
+    engine = _stop_engine(candles)
+    signals = engine.run()
+
+    # 第 4 根K线开仓，第 6 根K线按止损价 95 平仓，当根不再开仓，下一根K线重新开仓
+    index = candles.index
+    assert signals.index.tolist() == [index[3], index[5], index[6]]
+    assert signals['long_entry'].tolist() == [True, False, True]
+    assert signals['long_exit'].tolist() == [False, True, False]
+    assert signals['price'].tolist() == pytest.approx([100, 95, 92])
+    brokerage = engine._backtest_brokerage
+    assert brokerage.position == 10
+    assert brokerage.cash == pytest.approx(10000 - 1000 + 950 - 920)
+
+    # 向量化回测按止损价成交
+    trades = engine.get_trades()
+    assert len(trades) == 2
+    assert engine.get_orders()['price'].tolist()[:3] == pytest.approx([100, 95, 92])
+
+    # 不做向量化回测时，盯市资金曲线同样在止损K线平仓
+    engine = _stop_engine(candles)
+    engine.run(backtest=False)
+    curve = engine.get_equity_curve()
+    assert curve['position'].tolist() == [10, 10, 0, 10, 10]
+    assert curve['equity'].iloc[-1] == pytest.approx(10000 - 50)
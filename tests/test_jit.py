@@ -0,0 +1,40 @@
+import json
+import subprocess
+import sys
+
+from podtrader.jit import _iter_dispatchers, _standard_kernels, warmup
+
+# 新进程中设置缓存目录后预编译，避免当前进程已编译的内核与缓存目录互相影响
+_SCRIPT = """
+import json, os, sys
+from podtrader.jit import set_cache_dir, warmup
+path = set_cache_dir(sys.argv[1])
+report = warmup()
+print(json.dumps({'path': path, 'env': os.environ.get('NUMBA_CACHE_DIR'), 'report': report}))
+"""
+
+
+def test_warmup_compiles_every_kernel():
+    report = warmup()
+    assert {item['source'] for item in report} <= {'compiled', 'cache', 'memory'}
+    cold = [d.py_func.__qualname__ for d in _iter_dispatchers() if not d.overloads]
+    assert not cold
+
+
+def test_warmup_report_and_cache_dir(tmp_path):
+    out = subprocess.run([sys.executable, '-c', _SCRIPT, str(tmp_path)], capture_output=True, text=True, check=True)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    assert result['path'] == result['env'] == str(tmp_path)
+    assert list(tmp_path.rglob('*.nbi')) and list(tmp_path.rglob('*.nbc'))
+
+    report = result['report']
+    # 每个 (内核, 签名) 一行，KERNEL_MODULES 中的每个内核至少一行
+    assert len(report) == len(_standard_kernels())
+    assert len({(item['kernel'], item['signature']) for item in report}) == len(report)
+    kernels = {item['kernel'].split('.')[-1] for item in report}
+    assert kernels == {d.py_func.__name__ for d in _iter_dispatchers()}
+    assert all(item['seconds'] >= 0 for item in report)
+    # 新的缓存目录中没有可加载的缓存；被其他内核调用或用于构造参数的内核已在当前进程编译
+    assert {item['source'] for item in report} <= {'compiled', 'memory'}
+    cached = {p.name.split('-')[0].split('.')[-1] for p in tmp_path.rglob('*.nbi')}
+    assert kernels <= cached
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from podtrader.backtest_engine import BacktestEngine
+from podtrader.entities import (
+    BacktestConfig,
+    BacktestEnvironment,
+    CascadeTransaction,
+    Indicator,
+    Investment,
+    Parameter,
+    Rule,
+    Signal,
+)
+from podtrader.live_engine import LiveEngine
+from podtrader.providers import SimulatedMarketProvider
+
+INV = Investment(symbol='A', secType='stock', exchange='X')
+
+
+def _config(stop_loss=None):
+    def sma(uid, period):
+        return Indicator(uniqueId=uid, pkg='talib', func='SMA', interval='1d', investment=INV,
+                         params=[Parameter(key='timeperiod', value=period, type='int')])
+
+    return BacktestConfig(
+        environment=BacktestEnvironment(interval='1d', initialCapital=5000, investment=INV, startTime='2020-01-01',
+                                        stopLoss=stop_loss),
+        indicators=[sma('fast', 3), sma('slow', 8)],
+        signals=[Signal(uniqueId='S1', left='fast.real', func='GT', right='slow.real'),
+                 Signal(uniqueId='S2', left='fast.real', func='LT', right='slow.real')],
+        rules=[Rule(uniqueId='R1', ruleType=4, action=1, transactions=[CascadeTransaction(expression='S1', size=10)]),
+               Rule(uniqueId='R2', ruleType=1, action=2, transactions=[CascadeTransaction(expression='S2', size=10)])],
+    )
+
+
+def _candles(n=50):
+    close = 100 * np.exp(np.cumsum(np.random.default_rng(1).normal(0, 0.02, n)))
+    index = pd.bdate_range('2020-01-01', periods=n, name='dt')
+    return pd.DataFrame({'open': close, 'high': close * 1.01, 'low': close * 0.99, 'close': close,
+                         'volume': 1e5}, index=index)
+
+
+@pytest.mark.parametrize('stop_loss', [None, 0.015])
+def test_live_engine_matches_backtest(stop_loss):
+    candles, symbol = _candles(), str(INV)
+    start = candles.index[15]
+    engine = BacktestEngine.from_config(_config(stop_loss), price_data={symbol: {'1d': candles}},
+                                        calculate_time=start)
+    expected = engine.generate_signals()
+    if stop_loss is not None:
+        # 止损改变了交易
+        plain = BacktestEngine.from_config(_config(), price_data={symbol: {'1d': candles}}, calculate_time=start)
+        assert not expected.equals(plain.generate_signals())
+
+    provider = SimulatedMarketProvider(candles.loc[start:], symbol=symbol)
+    live = LiveEngine(_config(stop_loss), provider, history={symbol: {'1d': candles.loc[:start].iloc[:-1]}})
+    live.start()
+    assert not expected.empty
+    pd.testing.assert_frame_equal(live.broker.brokerage.get_signals(), expected)
+    assert live.n_ticks == len(candles.loc[start:])
+    assert live.latency_stats()['count'] == len(live.latencies) > 0
+
+
+def test_ticks_are_aggregated_into_bars():
+    live = LiveEngine(_config(), SimulatedMarketProvider({}))
+    ticks = pd.DataFrame({'open': [1.0, 2.0, 3.0], 'high': [1.0, 5.0, 3.0], 'low': [1.0, 0.5, 3.0],
+                          'close': [1.0, 2.0, 3.0], 'volume': [1.0, 1.0, 1.0]},
+                         index=pd.to_datetime(['2020-01-01 10:00', '2020-01-01 15:00', '2020-01-02 10:00']))
+    live.provider = SimulatedMarketProvider(ticks, symbol=str(INV))
+    live.start(max_ticks=2)
+    bars = live._candle_manager.get_by_symbol_and_interval(str(INV), '1d', return_type='df')
+    assert bars.to_dict('records') == [{'open': 1.0, 'high': 5.0, 'low': 0.5, 'close': 2.0, 'volume': 2.0}]
+    # 新的一天开始新的K线
+    live.provider = SimulatedMarketProvider(ticks.iloc[2:], symbol=str(INV))
+    live.start()
+    bars = live._candle_manager.get_by_symbol_and_interval(str(INV), '1d', return_type='df')
+    assert bars['volume'].tolist() == [2.0, 1.0]
+    assert list(bars.index) == list(pd.to_datetime(['2020-01-01', '2020-01-02']))
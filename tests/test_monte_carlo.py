@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from podtrader.utils import equity_returns, monte_carlo, resample_indices
+
+
+def _trades(n=200):
+    rng = np.random.default_rng(0)
+    entry = pd.date_range('2020-01-01', periods=n, freq='3D')
+    return pd.DataFrame({
+        'entry_index': entry.astype(str),
+        'exit_index': (entry + pd.Timedelta('2D')).astype(str),
+        'pnl': rng.normal(10, 100, n),
+        'return': rng.normal(0.001, 0.01, n),
+        'status': 'Closed',
+    })
+
+
+def test_resample_indices():
+    idx = resample_indices(50, 100, 'shuffle', seed=1)
+    assert (np.sort(idx, axis=1) == np.arange(50)).all()
+    assert (idx == resample_indices(50, 100, 'shuffle', seed=1)).all()
+    block = resample_indices(50, 100, 'block', block_size=5)
+    # 块内下标连续（循环）
+    assert ((np.diff(block.reshape(100, 10, 5), axis=2) % 50) == 1).all()
+
+
+def test_monte_carlo():
+    trades = _trades()
+    res = monte_carlo(trades.to_dict(orient='records'), n_paths=500, method='shuffle')
+    # 打乱顺序不改变最终资金，只改变回撤路径
+    assert np.allclose(res.final_equity, 10000 + trades['pnl'].sum())
+    assert res.max_drawdown.min() < res.max_drawdown.max()
+
+    # 按账户资金复利：原始顺序下复利的最终资金等于盈亏之和，且与顺序无关
+    res = monte_carlo(trades, n_paths=500, method='shuffle', compound=True)
+    assert np.allclose(res.final_equity, 10000 + trades['pnl'].sum())
+
+    res = monte_carlo(trades, n_paths=500, method='block', compound=True, ann_factor=1.0)
+    idx = resample_indices(len(trades), 500, 'block')
+    returns = equity_returns(trades['pnl'].to_numpy(), 10000)
+    equity = 10000 * np.cumprod(1 + returns[idx[0]])
+    peak = np.maximum.accumulate(np.r_[10000, equity])[1:]
+    assert np.isclose(res.final_equity[0], equity[-1])
+    assert np.isclose(res.max_drawdown[0], (1 - equity / peak).max() * 100)
+    assert list(res.quantiles().columns) == ['final_equity', 'total_return', 'max_drawdown', 'sharpe']
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+
+from podtrader.entities import (
+    BacktestConfig,
+    BacktestEnvironment,
+    CascadeTransaction,
+    Indicator,
+    Investment,
+    Parameter,
+    Rule,
+    Signal,
+)
+from podtrader.portfolio_engine import PortfolioEngine, config_for_investment
+from podtrader.utils import backtest_portfolio
+
+
+def _candles(close, entry, exit_, size=10.0):
+    index = pd.bdate_range('2020-01-01', periods=len(close))
+    close = np.asarray(close, dtype=float)
+    frame = pd.DataFrame({'open': close, 'high': close, 'low': close, 'close': close}, index=index)
+    frame['long_entry'] = index.isin(index[entry])
+    frame['long_exit'] = index.isin(index[exit_])
+    frame['short_entry'] = False
+    frame['short_exit'] = False
+    frame['size'] = size
+    return frame
+
+
+def test_config_for_investment():
+    template, spy = Investment(symbol='TEMPLATE'), Investment(symbol='SPY')
+    config = BacktestConfig(
+        environment=BacktestEnvironment(investment=template),
+        indicators=[Indicator(uniqueId='a', investment=template), Indicator(uniqueId='b'),
+                    Indicator(uniqueId='mkt', investment=spy)],
+    )
+    new = config_for_investment(config, Investment(symbol='AAPL'))
+    assert new.environment.investment.symbol == 'AAPL'
+    assert [ind.investment.symbol for ind in new.indicators] == ['AAPL', 'AAPL', 'SPY']
+    assert config.environment.investment.symbol == 'TEMPLATE'
+
+
+def test_backtest_portfolio_shares_cash():
+    candles = {
+        'A': _candles([10, 10, 12, 12, 12], [0], [2]),
+        # B 在第二根K线开仓，资金池只剩 0 元，无法成交
+        'B': _candles([100, 100, 100, 100, 100], [1], [3], size=1.0),
+    }
+    res = backtest_portfolio(candles, commission=0.0, slippage=0.0, init_cash=100.0)
+    stats = res.symbol_stats()
+    assert stats.loc['A', 'Total Trades'] == 1 and stats.loc['B', 'Total Trades'] == 0
+    assert np.isclose(stats.loc['A', 'PnL'], 20.0)
+    assert np.isclose(res.pf.value().iloc[-1], 120.0)
+    assert {order['symbol'] for order in res['orders']} == {'A'}
+
+
+def test_portfolio_engine_sizes_from_shared_pool():
+    universe = [Investment(symbol=s, secType='stock', exchange='X') for s in 'AB']
+    template = Investment(symbol='TEMPLATE', secType='stock', exchange='X')
+    sma = Indicator(uniqueId='sma', pkg='talib', func='SMA', interval='1d', investment=template,
+                    params=[Parameter(key='timeperiod', value=2, type='int')])
+    config = BacktestConfig(
+        environment=BacktestEnvironment(interval='1d', initialCapital=10000, investment=template,
+                                        startTime='2020-01-01', commission=0.0, slippage=0.0),
+        indicators=[sma],
+        signals=[Signal(uniqueId='S1', left='sma.real', func='GT', right='0')],
+        # 每个标的满仓买入
+        rules=[Rule(uniqueId='R1', ruleType=4, action=1,
+                    transactions=[CascadeTransaction(expression='S1', size=100, sizeType=3)])],
+    )
+    index = pd.bdate_range('2020-01-01', periods=12, name='dt')
+    price_data = {
+        str(inv): {'1d': pd.DataFrame({'open': price, 'high': price, 'low': price, 'close': price, 'volume': 1e5},
+                                      index=index)}
+        for inv, price in zip(universe, [50.0, 20.0])
+    }
+    engine = PortfolioEngine(config, universe, price_data=price_data, n_jobs=1)
+    assert [c.environment.initialCapital for c in engine.symbol_configs().values()] == [5000, 5000]
+    engine.run()
+    stats = engine.get_symbol_stats()
+    # 两个标的各用一半资金开仓
+    assert stats.loc['A', 'Position'] == 100 and stats.loc['B', 'Position'] == 250
+    assert engine.result.pf.cash().iloc[-1] == 0
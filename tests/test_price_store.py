@@ -0,0 +1,35 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from podtrader.utils import SharedPriceStore, get_worker_price_data, set_worker_price_data
+
+
+def _price_data():
+    index = pd.date_range('2020-01-01', periods=500, freq='min', name='dt')
+    close = np.linspace(100, 110, len(index))
+    frame = pd.DataFrame({'symbol': 'X:AAA', 'open': close, 'high': close + 1, 'low': close - 1, 'close': close,
+                          'volume': np.arange(len(index))}, index=index)
+    return {'AAA': {'1min': frame, '1d': frame.iloc[::100]}}
+
+
+def _worker_close_sum(key, interval):
+    return float(get_worker_price_data()[key][interval]['close'].sum())
+
+
+@pytest.mark.parametrize('use_directory', [False, True])
+def test_shared_price_store(tmp_path, use_directory):
+    price_data = _price_data()
+    with SharedPriceStore.publish(price_data, directory=str(tmp_path) if use_directory else None) as store:
+        frames = store.attach()
+        for interval, expected in price_data['AAA'].items():
+            pd.testing.assert_frame_equal(frames['AAA'][interval], expected, check_dtype=False, check_freq=False)
+        assert not frames['AAA']['1min']['close'].to_numpy().flags.writeable
+
+        with ProcessPoolExecutor(max_workers=1, initializer=set_worker_price_data, initargs=(store,)) as pool:
+            assert pool.submit(_worker_close_sum, 'AAA', '1min').result() == price_data['AAA']['1min']['close'].sum()
+    assert store.entries == {}
+    if use_directory:
+        assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from podtrader.indicators import pyc
+
+
+@pytest.fixture
+def market(monkeypatch):
+    index = pd.bdate_range('2014-01-01', '2020-12-31', name='dt')
+    rng = np.random.default_rng(0)
+    close = pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(index)))), index=index)
+    bench = pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(index)))), index=index)
+    state = {'end': index[-10], 'downloads': 0}
+
+    def download(symbol, interval, start, datasource):
+        state['downloads'] += 1
+        return pd.DataFrame({'close': bench.loc[:state['end']]})
+
+    pyc.clear_cache()
+    monkeypatch.setattr(pyc, 'download_historical_data', download)
+    monkeypatch.setattr(pyc, '_BENCHMARK_REFRESH', 0.0)
+    yield close, state
+    pyc.clear_cache()
+
+
+def test_benchmark_refreshed_for_new_bars(market):
+    close, state = market
+    first = pyc.zscore(close.iloc[:-10], benchmark='SPY', std_days=20)
+    assert first.index[-1] == close.index[-11] and state['downloads'] == 1
+    # 同一区间不重新下载
+    pyc.zscore(close.iloc[:-10], benchmark='SPY', std_days=5)
+    assert state['downloads'] == 1
+
+    # 新K线到来后 benchmark 数据不再覆盖，重新下载，ZSCORE 随之更新
+    state['end'] = close.index[-1]
+    res = pyc.zscore(close, benchmark='SPY', std_days=20)
+    assert state['downloads'] == 2
+    assert res.dropna().index[-1] == close.index[-1]
+    pd.testing.assert_series_equal(res.iloc[:-10], first, check_freq=False)
+
+
+def test_benchmark_not_refetched_within_refresh_interval(market, monkeypatch):
+    close, state = market
+    monkeypatch.setattr(pyc, '_BENCHMARK_REFRESH', 3600.0)
+    pyc.benchmark_close('SPY', end=close.index[-12])
+    pyc.benchmark_close('SPY', end=close.index[-1])
+    assert state['downloads'] == 1
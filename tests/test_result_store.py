@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from podtrader.backtest_engine import PlotBase
+from podtrader.utils import RESULT_KEYS, backtest_2d, load_results, save_results
+
+
+def _candles(entries, exits, n=60):
+    close = 100 * np.exp(np.cumsum(np.random.default_rng(0).normal(0, 0.02, n)))
+    candles = pd.DataFrame({'open': close, 'high': close, 'low': close, 'close': close},
+                           index=pd.bdate_range('2020-01-01', periods=n))
+    candles['long_entry'] = np.isin(np.arange(n), entries)
+    candles['long_exit'] = np.isin(np.arange(n), exits)
+    candles['short_entry'] = False
+    candles['short_exit'] = False
+    candles['size'] = 10.0
+    return candles
+
+
+def _typed(value):
+    # 比较时区分 2 与 2.0、'2' 与 2、None 与 NaN
+    if isinstance(value, dict):
+        return {k: _typed(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_typed(v) for v in value]
+    if isinstance(value, float) and np.isnan(value):
+        return float, 'nan'
+    return type(value), value
+
+
+@pytest.mark.parametrize('fmt', ['parquet', 'arrow'])
+@pytest.mark.parametrize('entries, exits', [((5, 30), (20,)), ((), ())])
+def test_round_trip(tmp_path, fmt, entries, exits):
+    res = backtest_2d(_candles(entries, exits), init_cash=10000)
+    save_results(PlotBase().parse_bt_result(res), str(tmp_path), fmt=fmt)
+    loaded = load_results(str(tmp_path))
+    for key in RESULT_KEYS:
+        assert _typed(loaded[key]) == _typed(res[key]), key
+
+    plot = PlotBase().parse_bt_result(loaded)
+    trades, orders = plot.get_trades(), plot.get_orders()
+    assert {'entry_index', 'exit_index', 'pnl'} <= set(trades.columns)
+    assert {'signal_index', 'PnL', 'Direction'} <= set(orders.columns)
+    assert len(trades) == (len(entries) > 0) * 2
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+
+from podtrader.utils import myround, round_values
+
+
+def _myround_str(value, precision=4):
+    # 原先基于字符串的实现
+    value = str(value)
+    if value.find('.') == -1:
+        return value
+    int_part, dec_part = value.split('.')
+    if len(dec_part) <= precision:
+        return value
+    return f"{int_part}.{dec_part[:precision]}"
+
+
+def test_myround_matches_string_truncation():
+    rng = np.random.default_rng(0)
+    values = np.concatenate([
+        rng.normal(0, 1, 2000),
+        rng.normal(0, 1e4, 2000),
+        np.round(rng.normal(0, 100, 2000), 4),
+        np.nextafter(np.round(rng.normal(0, 100, 2000), 4), 0),
+        [0.29, -0.00051, 3.0, -0.0, np.nan, np.inf, -np.inf, 1e16],
+    ])
+    for precision in (2, 4):
+        expected = [_myround_str(v, precision) for v in values]
+        assert myround(values, precision).tolist() == expected
+        assert [myround(v, precision) for v in values[::97]] == expected[::97]
+    assert myround(5) == '5'
+    assert myround('1.234567') == '1.2345'
+
+
+def test_myround_large_values():
+    rng = np.random.default_rng(1)
+    # |x| * 10^p 接近 2^52 时 x * 10^p 的舍入误差最大
+    values = np.concatenate([
+        [41404003210250.55, 45000000000000.0078125, 2.0 ** 52 / 100 + 0.25],
+        np.round(rng.uniform(1e12, 1e15, 2000), 2),
+        rng.uniform(1e12, 1e15, 2000),
+    ])
+    values = np.concatenate([values, -values])
+    expected = [_myround_str(v, 2) for v in values]
+    assert myround(values, 2).tolist() == expected
+    assert round_values(values, 2, truncate=True).tolist() == [float(v) for v in expected]
+    assert myround(41404003210250.55, 2) == '41404003210250.55'
+    assert myround(1.5e16) == '1.5e+16' and myround(-3.7e-07) == '-0.0000'
+
+
+def test_myround_containers():
+    frame = pd.DataFrame({'a': [1.23456, 2.0], 'b': [3, 4], 'c': ['5.678901', 'x']})
+    out = myround(frame)
+    assert out.to_dict(orient='list') == {'a': ['1.2345', '2.0'], 'b': ['3', '4'], 'c': ['5.6789', 'x']}
+    series = myround(pd.Series([0.123456, np.nan], name='s'))
+    assert series.tolist() == ['0.1234', 'nan'] and series.name == 's'
+    assert myround(np.array([[1, 2]])).tolist() == [['1', '2']]
+
+
+def test_round_values():
+    arr = np.array([1.23456, -1.23456, 0.29, np.nan, np.inf])
+    assert np.array_equal(round_values(arr, truncate=True)[:3], [1.2345, -1.2345, 0.29])
+    assert round_values(arr, na=None).tolist() == [1.2346, -1.2346, 0.29, None, None]
+    assert round_values(-0.00001) == 0.0 and str(round_values(-0.00001)) == '0.0'
+    assert round_values(None, na='') == ''
+
+    frame = pd.DataFrame({'a': [1.23456, None], 'b': [1, 2], 'c': ['x', 'y'], 'd': [None, 2.000049]})
+    out = round_values(frame, na=0.0)
+    assert out['a'].tolist() == [1.2346, 0.0]
+    assert out['b'].tolist() == [1, 2] and out['b'].dtype.kind == 'i'
+    assert out['c'].tolist() == ['x', 'y']
+    assert out['d'].tolist() == [0.0, 2.0]
+
+
+def test_stats_keep_string_contract():
+    from podtrader.utils import backtest_2d
+
+    n = 40
+    close = np.linspace(100, 80, n)
+    candles = pd.DataFrame({'open': close, 'high': close, 'low': close, 'close': close},
+                           index=pd.bdate_range('2020-01-01', periods=n))
+    candles['long_entry'] = np.isin(np.arange(n), [2])
+    candles['long_exit'] = np.isin(np.arange(n), [10])
+    candles['short_entry'] = False
+    candles['short_exit'] = False
+    candles['size'] = 10.0
+    res = backtest_2d(candles, init_cash=10000)
+
+    summary = {row['name']: row for row in res['summary']}
+    assert summary['Trades']['total'] == '1.0' and summary['Wins']['total'] == '0.0'
+    for row in res['summary'] + res['additional_stats']:
+        assert all(isinstance(row[k], str) for k in ('long', 'short', 'total'))
+    stats = {row['name']: row['value'] for row in res['total_stats']}
+    # 没有盈利交易：NaN 与 NaT 记为 None
+    assert stats['Avg Winning Trade [%]'] is None
+    assert stats['Avg Winning Trade Duration'] is None
+    assert stats['Avg Losing Trade Duration'] == '8 days 00:00:00'
+    assert stats['Start'] == '2020-01-01 00:00:00'
+    assert all(v is None or isinstance(v, str) for v in stats.values())
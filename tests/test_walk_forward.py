@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from podtrader.entities import (
+    BacktestConfig,
+    BacktestEnvironment,
+    CascadeTransaction,
+    Indicator,
+    Investment,
+    Parameter,
+    Rule,
+    Signal,
+)
+from podtrader.optimize import apply_params, make_folds, parameter_grid, walk_forward
+
+
+def test_make_folds_rolling():
+    index = pd.bdate_range('2020-01-01', periods=420)
+    folds = make_folds(index, 200, 100)
+    assert len(folds) == 3
+    assert folds[0] == (index[0], index[199], index[200], index[299])
+    assert folds[1].train_start == index[100]
+    # 最后一个样本外窗口不足 100 根
+    assert folds[-1].test_end == index[-1]
+
+
+def test_make_folds_anchored_by_time():
+    index = pd.bdate_range('2020-01-01', '2022-12-31')
+    folds = make_folds(index, '365D', '90D', anchored=True)
+    assert all(f.train_start == index[0] for f in folds)
+    assert all(a.test_end < b.test_start for a, b in zip(folds, folds[1:]))
+    assert all(f.train_end < f.test_start for f in folds)
+
+
+def test_apply_params():
+    config = BacktestConfig(
+        indicators=[Indicator(uniqueId='sma', params=[Parameter(key='timeperiod', value=10, type='int')])],
+        signals=[{'uniqueId': 'S1', 'func': 'GT'}],
+    )
+    grid = parameter_grid({'sma.timeperiod': [5, 20], 'S1.continuous_time': [2]})
+    assert len(grid) == 2
+
+    new = apply_params(config, grid[1])
+    assert new.indicators[0].get_params() == {'timeperiod': 20}
+    assert new.signals[0].get_params() == {'continuous_time': 2}
+    assert config.indicators[0].get_params() == {'timeperiod': 10}
+    with pytest.raises(KeyError):
+        apply_params(config, {'missing.timeperiod': 1})
+
+
+def test_walk_forward_end_to_end():
+    inv = Investment(symbol='A', secType='stock', exchange='X')
+
+    def sma(uid, period):
+        return Indicator(uniqueId=uid, pkg='talib', func='SMA', interval='1d', investment=inv,
+                         params=[Parameter(key='timeperiod', value=period, type='int')])
+
+    config = BacktestConfig(
+        environment=BacktestEnvironment(interval='1d', initialCapital=5000, investment=inv, startTime='2020-01-01'),
+        indicators=[sma('fast', 2), sma('slow', 5)],
+        signals=[Signal(uniqueId='S1', left='fast.real', func='GT', right='slow.real'),
+                 Signal(uniqueId='S2', left='fast.real', func='LT', right='slow.real')],
+        rules=[Rule(uniqueId='R1', ruleType=4, action=1, transactions=[CascadeTransaction(expression='S1', size=10)]),
+               Rule(uniqueId='R2', ruleType=1, action=2, transactions=[CascadeTransaction(expression='S2', size=10)])],
+    )
+    close = 100 * np.exp(np.cumsum(np.random.default_rng(3).normal(0, 0.02, 45)))
+    candles = pd.DataFrame({'open': close, 'high': close * 1.01, 'low': close * 0.99, 'close': close,
+                            'volume': 1e5}, index=pd.bdate_range('2020-01-01', periods=45, name='dt'))
+    kwargs = dict(param_space={'fast.timeperiod': [2, 3]}, train=15, test=10, metric='Total Return [%]',
+                  warmup=6, price_data={str(inv): {'1d': candles}})
+
+    # 先顺序执行，工作进程继承已编译的内核
+    serial = walk_forward(config, n_jobs=1, **kwargs)
+    res = walk_forward(config, n_jobs=2, **kwargs)
+    assert len(res.folds) == 3
+    assert res.folds['test_start'].tolist() == list(candles.index[15::10])
+    assert set(res.folds['params'].map(lambda p: p['fast.timeperiod'])) <= {2, 3}
+    # 样本外收益首尾相接，覆盖训练窗口之后的每根K线
+    assert res.returns.index.equals(candles.index[15:])
+    assert (res.returns != 0).any()
+    assert res.equity.iloc[-1] == pytest.approx(5000 * np.prod(1 + res.returns.to_numpy()))
+    assert res.total_return == pytest.approx((res.equity.iloc[-1] / 5000 - 1) * 100)
+
+    # 并行与顺序执行结果一致
+    pd.testing.assert_frame_equal(serial.folds, res.folds)
+    pd.testing.assert_series_equal(serial.returns, res.returns, check_freq=False)